@@ -1,5 +1,8 @@
 -- Enable pgvector extension for semantic search
 CREATE EXTENSION IF NOT EXISTS vector;
 
+-- Enable trigram matching for substring and fuzzy search
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
 -- Grant permissions
 GRANT ALL PRIVILEGES ON DATABASE flaskmarks TO flaskmarks;
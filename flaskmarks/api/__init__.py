@@ -21,4 +21,4 @@ CORS(api_v1, resources={
 })
 
 # Import routes after blueprint creation to avoid circular imports
-from . import auth, marks, tags, errors, quickadd
+from . import auth, marks, tags, errors, quickadd, health
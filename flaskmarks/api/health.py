@@ -0,0 +1,41 @@
+"""
+Operational health API endpoints.
+"""
+from __future__ import annotations
+
+import os
+
+from flaskmarks.core.dns_cache import dns_cache
+from flaskmarks.core.http_client import outbound_http
+
+from . import api_v1
+from .auth import token_required
+from .errors import api_response
+
+
+@api_v1.route('/health/outbound', methods=['GET'])
+@token_required
+def outbound_health():
+    """
+    Connection reuse and DNS cache counters of the answering worker.
+
+    Counters are kept per process since it started, so each worker
+    reports its own; ``pid`` tells them apart.
+
+    Response:
+        {
+            "success": true,
+            "data": {
+                "pid": 4242,
+                "http": {"requests": 120, "connections": 9, "reused": 111,
+                         "reuse_ratio": 0.925},
+                "dns": {"hits": 230, "misses": 12, "entries": 12,
+                        "hit_ratio": 0.95}
+            }
+        }
+    """
+    return api_response({
+        'pid': os.getpid(),
+        'http': outbound_http.stats(),
+        'dns': dns_cache.stats(),
+    })
@@ -3,18 +3,44 @@ Mark CRUD and search API endpoints.
 """
 from __future__ import annotations
 
-from datetime import datetime as dt
+import itertools
+from datetime import datetime as dt, timezone
 
 from flask import request, g
 
+from flaskmarks.core.click_buffer import click_buffer
+from flaskmarks.core.export import (
+    EXPORT_FORMATS,
+    export_response,
+    export_stream,
+    iter_mark_records,
+    json_array_chunks,
+)
 from flaskmarks.core.extensions import db
+from flaskmarks.core.pagination import InvalidCursorError
 from flaskmarks.models.mark import Mark
+from flaskmarks.models.mark_stats import MarkStats
 from flaskmarks.models.tag import Tag
 
 from . import api_v1
 from .auth import token_required
 from .errors import api_response, error_response
-from .serializers import serialize_mark, serialize_mark_list, serialize_pagination
+from .serializers import (
+    serialize_export_record,
+    serialize_mark,
+    serialize_mark_list,
+    serialize_pagination,
+)
+
+MAX_CLICK_BATCH = 500
+# Total clicks one batch request may add, across all of its events
+MAX_CLICKS_PER_REQUEST = 1000
+SEARCH_MODES = ('substring', 'fulltext', 'fuzzy', 'hybrid')
+
+
+def _with_total() -> bool:
+    """Whether a cursor-paginated request asked for the exact total."""
+    return request.args.get('with_total', 'false').lower() == 'true'
 
 
 @api_v1.route('/marks', methods=['GET'])
@@ -28,6 +54,9 @@ def list_marks():
         per_page (int): Items per page (default user's setting, max 100)
         type (str): Filter by type (bookmark, feed, youtube)
         sort (str): Sort by 'clicks', 'created', 'updated' (default: user's setting)
+        cursor (str): Opt in to keyset pagination; empty for the first page,
+            then the previous response's ``next_cursor``
+        with_total (bool): In cursor mode, also return the exact total
 
     Response:
         {
@@ -45,24 +74,22 @@ def list_marks():
     mark_type = request.args.get('type')
     sort = request.args.get('sort', user.sort_type)
 
-    query = user.my_marks()
+    query = user.my_marks_with_stats()
 
     # Filter by type
     if mark_type and mark_type in Mark.valid_types:
         query = query.filter(Mark.type == mark_type)
 
-    # Apply sorting
-    match sort:
-        case 'clicks':
-            query = query.order_by(Mark.clicks.desc(), Mark.created.desc())
-        case 'created':
-            query = query.order_by(Mark.created.desc())
-        case 'updated':
-            query = query.order_by(Mark.updated.desc())
-        case _:
-            query = query.order_by(Mark.clicks.desc())
+    cursor = request.args.get('cursor')
+    if cursor is not None and sort == 'updated':
+        return error_response("Cursor pagination is not supported for sort 'updated'", 400)
 
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    try:
+        pagination = user.paginate_marks(
+            query, sort, page, cursor, per_page, with_total=_with_total()
+        )
+    except InvalidCursorError as e:
+        return error_response(str(e), 400)
 
     return api_response({
         'marks': serialize_mark_list(pagination.items),
@@ -88,7 +115,7 @@ def get_mark(mark_id: int):
     user = g.api_user
     include_html = request.args.get('include_html', 'false').lower() == 'true'
 
-    mark = user.get_mark_by_id(mark_id)
+    mark = user.get_mark_by_id(mark_id, include_content=include_html)
 
     if not mark:
         return error_response('Mark not found', 404)
@@ -151,17 +178,7 @@ def create_mark():
     mark.description = data.get('description')
 
     # Process tags
-    tag_titles = data.get('tags', [])
-    tags = []
-    for title in tag_titles:
-        title = title.lower().strip()
-        if title:
-            tag = Tag.check(title)
-            if not tag:
-                tag = Tag(title)
-                db.session.add(tag)
-            tags.append(tag)
-    mark.tags = tags
+    mark.tags = Tag.resolve(data.get('tags', []))
 
     db.session.add(mark)
     db.session.commit()
@@ -234,16 +251,7 @@ def update_mark(mark_id: int):
 
     # Update tags if provided
     if 'tags' in data:
-        tags = []
-        for title in data['tags']:
-            title = title.lower().strip()
-            if title:
-                tag = Tag.check(title)
-                if not tag:
-                    tag = Tag(title)
-                    db.session.add(tag)
-                tags.append(tag)
-        mark.tags = tags
+        mark.tags = Tag.resolve(data['tags'])
 
     mark.updated = dt.utcnow()
     db.session.commit()
@@ -291,16 +299,91 @@ def increment_clicks(mark_id: int):
     """
     user = g.api_user
 
-    mark = user.get_mark_by_id(mark_id)
+    stats = MarkStats.for_owner(mark_id, user.id)
 
-    if not mark:
+    if not stats:
         return error_response('Mark not found', 404)
 
-    mark.clicks += 1
-    mark.last_clicked = dt.utcnow()
-    db.session.commit()
+    click_buffer.record(mark_id, user.id)
+    clicks = stats.clicks + click_buffer.pending(mark_id, user.id)
+
+    return api_response({'clicks': clicks}, message='Click recorded')
 
-    return api_response({'clicks': mark.clicks}, message='Click recorded')
+
+@api_v1.route('/marks/clicks', methods=['POST'])
+@token_required
+def record_clicks():
+    """
+    Record a batch of click events in one call.
+
+    Events are buffered and written in bulk. Events for marks the user does
+    not own are rejected, and a request adds at most
+    ``MAX_CLICKS_PER_REQUEST`` clicks; counts beyond that are dropped.
+
+    Request body:
+        {
+            "clicks": [
+                {"id": 12},
+                {"id": 15, "count": 3, "clicked_at": "2024-01-15T10:30:00"}
+            ]
+        }
+
+    Response:
+        {
+            "success": true,
+            "data": {"accepted": 4, "rejected": 0},
+            "message": "Clicks recorded"
+        }
+    """
+    user = g.api_user
+    data = request.get_json(silent=True)
+
+    if not data or not isinstance(data.get('clicks'), list):
+        return error_response('Request body with a clicks list required', 400)
+
+    events = data['clicks']
+    if len(events) > MAX_CLICK_BATCH:
+        return error_response(
+            f'At most {MAX_CLICK_BATCH} click events per request',
+            422,
+            {'clicks': 'Too many events'}
+        )
+
+    parsed = []
+    for index, event in enumerate(events):
+        try:
+            mark_id = int(event['id'])
+            count = int(event.get('count', 1))
+            clicked_at = event.get('clicked_at')
+            clicked_at = dt.fromisoformat(clicked_at) if clicked_at else None
+        except (KeyError, TypeError, ValueError, AttributeError):
+            return error_response(
+                'Validation failed',
+                422,
+                {f'clicks[{index}]': 'Expected {"id": int, "count": int, "clicked_at": iso8601}'}
+            )
+        if clicked_at and clicked_at.tzinfo:
+            clicked_at = clicked_at.astimezone(timezone.utc).replace(tzinfo=None)
+        if clicked_at and clicked_at > dt.utcnow():
+            clicked_at = None
+        parsed.append((mark_id, max(0, min(count, MAX_CLICK_BATCH)), clicked_at))
+
+    owned = MarkStats.owned_ids(user.id, (mark_id for mark_id, _, _ in parsed))
+    accepted = rejected = 0
+    for mark_id, count, clicked_at in parsed:
+        if mark_id not in owned:
+            rejected += 1
+            continue
+        count = min(count, MAX_CLICKS_PER_REQUEST - accepted)
+        if count <= 0:
+            continue
+        click_buffer.record(mark_id, user.id, count=count, clicked_at=clicked_at)
+        accepted += count
+
+    return api_response(
+        {'accepted': accepted, 'rejected': rejected},
+        message='Clicks recorded',
+    )
 
 
 # Search endpoints
@@ -316,12 +399,20 @@ def search_marks():
         page (int): Page number (default 1)
         per_page (int): Items per page (default user's setting, max 100)
         type (str): Filter by type (bookmark, feed, youtube)
+        mode (str): 'substring' (default) matches title/url/description
+            substrings and body words; 'fulltext' ranks by relevance;
+            'fuzzy' tolerates typos; 'hybrid' fuses full-text and
+            embedding similarity rankings (no LLM call; full-text ranking
+            only on SQLite)
+        cursor (str): Opt in to keyset pagination (see ``GET /marks``);
+            substring mode only
 
     Response:
         {
             "success": true,
             "data": {
                 "query": "search term",
+                "mode": "substring",
                 "marks": [...],
                 "pagination": {...}
             }
@@ -337,10 +428,30 @@ def search_marks():
     per_page = min(request.args.get('per_page', user.per_page, type=int), 100)
     mark_type = request.args.get('type', '')
 
-    pagination = user.q_marks_by_string(page, query, mark_type)
+    mode = request.args.get('mode', 'substring')
+    if mode not in SEARCH_MODES:
+        return error_response(f"mode must be one of: {', '.join(SEARCH_MODES)}", 400)
+
+    cursor = request.args.get('cursor')
+    if cursor is not None and mode != 'substring':
+        return error_response('Cursor pagination is only supported for mode=substring', 400)
+
+    match mode:
+        case 'hybrid':
+            pagination = user.q_marks_by_hybrid(page, query, mark_type)
+        case 'fulltext':
+            pagination = user.q_marks_by_fulltext(page, query, mark_type, headlines=False)
+        case 'fuzzy':
+            pagination = user.q_marks_by_fuzzy(page, query, mark_type)
+        case _:
+            try:
+                pagination = user.q_marks_by_string(page, query, mark_type, cursor=cursor)
+            except InvalidCursorError as e:
+                return error_response(str(e), 400)
 
     return api_response({
         'query': query,
+        'mode': mode,
         'marks': serialize_mark_list(pagination.items),
         'pagination': serialize_pagination(pagination)
     })
@@ -355,6 +466,7 @@ def get_marks_by_tag(tag_slug: str):
     Query params:
         page (int): Page number (default 1)
         per_page (int): Items per page (default user's setting, max 100)
+        cursor (str): Opt in to keyset pagination (see ``GET /marks``)
 
     Response:
         {
@@ -370,7 +482,12 @@ def get_marks_by_tag(tag_slug: str):
 
     page = request.args.get('page', 1, type=int)
 
-    pagination = user.q_marks_by_tag(tag_slug, page)
+    try:
+        pagination = user.q_marks_by_tag(
+            tag_slug, page, cursor=request.args.get('cursor')
+        )
+    except InvalidCursorError as e:
+        return error_response(str(e), 400)
 
     return api_response({
         'tag': tag_slug,
@@ -383,27 +500,48 @@ def get_marks_by_tag(tag_slug: str):
 @token_required
 def export_marks():
     """
-    Export all marks as JSON.
+    Stream all marks for backup or migration.
 
-    Response:
+    Query params:
+        format (str): 'json' (default), 'ndjson' or 'html' (Netscape
+            bookmark file)
+        gzip (bool): Gzip the body on the fly (``Content-Encoding: gzip``)
+
+    Response (format=json):
         {
             "success": true,
             "data": {
+                "exported_at": "2024-01-15T10:30:00",
                 "marks": [...],
-                "total": 150,
-                "exported_at": "2024-01-15T10:30:00"
+                "total": 150
             }
         }
     """
-    user = g.api_user
-
-    marks = user.all_marks()
-
-    return api_response({
-        'marks': serialize_mark_list(marks),
-        'total': len(marks),
-        'exported_at': dt.utcnow().isoformat()
-    })
+    fmt = request.args.get('format', 'json')
+    if fmt not in EXPORT_FORMATS:
+        return error_response(
+            'Invalid format. Must be one of: %s' % ', '.join(EXPORT_FORMATS), 400
+        )
+
+    records = iter_mark_records(g.api_user.id)
+    if fmt == 'json':
+        # Same envelope as api_response(), written around the streamed array
+        chunks = json_array_chunks(
+            records,
+            serialize_export_record,
+            head={'exported_at': dt.utcnow().isoformat()},
+            total_key='total',
+        )
+        chunks = itertools.chain(['{"success": true, "data": '], chunks, ['}'])
+    else:
+        chunks = export_stream(fmt, records, serialize_export_record)
+
+    return export_response(
+        fmt,
+        chunks,
+        'marks',
+        compress=request.args.get('gzip', 'false').lower() == 'true',
+    )
 
 
 @api_v1.route('/marks/stats', methods=['GET'])
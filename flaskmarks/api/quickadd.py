@@ -59,13 +59,8 @@ def async_metadata_extraction(mark_id: int, url: str, app) -> None:
                     # Add auto-extracted tags
                     if data.get('tags'):
                         existing_tag_titles = {t.title.lower() for t in mark.tags}
-                        for tag_title in data['tags']:
-                            tag_title = str(tag_title).lower().strip()
-                            if tag_title and tag_title not in existing_tag_titles:
-                                tag = Tag.check(tag_title)
-                                if not tag:
-                                    tag = Tag(tag_title)
-                                    db.session.add(tag)
+                        for tag in Tag.resolve(data['tags']):
+                            if tag.title not in existing_tag_titles:
                                 mark.tags.append(tag)
 
                     mark.updated = dt.utcnow()
@@ -185,14 +180,7 @@ def quickadd():
     if isinstance(tag_input, str):
         tag_input = [t.strip() for t in tag_input.split(',') if t.strip()]
 
-    for title in tag_input:
-        title = title.lower().strip()
-        if title:
-            tag = Tag.check(title)
-            if not tag:
-                tag = Tag(title)
-                db.session.add(tag)
-            mark.tags.append(tag)
+    mark.tags.extend(Tag.resolve(tag_input))
 
     db.session.commit()
 
@@ -6,6 +6,8 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Any
 
+from flaskmarks.core.export import ExportRecord
+from flaskmarks.core.pagination import KeysetPage
 from flaskmarks.models.mark import Mark
 from flaskmarks.models.tag import Tag
 from flaskmarks.models.user import User
@@ -75,6 +77,30 @@ def serialize_mark_list(marks: list[Mark]) -> list[dict]:
     return [serialize_mark(mark) for mark in marks]
 
 
+def serialize_export_record(record: ExportRecord) -> dict:
+    """
+    Serialize a streamed export record with the same keys as serialize_mark.
+
+    Args:
+        record: ExportRecord from the export cursor
+
+    Returns:
+        Dict with mark data
+    """
+    return {
+        'id': record.id,
+        'type': record.type,
+        'title': record.title,
+        'description': record.description,
+        'url': record.url,
+        'clicks': record.clicks,
+        'last_clicked': serialize_datetime(record.last_clicked),
+        'created': serialize_datetime(record.created),
+        'updated': serialize_datetime(record.updated),
+        'tags': [{'id': tag_id, 'title': title} for tag_id, title in record.tags]
+    }
+
+
 def serialize_user(user: User, include_email: bool = True) -> dict:
     """
     Serialize a User model to dict.
@@ -102,14 +128,24 @@ def serialize_user(user: User, include_email: bool = True) -> dict:
 
 def serialize_pagination(pagination) -> dict:
     """
-    Serialize Flask-SQLAlchemy pagination info.
+    Serialize Flask-SQLAlchemy or keyset pagination info.
 
     Args:
-        pagination: Pagination object
+        pagination: Pagination or KeysetPage object
 
     Returns:
         Dict with pagination metadata
     """
+    if isinstance(pagination, KeysetPage):
+        return {
+            'per_page': pagination.per_page,
+            'total': pagination.total,
+            'cursor': pagination.cursor or None,
+            'next_cursor': pagination.next_cursor,
+            'has_next': pagination.has_next,
+            'has_prev': pagination.has_prev
+        }
+
     return {
         'page': pagination.page,
         'per_page': pagination.per_page,
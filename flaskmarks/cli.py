@@ -6,6 +6,7 @@ This module replaces the deprecated Flask-Script with Click CLI commands.
 from __future__ import annotations
 
 from typing import TYPE_CHECKING
+from uuid import uuid4
 
 import click
 
@@ -86,32 +87,112 @@ def register_cli(app: Flask) -> None:
     @click.argument("filepath", type=click.Path(exists=True))
     @click.option("--user-id", type=int, required=True, help="User ID to import marks for")
     def import_marks(filepath: str, user_id: int):
-        """Import bookmarks from a text file (one URL per line)."""
+        """Import bookmarks from a text file (one URL per line) or a browser export.
+
+        Browser exports are bookmark HTML files, Firefox bookmarks-*.json
+        backups and the Chromium "Bookmarks" profile file.
+        """
         from flaskmarks.models import User
-        from flaskmarks.core.marks_import_thread import MarksImportThread
-        
+        from flaskmarks.core.bookmark_import import (
+            count_json_bookmarks,
+            count_netscape_bookmarks,
+            count_url_lines,
+            iter_json_bookmarks,
+            iter_netscape_bookmarks,
+            iter_url_lines,
+            sniff_bookmark_format,
+        )
+        from flaskmarks.core.import_job_status_service import create_or_reset_import_job
+        from flaskmarks.core.import_jobs import run_import_job
+
         user = User.query.get(user_id)
         if not user:
             click.echo(f"Error: User with ID {user_id} not found.")
             return
-        
-        with open(filepath, 'r') as f:
-            urls = [line.strip() for line in f if line.strip()]
-        
-        click.echo(f"Importing {len(urls)} URLs for user '{user.username}'...")
-        
-        imported = 0
-        for url in urls:
-            try:
-                importer = MarksImportThread(url, user_id)
-                result = importer.run()
-                if result:
-                    imported += 1
-                    click.echo(f"  Imported: {result.get('title', url)[:50]}")
-            except Exception as e:
-                click.echo(f"  Failed: {url} - {e}")
-        
-        click.echo(f"Import complete. {imported}/{len(urls)} URLs imported.")
+
+        file_format = sniff_bookmark_format(filepath)
+        if file_format == 'html':
+            total = count_netscape_bookmarks(filepath)
+            items = iter_netscape_bookmarks(filepath)
+        elif file_format == 'json':
+            total = count_json_bookmarks(filepath)
+            items = iter_json_bookmarks(filepath)
+        else:
+            total = count_url_lines(filepath)
+            items = iter_url_lines(filepath)
+
+        job_id = uuid4().hex
+        create_or_reset_import_job(user_id=user_id, job_id=job_id, total_lines=total)
+        click.echo(f"Importing {total} URLs for user '{user.username}' as job {job_id}...")
+
+        summary = run_import_job(app, user_id, job_id, items)
+
+        click.echo(
+            f"Import complete. {summary.imported}/{total} URLs imported, "
+            f"{summary.skipped} skipped, {summary.failed} failed."
+        )
+
+    @app.cli.command("import-resume")
+    @click.argument("job_id", required=False)
+    def import_resume(job_id: str | None):
+        """Resume an interrupted import job, or every stale one."""
+        from flaskmarks.core.import_jobs import resume_import_jobs, run_import_job
+        from flaskmarks.models import ImportJobStatus
+
+        if job_id is None:
+            summaries = resume_import_jobs(app)
+            if not summaries:
+                click.echo("No interrupted import jobs.")
+            for resumed, summary in summaries.items():
+                click.echo(f"Job {resumed}: {summary.imported} imported, {summary.failed} failed.")
+            return
+
+        job = ImportJobStatus.query.filter_by(job_id=job_id).first()
+        if job is None:
+            click.echo(f"Error: Import job {job_id} not found.")
+            return
+
+        summary = run_import_job(app, job.user_id, job_id)
+        if summary is None:
+            click.echo(f"Error: Import job {job_id} is still running elsewhere.")
+            return
+        click.echo(f"Job {job_id}: {summary.imported} imported, {summary.failed} failed.")
+
+    @app.cli.command("import-retry")
+    @click.argument("job_id")
+    @click.option("--user-id", type=int, required=True, help="User ID the job belongs to")
+    @click.option("--error-class", help="Only retry URLs that failed with this error, e.g. ConnectTimeout")
+    def import_retry(job_id: str, user_id: int, error_class: str | None):
+        """Retry the failed URLs of an import job."""
+        from flaskmarks.core.import_job_status_service import retry_failed_import_items
+        from flaskmarks.core.import_jobs import run_import_job
+
+        requeued = retry_failed_import_items(user_id, job_id, error_class)
+        if not requeued:
+            click.echo("No failed URLs to retry.")
+            return
+
+        click.echo(f"Retrying {requeued} URLs...")
+        summary = run_import_job(app, user_id, job_id)
+        if summary is None:
+            click.echo(f"Job {job_id} is running elsewhere; the URLs were queued for it.")
+            return
+        click.echo(f"Retry complete. {summary.imported} imported, {summary.failed} failed.")
+
+    @app.cli.command("search-reindex")
+    def search_reindex():
+        """Rebuild the SQLite FTS5 search index from the marks table."""
+        from flaskmarks.core.extensions import db
+        from flaskmarks.core.search_backend import SqliteFtsSearchBackend
+
+        if db.engine.dialect.name != 'sqlite':
+            click.echo("Search index is maintained by PostgreSQL; nothing to rebuild.")
+            return
+
+        with db.engine.begin() as connection:
+            SqliteFtsSearchBackend().install(connection)
+            SqliteFtsSearchBackend.rebuild(connection)
+        click.echo("Search index rebuilt.")
 
     # RAG CLI commands
     @app.cli.group()
@@ -128,8 +209,8 @@ def register_cli(app: Flask) -> None:
         from flaskmarks.models import Mark
         from flaskmarks.core.rag.embeddings import EmbeddingService
 
-        # Build query
-        query = Mark.query
+        # Build query (embedding text is built from the deferred article body)
+        query = Mark.query.options(*Mark.content_options())
         if user_id:
             query = query.filter(Mark.owner_id == user_id)
         if not force:
@@ -0,0 +1,195 @@
+"""
+Write-behind buffer for mark click counters.
+
+Clicks are accepted in-process, coalesced per mark and flushed to
+``mark_stats`` in one bulk UPDATE every ``CLICK_FLUSH_INTERVAL_MS`` or once
+``CLICK_FLUSH_MAX_EVENTS`` clicks are pending, whichever comes first. The
+buffer is flushed one last time when the worker process exits.
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime as dt
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from flask import Flask
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_INTERVAL_MS = 1000
+DEFAULT_FLUSH_MAX_EVENTS = 200
+
+
+@dataclass
+class PendingClicks:
+    """Coalesced, not yet persisted clicks for a single mark."""
+    count: int
+    last_clicked: dt
+
+
+class ClickBuffer:
+    """
+    In-process click accumulator with periodic batched flushes.
+
+    Each worker process owns one buffer. Flushes run on a daemon thread
+    inside an application context; when the buffer is disabled every
+    ``record()`` is written through immediately.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pending: dict[tuple[int, int], PendingClicks] = {}
+        self._events = 0
+        self._app: Flask | None = None
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._atexit_registered = False
+        self.enabled = True
+        self.flush_interval = DEFAULT_FLUSH_INTERVAL_MS / 1000
+        self.max_events = DEFAULT_FLUSH_MAX_EVENTS
+
+    def init_app(self, app: Flask) -> None:
+        """
+        Bind the buffer to an application and read its settings.
+
+        Args:
+            app: The Flask application instance
+        """
+        app.config.setdefault('CLICK_BUFFER_ENABLED', True)
+        app.config.setdefault('CLICK_FLUSH_INTERVAL_MS', DEFAULT_FLUSH_INTERVAL_MS)
+        app.config.setdefault('CLICK_FLUSH_MAX_EVENTS', DEFAULT_FLUSH_MAX_EVENTS)
+
+        self._app = app
+        self.enabled = bool(app.config['CLICK_BUFFER_ENABLED'])
+        self.flush_interval = max(int(app.config['CLICK_FLUSH_INTERVAL_MS']), 1) / 1000
+        self.max_events = max(int(app.config['CLICK_FLUSH_MAX_EVENTS']), 1)
+
+        if not self._atexit_registered:
+            atexit.register(self.shutdown)
+            self._atexit_registered = True
+
+    def record(
+        self,
+        mark_id: int,
+        owner_id: int,
+        count: int = 1,
+        clicked_at: dt | None = None,
+    ) -> None:
+        """
+        Accept click events for a mark.
+
+        Args:
+            mark_id: ID of the clicked mark
+            owner_id: ID of the user who clicked (and must own the mark)
+            count: Number of clicks to add
+            clicked_at: When the (latest) click happened, defaults to now
+        """
+        if count <= 0:
+            return
+        clicked_at = clicked_at or dt.utcnow()
+
+        with self._lock:
+            self._merge((mark_id, owner_id), count, clicked_at)
+            full = self._events >= self.max_events
+
+        if not self.enabled:
+            self.flush()
+            return
+
+        self._ensure_worker()
+        if full:
+            self._wakeup.set()
+
+    def pending(self, mark_id: int, owner_id: int) -> int:
+        """Return the number of buffered clicks not yet written for a mark."""
+        with self._lock:
+            pending = self._pending.get((mark_id, owner_id))
+            return pending.count if pending else 0
+
+    def flush(self) -> int:
+        """
+        Write all buffered clicks to the database.
+
+        Returns:
+            Number of marks updated
+        """
+        with self._lock:
+            batch = self._pending
+            self._pending = {}
+            self._events = 0
+
+        if not batch or self._app is None:
+            return 0
+
+        from flaskmarks.models.mark_stats import MarkStats
+
+        rows = [
+            {
+                'mark_id': mark_id,
+                'owner_id': owner_id,
+                'count': pending.count,
+                'last_clicked': pending.last_clicked,
+            }
+            for (mark_id, owner_id), pending in batch.items()
+        ]
+
+        with self._app.app_context():
+            try:
+                MarkStats.apply_clicks(rows)
+            except Exception as e:
+                from flaskmarks.core.extensions import db
+                db.session.rollback()
+                logger.error(f"Click flush failed, requeueing {len(rows)} marks: {e}")
+                with self._lock:
+                    for key, pending in batch.items():
+                        self._merge(key, pending.count, pending.last_clicked)
+                return 0
+
+        return len(rows)
+
+    def shutdown(self) -> None:
+        """Stop the flush thread and write out anything still buffered."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def _merge(self, key: tuple[int, int], count: int, clicked_at: dt) -> None:
+        """Coalesce clicks into the pending map; caller holds the lock."""
+        pending = self._pending.get(key)
+        if pending is None:
+            self._pending[key] = PendingClicks(count, clicked_at)
+        else:
+            pending.count += count
+            pending.last_clicked = max(pending.last_clicked, clicked_at)
+        self._events += count
+
+    def _ensure_worker(self) -> None:
+        """Start the background flush thread on first use in this process."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                name='click-buffer-flush',
+                daemon=True,
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+click_buffer = ClickBuffer()
@@ -0,0 +1,143 @@
+"""
+Process-wide DNS resolution cache for outbound fetches.
+
+Imports and quick-adds hit thousands of URLs on a few hundred hosts, and
+every URL used to pay one ``getaddrinfo`` in the validator and another
+when the HTTP client connected. ``DNSCache`` keeps each answer for
+``DNS_CACHE_TTL`` seconds (failed lookups for ``DNS_CACHE_NEGATIVE_TTL``)
+so a host resolves once per TTL, and the same answer is used both to
+validate a URL and to open its connection.
+"""
+from __future__ import annotations
+
+import socket
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from flask import Flask
+
+DEFAULT_TTL = 300.0
+DEFAULT_NEGATIVE_TTL = 30.0
+DEFAULT_MAX_ENTRIES = 10000
+
+AddrInfo = tuple[Any, ...]
+
+
+@dataclass
+class _Entry:
+    """One cached answer: address infos, or the lookup error."""
+    expires: float
+    addrinfos: list[AddrInfo] | None = None
+    error: socket.gaierror | None = None
+
+
+class DNSCache:
+    """
+    TTL-bounded LRU cache in front of ``socket.getaddrinfo``.
+
+    Entries are keyed by host name; the port does not change the answer.
+    Concurrent misses for the same host wait for a single lookup instead
+    of all querying the resolver.
+    """
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_TTL,
+        negative_ttl: float = DEFAULT_NEGATIVE_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._inflight: dict[str, threading.Lock] = {}
+
+    def init_app(self, app: Flask) -> None:
+        """
+        Read the cache settings of an application.
+
+        Args:
+            app: The Flask application instance
+        """
+        app.config.setdefault('DNS_CACHE_TTL', DEFAULT_TTL)
+        app.config.setdefault('DNS_CACHE_NEGATIVE_TTL', DEFAULT_NEGATIVE_TTL)
+        app.config.setdefault('DNS_CACHE_SIZE', DEFAULT_MAX_ENTRIES)
+
+        self.ttl = max(float(app.config['DNS_CACHE_TTL']), 0.0)
+        self.negative_ttl = max(float(app.config['DNS_CACHE_NEGATIVE_TTL']), 0.0)
+        self.max_entries = max(int(app.config['DNS_CACHE_SIZE']), 1)
+
+    def getaddrinfo(self, host: str) -> list[AddrInfo]:
+        """
+        Resolve ``host`` for TCP, from the cache while the answer is fresh.
+
+        Raises:
+            socket.gaierror: If the host does not resolve (also cached)
+        """
+        key = host.lower()
+        entry = self._fresh(key)
+        if entry is None:
+            with self._lock:
+                inflight = self._inflight.setdefault(key, threading.Lock())
+            with inflight:
+                # Another thread may have resolved it while we waited
+                entry = self._fresh(key) or self._resolve(key)
+            with self._lock:
+                self._inflight.pop(key, None)
+        if entry.error is not None:
+            raise entry.error
+        return list(entry.addrinfos)
+
+    def stats(self) -> dict[str, int | float]:
+        """Lookups answered from the cache and from the resolver since start."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        """Forget every cached answer."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def _fresh(self, key: str) -> _Entry | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires <= time.monotonic():
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def _resolve(self, key: str) -> _Entry:
+        now = time.monotonic()
+        try:
+            entry = _Entry(
+                now + self.ttl,
+                addrinfos=socket.getaddrinfo(key, None, proto=socket.IPPROTO_TCP),
+            )
+        except socket.gaierror as exc:
+            entry = _Entry(now + self.negative_ttl, error=exc)
+
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+
+dns_cache = DNSCache()
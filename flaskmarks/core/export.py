@@ -0,0 +1,262 @@
+"""
+Streaming mark export.
+
+Exports never materialise a user's marks. Narrow rows (no ``full_html``,
+``search_vector`` or ``embedding``) are read through a server-side cursor
+``EXPORT_CHUNK_SIZE`` at a time, each chunk's tags are fetched with one
+``IN`` query, and the serialised output is yielded piecewise so a worker's
+memory stays flat whatever the account size.
+"""
+from __future__ import annotations
+
+import html
+import json
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime as dt
+from typing import Any, Callable, Iterable, Iterator
+
+from flask import Response, stream_with_context
+from sqlalchemy import select
+
+from flaskmarks.core.extensions import db
+from flaskmarks.models.mark import Mark, ass_tbl
+from flaskmarks.models.mark_stats import MarkStats
+from flaskmarks.models.tag import Tag
+
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_FORMATS = ('json', 'ndjson', 'html')
+EXPORT_MIMETYPES = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+    'html': 'text/html',
+}
+
+
+@dataclass(frozen=True)
+class ExportRecord:
+    """One exported mark with its tag titles, detached from the session."""
+    id: int
+    type: str
+    title: str
+    description: str | None
+    url: str
+    created: dt | None
+    updated: dt | None
+    clicks: int
+    last_clicked: dt | None
+    tags: tuple[tuple[int, str], ...]
+
+
+def iter_mark_records(
+    owner_id: int, chunk_size: int = EXPORT_CHUNK_SIZE
+) -> Iterator[ExportRecord]:
+    """
+    Stream every mark owned by a user in id order.
+
+    Args:
+        owner_id: ID of the user whose marks are exported
+        chunk_size: Rows fetched per server-side cursor round trip
+
+    Yields:
+        ExportRecord per mark
+    """
+    stmt = (
+        select(
+            Mark.id, Mark.type, Mark.title, Mark.description, Mark.url,
+            Mark.created, Mark.updated,
+            MarkStats.clicks, MarkStats.last_clicked,
+        )
+        .outerjoin(MarkStats, MarkStats.mark_id == Mark.id)
+        .where(Mark.owner_id == owner_id)
+        .order_by(Mark.id)
+    )
+    result = db.session.execute(stmt, execution_options={'yield_per': chunk_size})
+    for rows in result.partitions():
+        tags = _tags_for([row.id for row in rows])
+        for row in rows:
+            yield ExportRecord(
+                id=row.id,
+                type=row.type,
+                title=row.title,
+                description=row.description,
+                url=row.url,
+                created=row.created,
+                updated=row.updated,
+                clicks=row.clicks or 0,
+                last_clicked=row.last_clicked,
+                tags=tuple(tags.get(row.id, ())),
+            )
+
+
+def _tags_for(mark_ids: list[int]) -> dict[int, list[tuple[int, str]]]:
+    """Map each mark id in one export chunk to its ``(tag id, title)`` pairs."""
+    tags: dict[int, list[tuple[int, str]]] = defaultdict(list)
+    if not mark_ids:
+        return tags
+    rows = db.session.execute(
+        select(ass_tbl.c.left_id, Tag.id, Tag.title)
+        .join(Tag, Tag.id == ass_tbl.c.right_id)
+        .where(ass_tbl.c.left_id.in_(mark_ids))
+        .order_by(ass_tbl.c.left_id, Tag.title)
+    )
+    for mark_id, tag_id, title in rows:
+        tags[mark_id].append((tag_id, title))
+    return tags
+
+
+def _epoch(value: dt | None) -> str:
+    """Format a timestamp as epoch seconds, the shape the JSON importer reads."""
+    return value.strftime('%s') if value else ''
+
+
+def import_record(record: ExportRecord) -> dict[str, Any]:
+    """Serialise a record in the format accepted by ``Mark.insert_from_import``."""
+    return {
+        'title': record.title,
+        'type': record.type,
+        'url': record.url,
+        'clicks': record.clicks,
+        'last_clicked': _epoch(record.last_clicked),
+        'created': _epoch(record.created),
+        'updated': _epoch(record.updated),
+        'tags': [title for _id, title in record.tags],
+    }
+
+
+def ndjson_chunks(
+    records: Iterable[ExportRecord],
+    serialize: Callable[[ExportRecord], dict] = import_record,
+) -> Iterator[str]:
+    """Yield one JSON document per line."""
+    for record in records:
+        yield json.dumps(serialize(record)) + '\n'
+
+
+def json_array_chunks(
+    records: Iterable[ExportRecord],
+    serialize: Callable[[ExportRecord], dict] = import_record,
+    head: dict[str, Any] | None = None,
+    total_key: str | None = None,
+) -> Iterator[str]:
+    """
+    Yield a JSON object whose ``marks`` array is written one element at a time.
+
+    Args:
+        records: Records to export
+        serialize: Converts a record to a JSON-serialisable dict
+        head: Keys written before ``marks``
+        total_key: If set, the number of exported marks is written under
+            this key after the array, so no up-front ``COUNT`` is needed
+
+    Yields:
+        Fragments that concatenate to a single JSON document
+    """
+    prefix = json.dumps(head or {})[:-1]
+    yield prefix + (', ' if head else '') + '"marks": ['
+    count = 0
+    for record in records:
+        yield (', ' if count else '') + json.dumps(serialize(record))
+        count += 1
+    yield ']'
+    if total_key:
+        yield ', %s: %d' % (json.dumps(total_key), count)
+    yield '}'
+
+
+def netscape_chunks(records: Iterable[ExportRecord]) -> Iterator[str]:
+    """Yield a Netscape bookmark file, readable by every browser's importer."""
+    yield (
+        '<!DOCTYPE NETSCAPE-Bookmark-file-1>\n'
+        '<META HTTP-EQUIV="Content-Type" CONTENT="text/html; charset=UTF-8">\n'
+        '<TITLE>Bookmarks</TITLE>\n'
+        '<H1>Bookmarks</H1>\n'
+        '<DL><p>\n'
+    )
+    for record in records:
+        attrs = 'HREF="%s" ADD_DATE="%s"' % (
+            html.escape(record.url), _epoch(record.created) or '0'
+        )
+        if record.updated:
+            attrs += ' LAST_MODIFIED="%s"' % _epoch(record.updated)
+        if record.tags:
+            attrs += ' TAGS="%s"' % html.escape(
+                ','.join(title for _id, title in record.tags)
+            )
+        entry = '    <DT><A %s>%s</A>\n' % (attrs, html.escape(record.title or ''))
+        if record.description:
+            entry += '    <DD>%s\n' % html.escape(record.description)
+        yield entry
+    yield '</DL><p>\n'
+
+
+def gzip_chunks(chunks: Iterable[str], level: int = 6) -> Iterator[bytes]:
+    """
+    Gzip a text stream on the fly.
+
+    Only non-empty compressor output is yielded, so small fragments are
+    coalesced by zlib instead of becoming one HTTP chunk each.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(
+    fmt: str,
+    records: Iterable[ExportRecord],
+    serialize: Callable[[ExportRecord], dict] = import_record,
+    **json_options: Any,
+) -> Iterator[str]:
+    """
+    Build the text stream for an export format.
+
+    Args:
+        fmt: One of ``EXPORT_FORMATS``
+        records: Records to export
+        serialize: Record serialiser for the JSON formats
+        **json_options: Passed to ``json_array_chunks``
+
+    Raises:
+        ValueError: For an unknown format
+    """
+    if fmt == 'ndjson':
+        return ndjson_chunks(records, serialize)
+    if fmt == 'json':
+        return json_array_chunks(records, serialize, **json_options)
+    if fmt == 'html':
+        return netscape_chunks(records)
+    raise ValueError('Unknown export format: %s' % fmt)
+
+
+def export_response(
+    fmt: str, chunks: Iterable[str], filename: str, compress: bool = False
+) -> Response:
+    """
+    Wrap an export stream in a streamed attachment response.
+
+    The generator runs inside the request context, so the session and
+    server-side cursor stay open until the last chunk has been sent.
+
+    Args:
+        fmt: One of ``EXPORT_FORMATS``
+        chunks: Text stream from ``export_stream``
+        filename: Download filename, without the format extension
+        compress: Gzip the body and send ``Content-Encoding: gzip``
+    """
+    body = gzip_chunks(chunks) if compress else (c.encode('utf-8') for c in chunks)
+    response = Response(
+        stream_with_context(body),
+        mimetype=EXPORT_MIMETYPES[fmt],
+    )
+    response.headers['Content-Disposition'] = (
+        'attachment; filename=%s.%s' % (filename, fmt)
+    )
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+        response.vary.add('Accept-Encoding')
+    return response
@@ -46,6 +46,26 @@ def init_extensions(app: Flask) -> None:
     # UI
     bootstrap.init_app(app)
 
+    # Write-behind click counters
+    from flaskmarks.core.click_buffer import click_buffer
+    click_buffer.init_app(app)
+
+    # Outbound fetches resolve each host once per TTL
+    from flaskmarks.core.dns_cache import dns_cache
+    dns_cache.init_app(app)
+
+    # Pooled keep-alive client for every outbound fetch
+    from flaskmarks.core.http_client import outbound_http
+    outbound_http.init_app(app)
+
+    # Fetched pages are revalidated instead of downloaded again
+    from flaskmarks.core.fetch_cache import fetch_cache
+    fetch_cache.init_app(app)
+
+    # Pick up imports interrupted by a restart
+    from flaskmarks.core.import_jobs import import_job_resumer
+    import_job_resumer.init_app(app)
+
     # Debug toolbar (only in debug mode)
     if app.debug:
         try:
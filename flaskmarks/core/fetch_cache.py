@@ -0,0 +1,324 @@
+"""
+Persistent on-disk cache of fetched pages and their extracted metadata.
+
+Re-imports, a second user quick-adding the same article and
+re-enrichment all used to download and parse a page from scratch. Pages
+served with an ``ETag`` or ``Last-Modified`` validator are now kept in
+a SQLite file under ``FETCH_CACHE_DIR``, keyed by normalised URL,
+together with the metadata extracted from them. The next fetch of the
+URL sends ``If-None-Match`` / ``If-Modified-Since``; a ``304 Not
+Modified`` skips both the download and the extraction.
+
+Pages stored or revalidated within ``FETCH_CACHE_FRESH_SECONDS`` are
+reused without any request, so callers that waited on a concurrent fetch
+of the same URL (see ``single_flight``) share its result. Results that
+cannot be revalidated (YouTube, binary files, pages without validators)
+are kept as metadata only and served just within that window. The store is
+bounded to ``FETCH_CACHE_MAX_MB``; the least recently used pages are
+evicted first. SQLite's locking makes it safe to share between
+worker processes.
+"""
+from __future__ import annotations
+
+import copy
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from flaskmarks.core.url_normalize import normalize_url
+
+if TYPE_CHECKING:
+    from flask import Flask
+
+    from flaskmarks.core.fetch_engine import FetchResult
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_MB = 256
+DEFAULT_FRESH_SECONDS = 30
+# Eviction frees this share of the budget at once, so it does not run on
+# every store of a full cache
+EVICT_TO = 0.9
+
+# Stored in PRAGMA user_version; files from before versioning are 1
+SCHEMA_VERSION = 2
+
+_SCHEMA = (
+    '''CREATE TABLE pages (
+        key TEXT PRIMARY KEY,
+        etag TEXT,
+        last_modified TEXT,
+        content_type TEXT NOT NULL,
+        body BLOB NOT NULL,
+        metadata TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        checked_at REAL NOT NULL,
+        last_used REAL NOT NULL
+    )''',
+    'CREATE INDEX ix_pages_last_used ON pages (last_used)',
+)
+
+# Statements that bring a file from the previous version to the key's
+_MIGRATIONS = {
+    2: ('ALTER TABLE pages ADD COLUMN checked_at REAL NOT NULL DEFAULT 0',),
+}
+
+
+@dataclass
+class CachedPage:
+    """A cached response with its validators and extracted metadata."""
+    etag: str | None
+    last_modified: str | None
+    content_type: str
+    body: str
+    metadata: dict[str, Any]
+    fresh: bool = False
+
+    def conditional_headers(self) -> dict[str, str]:
+        """Request headers that revalidate this page."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def metadata_for(self, url: str) -> dict[str, Any]:
+        """A copy of the metadata, for ``url`` as the caller wrote it."""
+        metadata = copy.deepcopy(self.metadata)
+        metadata['url'] = url
+        return metadata
+
+
+class FetchCache:
+    """
+    Size-bounded LRU store of fetched pages, one SQLite file per cache dir.
+
+    Disabled until ``init_app`` turns it on; while disabled ``lookup``
+    finds nothing and ``store`` keeps nothing.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.path: str | None = None
+        self.max_bytes = DEFAULT_MAX_MB * 1024 * 1024
+        self.fresh_seconds = float(DEFAULT_FRESH_SECONDS)
+        self._local = threading.local()
+        self._evict_lock = threading.Lock()
+
+    def init_app(self, app: Flask) -> None:
+        """
+        Read the cache settings of an application.
+
+        Args:
+            app: The Flask application instance
+        """
+        app.config.setdefault('FETCH_CACHE_ENABLED', not app.testing)
+        app.config.setdefault('FETCH_CACHE_DIR', os.path.join(app.instance_path, 'fetch_cache'))
+        app.config.setdefault('FETCH_CACHE_MAX_MB', DEFAULT_MAX_MB)
+        app.config.setdefault('FETCH_CACHE_FRESH_SECONDS', DEFAULT_FRESH_SECONDS)
+
+        self.enabled = bool(app.config['FETCH_CACHE_ENABLED'])
+        self.path = os.path.join(app.config['FETCH_CACHE_DIR'], 'pages.sqlite')
+        self.max_bytes = max(int(app.config['FETCH_CACHE_MAX_MB']), 1) * 1024 * 1024
+        self.fresh_seconds = max(float(app.config['FETCH_CACHE_FRESH_SECONDS']), 0.0)
+        # Connections of the previous path are not reused
+        self._local = threading.local()
+
+    def lookup(self, url: str) -> CachedPage | None:
+        """
+        Find the cached page of a URL and mark it as recently used.
+
+        Returns:
+            The cached page, ``fresh`` if checked within
+            ``fresh_seconds``; None if disabled, not cached, or kept as
+            metadata only and no longer fresh
+        """
+        key = self._key(url)
+        if key is None:
+            return None
+        try:
+            conn = self._connection()
+            row = conn.execute(
+                'SELECT etag, last_modified, content_type, body, metadata, checked_at '
+                'FROM pages WHERE key = ?',
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            conn.execute('UPDATE pages SET last_used = ? WHERE key = ?', (now, key))
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f'Fetch cache lookup of {url} failed: {e}')
+            return None
+
+        etag, last_modified, content_type, body, metadata, checked_at = row
+        fresh = now - checked_at < self.fresh_seconds
+        if not (fresh or etag or last_modified):
+            return None
+        return CachedPage(
+            etag,
+            last_modified,
+            content_type,
+            zlib.decompress(body).decode('utf-8'),
+            json.loads(metadata),
+            fresh=fresh,
+        )
+
+    def store(self, url: str, result: FetchResult, metadata: dict[str, Any]) -> None:
+        """
+        Keep a fetched page and the metadata extracted from it.
+
+        200 text responses with ``ETag`` or ``Last-Modified`` are kept for
+        revalidation; for any other response only the metadata is kept,
+        as with ``share``.
+        """
+        if result.status == 200 and result.is_text and (result.etag or result.last_modified):
+            self._put(url, result, result.body, metadata)
+        else:
+            self.share(url, metadata)
+
+    def share(self, url: str, metadata: dict[str, Any]) -> None:
+        """
+        Keep metadata that cannot be revalidated while it is fresh.
+
+        Lets callers waiting on the fetch of the same URL in another
+        worker reuse it; nothing is kept when ``fresh_seconds`` is 0.
+        """
+        if self.fresh_seconds > 0:
+            self._put(url, None, '', metadata)
+
+    def _put(
+        self,
+        url: str,
+        result: FetchResult | None,
+        page: str,
+        metadata: dict[str, Any],
+    ) -> None:
+        key = self._key(url)
+        if key is None:
+            return
+
+        body = zlib.compress(page.encode('utf-8'))
+        metadata_json = json.dumps(metadata)
+        size = len(body) + len(metadata_json)
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        try:
+            conn = self._connection()
+            conn.execute(
+                'INSERT OR REPLACE INTO pages '
+                '(key, etag, last_modified, content_type, body, metadata, size, '
+                'checked_at, last_used) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (
+                    key,
+                    result.etag if result else None,
+                    result.last_modified if result else None,
+                    result.content_type if result else '',
+                    body, metadata_json, size, now, now,
+                ),
+            )
+            conn.commit()
+            self._evict(conn)
+        except sqlite3.Error as e:
+            logger.warning(f'Fetch cache store of {url} failed: {e}')
+
+    def revalidated(self, url: str, result: FetchResult) -> None:
+        """Record a 304 for a cached page, keeping any new validators."""
+        key = self._key(url)
+        if key is None:
+            return
+        now = time.time()
+        try:
+            conn = self._connection()
+            conn.execute(
+                'UPDATE pages SET etag = COALESCE(?, etag), '
+                'last_modified = COALESCE(?, last_modified), checked_at = ?, '
+                'last_used = ? WHERE key = ?',
+                (result.etag, result.last_modified, now, now, key),
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f'Fetch cache update of {url} failed: {e}')
+
+    def clear(self) -> None:
+        """Drop every cached page."""
+        if not self.enabled:
+            return
+        conn = self._connection()
+        conn.execute('DELETE FROM pages')
+        conn.commit()
+
+    def _key(self, url: str) -> str | None:
+        if not self.enabled or self.path is None:
+            return None
+        return normalize_url(url)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._migrate(conn)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection) -> None:
+        """Create the schema, or bring an older cache file up to date."""
+        if conn.execute('PRAGMA user_version').fetchone()[0] >= SCHEMA_VERSION:
+            return
+
+        # BEGIN IMMEDIATE makes workers opening the file at once take turns
+        conn.isolation_level = None
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                version = conn.execute('PRAGMA user_version').fetchone()[0]
+                exists = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'pages'"
+                ).fetchone()
+                if exists is None:
+                    for statement in _SCHEMA:
+                        conn.execute(statement)
+                else:
+                    for step in range(max(version, 1) + 1, SCHEMA_VERSION + 1):
+                        for statement in _MIGRATIONS.get(step, ()):
+                            conn.execute(statement)
+                conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        finally:
+            conn.isolation_level = ''
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Drop least recently used pages once the store is over budget."""
+        (total,) = conn.execute('SELECT TOTAL(size) FROM pages').fetchone()
+        if total <= self.max_bytes:
+            return
+        with self._evict_lock:
+            excess = total - self.max_bytes * EVICT_TO
+            freed = 0
+            keys = []
+            for key, size in conn.execute('SELECT key, size FROM pages ORDER BY last_used'):
+                if freed >= excess:
+                    break
+                keys.append((key,))
+                freed += size
+            conn.executemany('DELETE FROM pages WHERE key = ?', keys)
+            conn.commit()
+        logger.info(f'Fetch cache evicted {len(keys)} pages ({freed} bytes)')
+
+
+fetch_cache = FetchCache()
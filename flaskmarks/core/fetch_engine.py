@@ -0,0 +1,318 @@
+"""
+Page fetching for imports and metadata extraction.
+
+``AsyncFetchEngine`` keeps hundreds of downloads in flight on one event
+loop for bulk imports; ``fetch_page`` is the blocking single-URL
+equivalent used by quick-add and the new mark form. Both issue one
+streaming GET per URL: the response headers decide text vs binary before
+the body is read, and binary bodies are never downloaded. Responses with
+a 4xx/5xx status are errors (``error='HTTP 404'``), never page content.
+
+Every request, including each redirect hop, goes through
+``ensure_public_http_url`` before a connection is opened, and the
+connection is made to the address that was validated: both clients come
+from ``outbound_http``, which looks the host up in the shared DNS cache
+instead of resolving it again and keeps connections alive between URLs.
+
+Callers holding a cached copy pass its validators as ``headers``; a
+``304 Not Modified`` comes back as a bodiless result with status 304.
+"""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urljoin
+
+import httpx
+
+from flaskmarks.core.http_client import outbound_http
+from flaskmarks.core.url_fetch_validation import (
+    URLTargetValidationError,
+    ensure_public_http_url,
+)
+
+DEFAULT_FETCH_CONCURRENCY = 200
+DEFAULT_FETCH_TIMEOUT = 10.0
+DEFAULT_MAX_BODY_BYTES = 5 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+MAX_REDIRECTS = 5
+RATE_LIMIT_STATUSES = (429, 503)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Parse a ``Retry-After`` header into seconds from now.
+
+    Args:
+        value: Header value, either delay-seconds or an HTTP-date
+
+    Returns:
+        Non-negative number of seconds, or None if absent or malformed
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+@dataclass
+class FetchResult:
+    """Outcome of fetching one URL."""
+    url: str
+    status: int | None = None
+    content_type: str = ''
+    body: str | None = None
+    error: str | None = None
+    retry_after: float | None = None
+    etag: str | None = None
+    last_modified: str | None = None
+
+    @property
+    def is_text(self) -> bool:
+        """True when a text body was downloaded."""
+        return self.body is not None
+
+    @property
+    def not_modified(self) -> bool:
+        """True when a conditional request found the cached copy current."""
+        return self.status == 304
+
+    @property
+    def rate_limited(self) -> bool:
+        """True when the host asked us to slow down (429/503)."""
+        return self.status in RATE_LIMIT_STATUSES
+
+
+class AsyncFetchEngine:
+    """
+    Concurrent HTTP fetcher used as an async context manager.
+
+    Redirects are followed by hand so every hop is validated. Bodies that
+    are not ``text/*`` are never read, and text bodies are truncated at
+    ``max_body_bytes``.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = DEFAULT_FETCH_CONCURRENCY,
+        timeout: float = DEFAULT_FETCH_TIMEOUT,
+        max_body_bytes: int = DEFAULT_MAX_BODY_BYTES,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        """
+        Initialize the engine.
+
+        Args:
+            concurrency: Maximum number of simultaneous requests
+            timeout: Per-request timeout in seconds
+            max_body_bytes: Text bodies are cut off after this many bytes
+            transport: Optional httpx transport (tests use MockTransport)
+        """
+        self.concurrency = max(int(concurrency), 1)
+        self.timeout = timeout
+        self.max_body_bytes = max_body_bytes
+        self._transport = transport
+        self._client: httpx.AsyncClient | None = None
+        self._slots = asyncio.Semaphore(self.concurrency)
+
+    async def __aenter__(self) -> AsyncFetchEngine:
+        self._client = outbound_http.async_client(
+            max_connections=self.concurrency,
+            max_keepalive=self.concurrency,
+            timeout=self.timeout,
+            transport=self._transport,
+        )
+        return self
+
+    async def __aexit__(self, *_exc_info) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def fetch(self, url: str, headers: dict[str, str] | None = None) -> FetchResult:
+        """
+        Download one URL.
+
+        Args:
+            url: URL to fetch
+            headers: Extra request headers, e.g. cache validators
+
+        Returns:
+            FetchResult; ``body`` is None for non-text responses and
+            ``error`` is set when the fetch failed
+
+        Raises:
+            URLTargetValidationError: If the URL or a redirect target is
+                not allowed for outbound fetches
+        """
+        async with self._slots:
+            try:
+                return await self._fetch(url, headers)
+            except URLTargetValidationError:
+                raise
+            except (httpx.HTTPError, LookupError) as e:
+                return FetchResult(url, error=f'{type(e).__name__}: {e}')
+
+    async def _fetch(self, url: str, headers: dict[str, str] | None) -> FetchResult:
+        assert self._client is not None, 'AsyncFetchEngine used outside "async with"'
+
+        for _hop in range(MAX_REDIRECTS + 1):
+            # A DNS cache miss blocks, so validation runs off the event loop
+            await asyncio.to_thread(ensure_public_http_url, url)
+
+            async with self._client.stream('GET', url, headers=headers) as response:
+                outcome = _classify(response, url, headers)
+                if isinstance(outcome, str):
+                    url = outcome
+                    continue
+                if outcome is not None:
+                    return outcome
+
+                body = bytearray()
+                async for chunk in response.aiter_bytes():
+                    body += chunk
+                    if len(body) >= self.max_body_bytes:
+                        break
+
+                return _text_result(response, url, body, self.max_body_bytes)
+
+        return FetchResult(url, error='Too many redirects')
+
+
+def fetch_page(
+    url: str,
+    timeout: float = DEFAULT_FETCH_TIMEOUT,
+    max_body_bytes: int = DEFAULT_MAX_BODY_BYTES,
+    headers: dict[str, str] | None = None,
+) -> FetchResult:
+    """
+    Download one URL with a single streaming GET.
+
+    Args:
+        url: URL to fetch
+        timeout: Connect/read timeout in seconds
+        max_body_bytes: Text bodies are cut off after this many bytes
+        headers: Extra request headers, e.g. cache validators
+
+    Returns:
+        FetchResult; ``body`` is None for non-text responses and ``error``
+        is set when the fetch failed
+
+    Raises:
+        URLTargetValidationError: If the URL or a redirect target is not
+            allowed for outbound fetches
+    """
+    try:
+        return _fetch_page(outbound_http.client, url, timeout, max_body_bytes, headers)
+    except (httpx.HTTPError, LookupError) as e:
+        return FetchResult(url, error=f'{type(e).__name__}: {e}')
+
+
+def _fetch_page(
+    client: httpx.Client,
+    url: str,
+    timeout: float,
+    max_body_bytes: int,
+    headers: dict[str, str] | None,
+) -> FetchResult:
+    for _hop in range(MAX_REDIRECTS + 1):
+        ensure_public_http_url(url)
+
+        with client.stream('GET', url, headers=headers, timeout=timeout) as response:
+            outcome = _classify(response, url, headers)
+            if isinstance(outcome, str):
+                url = outcome
+                continue
+            if outcome is not None:
+                return outcome
+
+            body = bytearray()
+            for chunk in response.iter_bytes(CHUNK_SIZE):
+                body += chunk
+                if len(body) >= max_body_bytes:
+                    break
+
+            return _text_result(response, url, body, max_body_bytes)
+
+    return FetchResult(url, error='Too many redirects')
+
+
+def _classify(
+    response: httpx.Response,
+    url: str,
+    headers: dict[str, str] | None,
+) -> FetchResult | str | None:
+    """
+    Decide what a response is from its status and headers alone.
+
+    Args:
+        response: Streaming response whose body has not been read
+        url: URL the response answers
+        headers: Extra request headers that were sent, e.g. cache validators
+
+    Returns:
+        The redirect target, a bodiless FetchResult when the body must
+        not be read, or None when it is a text page to download
+    """
+    if response.status_code == 304:
+        # Checked before redirects: httpx counts 304 as one
+        return FetchResult(
+            url,
+            304,
+            response.headers.get('content-type', 'none'),
+            etag=response.headers.get('etag'),
+            last_modified=response.headers.get('last-modified'),
+            # Only meaningful as the answer to our validators
+            error=None if headers else 'HTTP 304',
+        )
+    if response.has_redirect_location:
+        return urljoin(url, response.headers['location'])
+
+    content_type = response.headers.get('content-type', 'none')
+    if response.status_code in RATE_LIMIT_STATUSES:
+        return FetchResult(
+            url,
+            response.status_code,
+            content_type,
+            error=f'HTTP {response.status_code}',
+            retry_after=parse_retry_after(response.headers.get('retry-after')),
+        )
+    if response.status_code >= 400:
+        # Error pages are not the page that was bookmarked
+        return FetchResult(
+            url,
+            response.status_code,
+            content_type,
+            error=f'HTTP {response.status_code}',
+        )
+    if 'text' not in content_type:
+        return FetchResult(url, response.status_code, content_type)
+    return None
+
+
+def _text_result(
+    response: httpx.Response,
+    url: str,
+    body: bytearray,
+    max_body_bytes: int,
+) -> FetchResult:
+    """Build the result of a downloaded text page, cut at ``max_body_bytes``."""
+    # httpx uses the declared charset, else UTF-8
+    return FetchResult(
+        url,
+        response.status_code,
+        response.headers.get('content-type', 'none'),
+        body[:max_body_bytes].decode(response.encoding or 'utf-8', errors='replace'),
+        etag=response.headers.get('etag'),
+        last_modified=response.headers.get('last-modified'),
+    )
@@ -6,6 +6,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import TYPE_CHECKING, Any
 
+from markupsafe import Markup, escape
 from webhelpers2.date import time_ago_in_words
 
 if TYPE_CHECKING:
@@ -78,3 +79,13 @@ def register_filters(app: Flask) -> None:
     def filter_enumerate(items: list) -> enumerate:
         """Enumerate a list."""
         return enumerate(items)
+
+    @app.template_filter('search_headline')
+    def filter_search_headline(headline: str) -> Markup:
+        """Escape a ts_headline snippet and highlight its matches."""
+        from flaskmarks.models.mark import Mark
+        return (
+            escape(headline)
+            .replace(Mark.headline_start_sel, Markup('<mark>'))
+            .replace(Mark.headline_stop_sel, Markup('</mark>'))
+        )
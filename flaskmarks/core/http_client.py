@@ -0,0 +1,291 @@
+"""
+Shared keep-alive HTTP clients for outbound fetching.
+
+Every page, subtitle file and redirect hop fetched by ``flaskmarks.core``
+goes through ``outbound_http``: one thread-safe ``httpx.Client`` per
+process whose per-host connection pools keep connections alive between
+URLs, speaking HTTP/2 when the ``h2`` package is installed. Bulk imports
+run on their own event loop and get an ``httpx.AsyncClient`` built with
+the same settings from ``outbound_http.async_client()``.
+
+Connections are made to the address ``resolve_public_address`` validated
+(see ``dns_cache``), and the clients count requests against new
+connections so connection reuse can be monitored with
+``outbound_http.stats()``.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+from typing import TYPE_CHECKING, Any
+
+import httpcore
+import httpx
+
+from flaskmarks.core.url_fetch_validation import resolve_public_address
+
+if TYPE_CHECKING:
+    from flask import Flask
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE = 20
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
+DEFAULT_TIMEOUT = 10.0
+USER_AGENT = 'Mozilla/5.0 (compatible; Flaskmarks bookmark importer)'
+
+
+class ConnectionStats:
+    """Thread-safe counters of requests sent and connections opened."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+
+    def request_sent(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def connection_opened(self) -> None:
+        with self._lock:
+            self.connections += 1
+
+    def snapshot(self) -> dict[str, int | float]:
+        """Counters plus the share of requests sent on a reused connection."""
+        with self._lock:
+            reused = max(self.requests - self.connections, 0)
+            return {
+                'requests': self.requests,
+                'connections': self.connections,
+                'reused': reused,
+                'reuse_ratio': round(reused / self.requests, 3) if self.requests else 0.0,
+            }
+
+
+class PinnedBackend(httpcore.NetworkBackend):
+    """
+    httpcore network backend that dials validated addresses.
+
+    TLS still uses the host name for SNI and certificate checks; only the
+    TCP connect goes to the address from ``resolve_public_address``.
+    """
+
+    def __init__(self, backend: httpcore.NetworkBackend, stats: ConnectionStats) -> None:
+        self._backend = backend
+        self._stats = stats
+
+    def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: float | None = None,
+        local_address: str | None = None,
+        socket_options: Any = None,
+    ) -> httpcore.NetworkStream:
+        stream = self._backend.connect_tcp(
+            resolve_public_address(host),
+            port,
+            timeout=timeout,
+            local_address=local_address,
+            socket_options=socket_options,
+        )
+        self._stats.connection_opened()
+        return stream
+
+    def connect_unix_socket(self, *args: Any, **kwargs: Any) -> httpcore.NetworkStream:
+        return self._backend.connect_unix_socket(*args, **kwargs)
+
+    def sleep(self, seconds: float) -> None:
+        self._backend.sleep(seconds)
+
+
+class PinnedAsyncBackend(httpcore.AsyncNetworkBackend):
+    """Async counterpart of ``PinnedBackend``."""
+
+    def __init__(self, backend: httpcore.AsyncNetworkBackend, stats: ConnectionStats) -> None:
+        self._backend = backend
+        self._stats = stats
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: float | None = None,
+        local_address: str | None = None,
+        socket_options: Any = None,
+    ) -> httpcore.AsyncNetworkStream:
+        # A DNS cache miss blocks, so resolution runs off the event loop
+        address = await asyncio.to_thread(resolve_public_address, host)
+        stream = await self._backend.connect_tcp(
+            address,
+            port,
+            timeout=timeout,
+            local_address=local_address,
+            socket_options=socket_options,
+        )
+        self._stats.connection_opened()
+        return stream
+
+    async def connect_unix_socket(self, *args: Any, **kwargs: Any) -> httpcore.AsyncNetworkStream:
+        return await self._backend.connect_unix_socket(*args, **kwargs)
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+def _pin(transport: Any, backend_cls: type, stats: ConnectionStats) -> Any:
+    # httpx has no resolver hook, so wrap the backend of its connection pool
+    pool = getattr(transport, '_pool', None)
+    if not hasattr(pool, '_network_backend'):
+        # Never fall back to unpinned connections, which would resolve again
+        raise RuntimeError(
+            f'Cannot pin connections of {type(transport).__name__}: this '
+            'httpx/httpcore version has no pool network backend; install '
+            'the versions in requirements.txt'
+        )
+    pool._network_backend = backend_cls(pool._network_backend, stats)
+    return transport
+
+
+class OutboundHTTP:
+    """
+    Process-wide outbound HTTP client and async client factory.
+
+    The sync client is created on first use and again after a fork, so
+    worker processes never share pooled sockets. ``transport`` replaces
+    the network for every client built afterwards (tests use
+    ``httpx.MockTransport``).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._client: httpx.Client | None = None
+        self._pid: int | None = None
+        self._stats = ConnectionStats()
+        self.transport: httpx.BaseTransport | None = None
+        self.max_connections = DEFAULT_MAX_CONNECTIONS
+        self.max_keepalive = DEFAULT_MAX_KEEPALIVE
+        self.keepalive_expiry = DEFAULT_KEEPALIVE_EXPIRY
+        self.http2 = HTTP2_AVAILABLE
+
+    def init_app(self, app: Flask) -> None:
+        """
+        Read the pool settings of an application.
+
+        Args:
+            app: The Flask application instance
+        """
+        app.config.setdefault('HTTP_POOL_MAX_CONNECTIONS', DEFAULT_MAX_CONNECTIONS)
+        app.config.setdefault('HTTP_POOL_MAX_KEEPALIVE', DEFAULT_MAX_KEEPALIVE)
+        app.config.setdefault('HTTP_KEEPALIVE_EXPIRY', DEFAULT_KEEPALIVE_EXPIRY)
+        app.config.setdefault('HTTP2_ENABLED', True)
+
+        self.max_connections = max(int(app.config['HTTP_POOL_MAX_CONNECTIONS']), 1)
+        self.max_keepalive = max(int(app.config['HTTP_POOL_MAX_KEEPALIVE']), 0)
+        self.keepalive_expiry = float(app.config['HTTP_KEEPALIVE_EXPIRY'])
+        self.http2 = bool(app.config['HTTP2_ENABLED']) and HTTP2_AVAILABLE
+        if app.config['HTTP2_ENABLED'] and not HTTP2_AVAILABLE:
+            logger.info('h2 is not installed, outbound fetches use HTTP/1.1')
+        # Settings apply to the next client
+        self.close()
+
+    @property
+    def client(self) -> httpx.Client:
+        """The shared client of this process."""
+        client = self._client
+        if client is not None and self._pid == os.getpid():
+            return client
+        with self._lock:
+            if self._client is None or self._pid != os.getpid():
+                self._client = self._build()
+                self._pid = os.getpid()
+            return self._client
+
+    def async_client(
+        self,
+        max_connections: int | None = None,
+        max_keepalive: int | None = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> httpx.AsyncClient:
+        """
+        A new async client with the shared settings, for one event loop.
+
+        Args:
+            max_connections: Pool size, defaults to ``HTTP_POOL_MAX_CONNECTIONS``
+            max_keepalive: Idle connections kept, defaults to
+                ``HTTP_POOL_MAX_KEEPALIVE``
+            timeout: Per-request timeout in seconds
+            transport: Replaces the network (tests use MockTransport)
+        """
+        if transport is None:
+            transport = _pin(
+                httpx.AsyncHTTPTransport(
+                    http2=self.http2,
+                    limits=self._limits(max_connections, max_keepalive),
+                ),
+                PinnedAsyncBackend,
+                self._stats,
+            )
+
+        async def count(_request: httpx.Request) -> None:
+            self._stats.request_sent()
+
+        return httpx.AsyncClient(
+            transport=transport,
+            timeout=timeout,
+            follow_redirects=False,
+            headers={'User-Agent': USER_AGENT},
+            event_hooks={'request': [count]},
+        )
+
+    def stats(self) -> dict[str, int | float]:
+        """Requests, new connections and connection reuse since start."""
+        return self._stats.snapshot()
+
+    def close(self) -> None:
+        """Close the shared client; the next use builds a new one."""
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None and self._pid == os.getpid():
+            client.close()
+
+    def _limits(
+        self,
+        max_connections: int | None = None,
+        max_keepalive: int | None = None,
+    ) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=max_connections or self.max_connections,
+            max_keepalive_connections=(
+                self.max_keepalive if max_keepalive is None else max_keepalive
+            ),
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def _build(self) -> httpx.Client:
+        transport = self.transport or _pin(
+            httpx.HTTPTransport(http2=self.http2, limits=self._limits()),
+            PinnedBackend,
+            self._stats,
+        )
+        return httpx.Client(
+            transport=transport,
+            timeout=DEFAULT_TIMEOUT,
+            follow_redirects=False,
+            headers={'User-Agent': USER_AGENT},
+            event_hooks={'request': [lambda _request: self._stats.request_sent()]},
+        )
+
+
+outbound_http = OutboundHTTP()
@@ -3,15 +3,25 @@ Service helpers for user/job-scoped import status persistence.
 """
 from __future__ import annotations
 
-from datetime import datetime as dt
+import os
+import socket
+from datetime import datetime as dt, timedelta
+
+from sqlalchemy import delete, exists, or_, select, update
 
 from flaskmarks.core.extensions import db
+from flaskmarks.models.import_job_item import ImportJobItem
 from flaskmarks.models.import_job_status import ImportJobStatus
 
 
 DEFAULT_IMPORT_JOB_ID = "default"
 
 
+def current_runner_id() -> str:
+    """Identify this process as the runner of an import job."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
 def create_or_reset_import_job(
     user_id: int,
     job_id: str | None,
@@ -26,11 +36,18 @@ def create_or_reset_import_job(
     if job is None:
         job = ImportJobStatus(user_id=user_id, job_id=scope_job_id)
         db.session.add(job)
+    else:
+        db.session.execute(
+            delete(ImportJobItem).where(ImportJobItem.import_job_id == job.id)
+        )
 
     job.status = 0
+    job.failed = 0
     job.total_lines = max(0, total_lines)
     job.complete = False
     job.completed = None
+    job.runner_id = None
+    job.heartbeat = None
     db.session.commit()
     return job
 
@@ -39,8 +56,9 @@ def increment_import_job_status(
     user_id: int,
     job_id: str | None,
     increment: int = 1,
+    failed: int = 0,
 ) -> ImportJobStatus | None:
-    """Increment progress for a scoped import job."""
+    """Increment progress, and the failures among it, for a scoped import job."""
     scope_job_id = job_id or DEFAULT_IMPORT_JOB_ID
     job = ImportJobStatus.query.filter_by(
         user_id=user_id,
@@ -49,11 +67,12 @@ def increment_import_job_status(
     if job is None:
         return None
 
-    if increment > 0:
-        next_value = job.status + increment
+    if increment > 0 or failed > 0:
+        next_value = job.status + max(increment, 0)
         if job.total_lines > 0:
             next_value = min(next_value, job.total_lines)
         job.status = next_value
+        job.failed += max(failed, 0)
         db.session.commit()
     return job
 
@@ -86,3 +105,115 @@ def get_import_job_status(
         return query.filter_by(job_id=job_id).first()
 
     return query.order_by(ImportJobStatus.updated.desc()).first()
+
+
+def claim_import_job(
+    user_id: int,
+    job_id: str | None,
+    runner_id: str,
+    stale_after: float,
+) -> bool:
+    """
+    Atomically make ``runner_id`` the runner of a job.
+
+    A job can be claimed when nobody runs it, when the runner's heartbeat
+    is older than ``stale_after`` seconds, or by its own runner again.
+    """
+    scope_job_id = job_id or DEFAULT_IMPORT_JOB_ID
+    now = dt.utcnow()
+    result = db.session.execute(
+        update(ImportJobStatus)
+        .where(
+            ImportJobStatus.user_id == user_id,
+            ImportJobStatus.job_id == scope_job_id,
+            or_(
+                ImportJobStatus.heartbeat.is_(None),
+                ImportJobStatus.heartbeat < now - timedelta(seconds=stale_after),
+                ImportJobStatus.runner_id == runner_id,
+            ),
+        )
+        .values(runner_id=runner_id, heartbeat=now)
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def touch_import_job(user_id: int, job_id: str | None, runner_id: str) -> None:
+    """Refresh the heartbeat of a job this runner holds."""
+    db.session.execute(
+        update(ImportJobStatus)
+        .where(
+            ImportJobStatus.user_id == user_id,
+            ImportJobStatus.job_id == (job_id or DEFAULT_IMPORT_JOB_ID),
+            ImportJobStatus.runner_id == runner_id,
+        )
+        .values(heartbeat=dt.utcnow())
+    )
+    db.session.commit()
+
+
+def release_import_job(user_id: int, job_id: str | None, runner_id: str) -> None:
+    """Give up a job this runner holds."""
+    db.session.execute(
+        update(ImportJobStatus)
+        .where(
+            ImportJobStatus.user_id == user_id,
+            ImportJobStatus.job_id == (job_id or DEFAULT_IMPORT_JOB_ID),
+            ImportJobStatus.runner_id == runner_id,
+        )
+        .values(runner_id=None, heartbeat=None)
+    )
+    db.session.commit()
+
+
+def find_resumable_import_jobs(stale_after: float) -> list[tuple[int, str]]:
+    """
+    Unfinished jobs with queued items whose runner is gone.
+
+    Returns:
+        (user id, job id) pairs
+    """
+    stale = dt.utcnow() - timedelta(seconds=stale_after)
+    has_work = exists().where(
+        ImportJobItem.import_job_id == ImportJobStatus.id,
+        ImportJobItem.state.in_([ImportJobItem.PENDING, ImportJobItem.FETCHING]),
+    )
+    rows = db.session.execute(
+        select(ImportJobStatus.user_id, ImportJobStatus.job_id).where(
+            ImportJobStatus.complete.is_(False),
+            or_(ImportJobStatus.heartbeat.is_(None), ImportJobStatus.heartbeat < stale),
+            has_work,
+        )
+    ).all()
+    return [tuple(row) for row in rows]
+
+
+def retry_failed_import_items(
+    user_id: int,
+    job_id: str | None,
+    error_class: str | None = None,
+) -> int:
+    """
+    Queue the failed items of a job again and reopen the job.
+
+    Progress is rolled back by the number of requeued items, so the bar
+    finishes at 100% once they are processed.
+
+    Returns:
+        Number of items requeued, 0 if the job does not exist
+    """
+    job = ImportJobStatus.query.filter_by(
+        user_id=user_id,
+        job_id=job_id or DEFAULT_IMPORT_JOB_ID,
+    ).first()
+    if job is None:
+        return 0
+
+    requeued = ImportJobItem.retry_failed(job.id, error_class)
+    if requeued:
+        job.status = max(job.status - requeued, 0)
+        job.failed = max(job.failed - requeued, 0)
+        job.complete = False
+        job.completed = None
+    db.session.commit()
+    return requeued
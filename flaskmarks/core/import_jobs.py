@@ -0,0 +1,167 @@
+"""
+Running, resuming and retrying checkpointed import jobs.
+
+An import job owns its rows in ``import_job_items``. Whoever runs it
+first claims the job with a heartbeat; if the process dies (deploy,
+OOM, crash) the heartbeat goes stale and the ``ImportJobResumer`` of any
+worker picks the job up from its remaining items. Failed items keep the
+class of their error and can be queued again with ``import-retry``.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from typing import TYPE_CHECKING, Iterable
+
+from flaskmarks.core.bookmark_import import BookmarkRecord
+from flaskmarks.core.dns_cache import dns_cache
+from flaskmarks.core.extensions import db
+from flaskmarks.core.http_client import outbound_http
+from flaskmarks.core.import_job_status_service import (
+    claim_import_job,
+    complete_import_job,
+    current_runner_id,
+    find_resumable_import_jobs,
+    release_import_job,
+)
+from flaskmarks.core.import_pipeline import ImportPipeline, ImportSummary
+
+if TYPE_CHECKING:
+    from flask import Flask
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STALE_SECONDS = 120
+DEFAULT_RESUME_INTERVAL = 60
+
+
+def run_import_job(
+    app: Flask,
+    user_id: int,
+    job_id: str,
+    items: Iterable[str | BookmarkRecord] | None = None,
+) -> ImportSummary | None:
+    """
+    Run an import job to completion as this process.
+
+    Args:
+        app: The Flask application instance
+        user_id: ID of the user the job belongs to
+        job_id: Scoped job id, created with ``create_or_reset_import_job``
+        items: URLs or records to stage first; None resumes the job
+
+    Returns:
+        ImportSummary, or None if another live runner holds the job
+    """
+    runner_id = current_runner_id()
+    stale_after = app.config.get('IMPORT_JOB_STALE_SECONDS', DEFAULT_STALE_SECONDS)
+
+    with app.app_context():
+        claimed = claim_import_job(user_id, job_id, runner_id, stale_after)
+        db.session.remove()
+    if not claimed:
+        logger.info(f'Import {job_id} is being run by another worker')
+        return None
+
+    try:
+        pipeline = ImportPipeline(app, user_id, job_id)
+        summary = pipeline.run(items) if items is not None else pipeline.resume()
+        with app.app_context():
+            complete_import_job(user_id, job_id)
+        logger.info(
+            f'Import {job_id} finished: {summary}, '
+            f'HTTP {outbound_http.stats()}, DNS {dns_cache.stats()}'
+        )
+        return summary
+    finally:
+        with app.app_context():
+            release_import_job(user_id, job_id, runner_id)
+            db.session.remove()
+
+
+def resume_import_jobs(app: Flask) -> dict[str, ImportSummary]:
+    """
+    Resume every unfinished job whose runner has gone away.
+
+    Returns:
+        Summary per job id that was resumed by this call
+    """
+    stale_after = app.config.get('IMPORT_JOB_STALE_SECONDS', DEFAULT_STALE_SECONDS)
+    with app.app_context():
+        jobs = find_resumable_import_jobs(stale_after)
+        db.session.remove()
+
+    summaries = {}
+    for user_id, job_id in jobs:
+        logger.info(f'Resuming import {job_id} of user {user_id}')
+        summary = run_import_job(app, user_id, job_id)
+        if summary is not None:
+            summaries[job_id] = summary
+    return summaries
+
+
+class ImportJobResumer:
+    """
+    Background thread that resumes interrupted import jobs.
+
+    The thread starts with the first request a worker serves and looks
+    for stale jobs right away, then every ``IMPORT_JOB_RESUME_INTERVAL``
+    seconds. Runners claim jobs atomically, so several workers polling
+    the same database never run a job twice.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._app: Flask | None = None
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.enabled = True
+        self.interval = DEFAULT_RESUME_INTERVAL
+
+    def init_app(self, app: Flask) -> None:
+        """
+        Bind the resumer to an application and read its settings.
+
+        Args:
+            app: The Flask application instance
+        """
+        app.config.setdefault('IMPORT_JOB_RESUME', not app.testing)
+        app.config.setdefault('IMPORT_JOB_RESUME_INTERVAL', DEFAULT_RESUME_INTERVAL)
+        app.config.setdefault('IMPORT_JOB_STALE_SECONDS', DEFAULT_STALE_SECONDS)
+
+        self._app = app
+        self.enabled = bool(app.config['IMPORT_JOB_RESUME'])
+        self.interval = max(float(app.config['IMPORT_JOB_RESUME_INTERVAL']), 1.0)
+
+        if self.enabled:
+            app.before_request(self._ensure_worker)
+
+    def shutdown(self) -> None:
+        """Stop polling; a job being resumed finishes on its own thread."""
+        self._stopped.set()
+
+    def _ensure_worker(self) -> None:
+        """Start the polling thread on first use in this process."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                name='import-job-resumer',
+                daemon=True,
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                resume_import_jobs(self._app)
+            except Exception as e:
+                logger.error(f'Resuming import jobs failed: {e}')
+            self._stopped.wait(self.interval)
+
+
+import_job_resumer = ImportJobResumer()
@@ -0,0 +1,637 @@
+"""
+Bulk URL import pipeline.
+
+Stages:
+
+1. **Pre-filter** - URLs are normalised and de-duplicated, then checked
+   against the user's marks with a few bulk queries per
+   ``PREFILTER_CHUNK_SIZE`` URLs. Only new URLs reach the network. Input
+   is plain URLs or ``BookmarkRecord``s from a browser export, whose
+   title, date and folders are kept, and is read lazily: at most
+   ``PENDING_WINDOW_FACTOR`` URLs per fetch worker wait in the scheduler.
+2. **Fetch** - ``AsyncFetchEngine`` downloads pages on one event loop,
+   ``IMPORT_FETCH_CONCURRENCY`` at a time. URLs are handed out by a
+   ``HostScheduler`` so no single site gets more than its fair share.
+   Concurrent imports in one worker share the fetch of a URL they both
+   contain (``metadata_flights``).
+3. **Parse** - newspaper/readability extraction is CPU bound and runs in a
+   process pool of ``IMPORT_PARSE_WORKERS`` workers (0 parses in threads).
+4. **Save** - extracted marks are queued to a ``MarkWriter`` thread that
+   inserts them ``IMPORT_WRITE_BATCH_SIZE`` per transaction.
+
+With a ``job_id`` the run is checkpointed: new URLs are staged as
+``ImportJobItem`` rows first and then claimed from the table in small
+batches, each item ending ``done`` or ``failed``. ``resume()`` picks an
+interrupted job up from its remaining items.
+
+Blocking calls (database, yt-dlp) are pushed off the event loop so they
+never stall the downloads.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator
+
+from flaskmarks.core.bookmark_import import BookmarkRecord
+from flaskmarks.core.fetch_cache import fetch_cache
+from flaskmarks.core.fetch_engine import (
+    DEFAULT_FETCH_CONCURRENCY,
+    DEFAULT_FETCH_TIMEOUT,
+    AsyncFetchEngine,
+)
+from flaskmarks.core.extensions import db
+from flaskmarks.core.import_job_status_service import (
+    current_runner_id,
+    get_import_job_status,
+    touch_import_job,
+)
+from flaskmarks.core.import_progress import (
+    DEFAULT_FLUSH_ITEMS,
+    DEFAULT_FLUSH_SECONDS,
+    ImportProgress,
+)
+from flaskmarks.core.import_scheduler import (
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_PER_HOST_CONCURRENCY,
+    DEFAULT_PER_HOST_DELAY,
+    HostScheduler,
+    ScheduledURL,
+)
+from flaskmarks.core.import_writer import DEFAULT_WRITE_BATCH_SIZE, MarkWriter
+from flaskmarks.core.marks_import_thread import (
+    binary_metadata,
+    extract_metadata,
+    is_youtube_video,
+    youtube_metadata,
+)
+from flaskmarks.core.single_flight import metadata_flights
+from flaskmarks.core.url_fetch_validation import URLTargetValidationError
+from flaskmarks.core.url_normalize import normalize_url
+from flaskmarks.models.import_job_item import ImportJobItem
+
+if TYPE_CHECKING:
+    from flask import Flask
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARSE_WORKERS = min(os.cpu_count() or 1, 4)
+# Threads for database calls; stays well inside the SQLAlchemy pool.
+# SQLite takes one writer at a time, so it gets a single thread.
+DB_THREADS = 4
+# Threads for blocking DNS lookups and yt-dlp
+BLOCKING_THREADS = 64
+# Distinct URLs checked against the database per pre-filter round
+PREFILTER_CHUNK_SIZE = 5000
+# URLs queued ahead of the fetch workers, per worker
+PENDING_WINDOW_FACTOR = 2
+# Seconds between heartbeats of a checkpointed job
+HEARTBEAT_INTERVAL = 30.0
+
+
+class RateLimited(Exception):
+    """The host answered 429/503; the URL should be retried later."""
+
+    def __init__(self, retry_after: float | None) -> None:
+        super().__init__(retry_after)
+        self.retry_after = retry_after
+
+
+class ImportFailed(Exception):
+    """A URL could not be turned into a mark."""
+
+    def __init__(self, error_class: str, message: str = '') -> None:
+        super().__init__(message or error_class)
+        self.error_class = error_class
+
+
+@dataclass
+class QueuedRecord:
+    """A record on its way through the pipeline, with its job item if any."""
+    record: BookmarkRecord
+    item_id: int | None = None
+
+
+@dataclass
+class ImportSummary:
+    """Counters for a finished import run."""
+    imported: int = 0
+    skipped: int = 0
+    failed: int = 0
+
+
+def with_bookmark_details(
+    data: dict[str, Any],
+    record: BookmarkRecord,
+) -> dict[str, Any]:
+    """
+    Merge what the browser export knew into extracted metadata.
+
+    The bookmark's own title wins over the page title, its date becomes
+    ``created`` and its tags and folder names are added to the extracted
+    tags.
+    """
+    return {
+        **data,
+        'title': record.title or data['title'],
+        'created': record.add_date or data.get('created'),
+        'tags': list(dict.fromkeys([*data['tags'], *record.all_tags()])),
+    }
+
+
+class ImportPipeline:
+    """
+    Import a batch of URLs for one user.
+
+    ``run()`` blocks until every URL has been processed, so callers start
+    it on a background thread (the web view) or call it directly (CLI).
+    """
+
+    def __init__(
+        self,
+        app: Flask,
+        user_id: int,
+        job_id: str | None = None,
+        engine_factory: Callable[[], AsyncFetchEngine] | None = None,
+    ) -> None:
+        """
+        Initialize the pipeline.
+
+        Args:
+            app: The Flask application instance
+            user_id: ID of the user the marks are imported for
+            job_id: Import job to report progress on, if any
+            engine_factory: Builds the fetch engine (tests inject one)
+        """
+        self.app = app
+        self.user_id = user_id
+        self.job_id = job_id
+        self.concurrency = max(int(app.config.get(
+            'IMPORT_FETCH_CONCURRENCY', DEFAULT_FETCH_CONCURRENCY
+        )), 1)
+        self.parse_workers = int(app.config.get(
+            'IMPORT_PARSE_WORKERS', DEFAULT_PARSE_WORKERS
+        ))
+        self._engine_factory = engine_factory or (lambda: AsyncFetchEngine(
+            concurrency=self.concurrency,
+            timeout=float(app.config.get('IMPORT_FETCH_TIMEOUT', DEFAULT_FETCH_TIMEOUT)),
+        ))
+        self._scheduler_factory = lambda: HostScheduler(
+            per_host_concurrency=app.config.get(
+                'IMPORT_PER_HOST_CONCURRENCY', DEFAULT_PER_HOST_CONCURRENCY
+            ),
+            min_delay=app.config.get(
+                'IMPORT_PER_HOST_DELAY_MS', DEFAULT_PER_HOST_DELAY * 1000
+            ) / 1000,
+            max_retries=app.config.get('IMPORT_MAX_RETRIES', DEFAULT_MAX_RETRIES),
+            max_pending=PENDING_WINDOW_FACTOR * self.concurrency,
+        )
+        self.summary = ImportSummary()
+        self.progress = ImportProgress(
+            user_id,
+            job_id,
+            flush_items=app.config.get('IMPORT_PROGRESS_FLUSH_ITEMS', DEFAULT_FLUSH_ITEMS),
+            flush_seconds=app.config.get('IMPORT_PROGRESS_FLUSH_SECONDS', DEFAULT_FLUSH_SECONDS),
+        ) if job_id else None
+        self._db_pool: ThreadPoolExecutor | None = None
+
+    def run(self, items: Iterable[str | BookmarkRecord]) -> ImportSummary:
+        """
+        Import every URL and return the counters.
+
+        ``items`` is consumed lazily, one pre-filter chunk at a time, so
+        a generator over a file on disk is never materialised.
+
+        Args:
+            items: URLs or bookmark records to import, one mark each
+
+        Returns:
+            ImportSummary for the run
+        """
+        if self.job_id is not None:
+            self.stage(items)
+            return self.resume()
+
+        chunks = self._candidate_chunks(items)
+
+        def next_batch() -> tuple[list[QueuedRecord], int]:
+            records, skipped = self._next_new_chunk(chunks)
+            return [QueuedRecord(record) for record in records], skipped
+
+        with self.app.app_context():
+            first, skipped = next_batch()
+        self.summary.skipped += skipped
+        return self._execute(first, next_batch)
+
+    def stage(self, items: Iterable[str | BookmarkRecord]) -> int:
+        """
+        Checkpoint the new URLs of ``items`` as pending job items.
+
+        Args:
+            items: URLs or bookmark records to import
+
+        Returns:
+            Number of items staged
+        """
+        staged = 0
+        with self.app.app_context():
+            job_pk = self._open_job()
+            try:
+                for consumed, candidates in self._candidate_chunks(items):
+                    records = self._filter_new(consumed, candidates)
+                    self.summary.skipped += consumed - len(records)
+                    staged += ImportJobItem.stage(job_pk, records)
+                    touch_import_job(self.user_id, self.job_id, current_runner_id())
+            finally:
+                self.progress.close()
+        return staged
+
+    def resume(self) -> ImportSummary:
+        """
+        Import the pending items of the job.
+
+        Items a previous runner left in ``fetching`` are queued again;
+        ``done`` and ``failed`` items are left alone.
+
+        Returns:
+            ImportSummary for this run
+        """
+        with self.app.app_context():
+            job_pk = self._open_job()
+            ImportJobItem.requeue_interrupted(job_pk)
+
+        claim_size = PENDING_WINDOW_FACTOR * self.concurrency
+
+        def next_batch() -> tuple[list[QueuedRecord], int]:
+            return [
+                QueuedRecord(record, item_id)
+                for item_id, record in ImportJobItem.claim(job_pk, claim_size)
+            ], 0
+
+        try:
+            with self.app.app_context():
+                first, _skipped = next_batch()
+            return self._execute(first, next_batch)
+        finally:
+            with self.app.app_context():
+                self.progress.close()
+
+    def _open_job(self) -> int:
+        """Look the job up and start counting its progress in memory."""
+        job = get_import_job_status(self.user_id, self.job_id)
+        if job is None:
+            raise LookupError(f'Import job {self.job_id} of user {self.user_id} not found')
+        self.progress.open()
+        return job.id
+
+    def _execute(
+        self,
+        first: list[QueuedRecord],
+        next_batch: Callable[[], tuple[list[QueuedRecord], int]],
+    ) -> ImportSummary:
+        """Fetch, parse and save ``first`` and every batch after it."""
+        if not first:
+            return self.summary
+
+        with self.app.app_context():
+            db_threads = 1 if db.engine.dialect.name == 'sqlite' else DB_THREADS
+        writer = MarkWriter(
+            self.app,
+            self.user_id,
+            batch_size=self.app.config.get(
+                'IMPORT_WRITE_BATCH_SIZE', DEFAULT_WRITE_BATCH_SIZE
+            ),
+            progress=self.progress,
+        )
+        writer.start()
+        try:
+            with self._parse_pool() as parse_pool, ThreadPoolExecutor(
+                max_workers=db_threads, thread_name_prefix='import-db'
+            ) as self._db_pool:
+                asyncio.run(self._run(first, next_batch, parse_pool, writer))
+        finally:
+            writer.close()
+
+        self.summary.imported += writer.written
+        self.summary.failed += writer.failed
+        return self.summary
+
+    def new_urls(self, urls: Iterable[str]) -> list[str]:
+        """
+        De-duplicate URLs by normalised form, dropping ones already bookmarked.
+
+        Must be called inside an application context. Dropped URLs count
+        as skipped and are reported as progress.
+
+        Args:
+            urls: URLs as read from the upload
+
+        Returns:
+            URLs as written (stripped) that are not yet marks of the user,
+            in input order
+        """
+        return [record.url for record in self.new_records(urls)]
+
+    def new_records(
+        self,
+        items: Iterable[str | BookmarkRecord],
+    ) -> list[BookmarkRecord]:
+        """
+        ``new_urls`` for bookmark records; plain URLs become bare records.
+
+        Args:
+            items: URLs or bookmark records
+
+        Returns:
+            Records, with the URL as written, that are not yet marks of the
+            user, in input order; the first record wins for URLs with the
+            same normalised form
+        """
+        new = []
+        for consumed, candidates in self._candidate_chunks(items):
+            records = self._filter_new(consumed, candidates)
+            self.summary.skipped += consumed - len(records)
+            new.extend(records)
+        return new
+
+    def _candidate_chunks(
+        self,
+        items: Iterable[str | BookmarkRecord],
+    ) -> Iterator[tuple[int, dict[str, BookmarkRecord]]]:
+        """
+        Normalise and de-duplicate ``items`` into pre-filter chunks.
+
+        Duplicates are detected with a set of 64-bit URL hashes rather
+        than the URLs themselves, which keeps a million-line import to a
+        few tens of megabytes.
+
+        Yields:
+            (items consumed, {normalised URL: record with the URL as
+            written}) with at most ``PREFILTER_CHUNK_SIZE`` candidates
+        """
+        seen: set[int] = set()
+        consumed = 0
+        candidates: dict[str, BookmarkRecord] = {}
+        for item in items:
+            consumed += 1
+            record = item if isinstance(item, BookmarkRecord) else BookmarkRecord(item)
+            normalized = normalize_url(record.url)
+            if normalized is None:
+                continue
+            digest = int.from_bytes(
+                hashlib.blake2b(normalized.encode(), digest_size=8).digest(), 'big'
+            )
+            if digest in seen:
+                continue
+            seen.add(digest)
+            candidates[normalized] = replace(record, url=record.url.strip())
+            if len(candidates) >= PREFILTER_CHUNK_SIZE:
+                yield consumed, candidates
+                consumed, candidates = 0, {}
+        if consumed:
+            yield consumed, candidates
+
+    def _filter_new(
+        self,
+        consumed: int,
+        candidates: dict[str, BookmarkRecord],
+    ) -> list[BookmarkRecord]:
+        """
+        Drop the candidates the user has bookmarked already.
+
+        Must be called inside an application context. Every consumed item
+        that is not returned is reported as progress; the caller adds them
+        to the skipped counter.
+        """
+        from flaskmarks.models import Mark
+
+        # Both the normalised and the as-written form may be stored
+        existing = Mark.existing_urls(
+            self.user_id,
+            list({*candidates, *(record.url for record in candidates.values())}),
+        )
+        # The normalised form is only the lookup key; marks keep the URL
+        # as written, fragment and case included
+        new = [
+            record
+            for normalized, record in candidates.items()
+            if normalized not in existing and record.url not in existing
+        ]
+
+        skipped = consumed - len(new)
+        if self.progress is not None and skipped and self.progress.advance(skipped):
+            self.progress.flush()
+        return new
+
+    def _next_new_chunk(
+        self,
+        chunks: Iterator[tuple[int, dict[str, BookmarkRecord]]],
+    ) -> tuple[list[BookmarkRecord], int]:
+        """
+        Pre-filter chunks until one has new records.
+
+        Returns:
+            (new records, empty once the input is exhausted; items skipped)
+        """
+        skipped = 0
+        for consumed, candidates in chunks:
+            new = self._filter_new(consumed, candidates)
+            skipped += consumed - len(new)
+            if new:
+                return new, skipped
+        return [], skipped
+
+    def _parse_pool(self) -> Executor:
+        if self.parse_workers > 0:
+            # spawn: the import runs on a thread of a (possibly threaded)
+            # web worker, which is not safe to fork
+            return ProcessPoolExecutor(
+                max_workers=self.parse_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return ThreadPoolExecutor(max_workers=1, thread_name_prefix='import-parse')
+
+    async def _run(
+        self,
+        first: list[QueuedRecord],
+        next_batch: Callable[[], tuple[list[QueuedRecord], int]],
+        parse_pool: Executor,
+        writer: MarkWriter,
+    ) -> None:
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(
+            max_workers=BLOCKING_THREADS, thread_name_prefix='import-io'
+        ))
+        scheduler = self._scheduler_factory()
+
+        async def produce() -> None:
+            # add() waits while the window is full, so the input is only
+            # read as fast as the workers drain it
+            batch = first
+            try:
+                while batch:
+                    for queued in batch:
+                        await scheduler.add(queued.record.url, queued)
+                    batch, skipped = await self._in_app(next_batch)
+                    self.summary.skipped += skipped
+            finally:
+                await scheduler.close()
+
+        heartbeat = asyncio.create_task(self._heartbeat()) if self.job_id else None
+        try:
+            async with self._engine_factory() as engine:
+                workers = [
+                    asyncio.create_task(
+                        self._worker(scheduler, engine, parse_pool, writer)
+                    )
+                    for _ in range(self.concurrency)
+                ]
+                await asyncio.gather(produce(), *workers)
+        finally:
+            if heartbeat is not None:
+                heartbeat.cancel()
+
+    async def _heartbeat(self) -> None:
+        """Tell other workers this job is still alive, and write stalled progress."""
+        runner_id = current_runner_id()
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            try:
+                await self._in_app(touch_import_job, self.user_id, self.job_id, runner_id)
+                await self._in_app(self.progress.flush)
+            except Exception as e:
+                logger.warning(f'Heartbeat for import {self.job_id} failed: {e}')
+
+    async def _worker(
+        self,
+        scheduler: HostScheduler,
+        engine: AsyncFetchEngine,
+        parse_pool: Executor,
+        writer: MarkWriter,
+    ) -> None:
+        while (item := await scheduler.acquire()) is not None:
+            try:
+                await self._import_one(item, engine, parse_pool, writer)
+            except RateLimited as limited:
+                if await scheduler.release(item, True, limited.retry_after):
+                    logger.info(f'{item.host} is rate limiting, retrying {item.url} later')
+                    continue
+                logger.warning(f'Giving up on {item.url}: {item.host} kept rate limiting')
+                await self._failed(item.payload, 'RateLimited', f'{item.host} kept rate limiting')
+            except ImportFailed as e:
+                await scheduler.release(item)
+                logger.info(f'Import of {item.url} failed: {e}')
+                await self._failed(item.payload, e.error_class, str(e))
+            except Exception as e:
+                await scheduler.release(item)
+                logger.error(f'Import of {item.url} failed: {e}')
+                await self._failed(item.payload, type(e).__name__, str(e))
+            else:
+                await scheduler.release(item)
+            await self._report_progress()
+
+    async def _failed(
+        self,
+        queued: QueuedRecord,
+        error_class: str,
+        message: str,
+        skipped: bool = False,
+    ) -> None:
+        """Count a URL that will not become a mark and checkpoint why."""
+        if skipped:
+            self.summary.skipped += 1
+        else:
+            self.summary.failed += 1
+            if self.progress is not None:
+                # Written with the progress of this URL by _report_progress()
+                self.progress.advance(0, failed=1)
+        if queued.item_id is not None:
+            try:
+                await self._in_app(
+                    ImportJobItem.mark_failed, queued.item_id, error_class, message
+                )
+            except Exception as e:
+                logger.error(f'Could not record failure of import item {queued.item_id}: {e}')
+
+    async def _report_progress(self) -> None:
+        """Count one finished URL; the row is only written when a flush is due."""
+        if self.progress is None or not self.progress.advance():
+            return
+        try:
+            await self._in_app(self.progress.flush)
+        except Exception as e:
+            logger.warning(f'Progress of import {self.job_id} not saved yet: {e}')
+
+    async def _import_one(
+        self,
+        item: ScheduledURL,
+        engine: AsyncFetchEngine,
+        parse_pool: Executor,
+        writer: MarkWriter,
+    ) -> None:
+        url = item.url
+        queued: QueuedRecord = item.payload
+        try:
+            if await asyncio.to_thread(is_youtube_video, url):
+                data = await asyncio.to_thread(youtube_metadata, url)
+            else:
+                # Shared with concurrent imports fetching the same URL
+                data = await metadata_flights.do_async(
+                    normalize_url(url),
+                    lambda: self._fetch_metadata(url, engine, parse_pool),
+                )
+        except URLTargetValidationError as exc:
+            logger.warning(f'Rejected non-public URL target "{url}": {exc}')
+            await self._failed(queued, type(exc).__name__, str(exc), skipped=True)
+            return
+
+        if data is None:
+            raise ImportFailed('NoMetadata', 'No metadata could be extracted')
+
+        data['url'] = url
+        data = with_bookmark_details(data, queued.record)
+        if queued.item_id is not None:
+            data['import_item_id'] = queued.item_id
+
+        # put() blocks while the writer is a few batches behind
+        await asyncio.to_thread(writer.put, data)
+
+    async def _fetch_metadata(
+        self,
+        url: str,
+        engine: AsyncFetchEngine,
+        parse_pool: Executor,
+    ) -> dict[str, Any] | None:
+        cached = await asyncio.to_thread(fetch_cache.lookup, url)
+        if cached is not None and cached.fresh:
+            return cached.metadata_for(url)
+        result = await engine.fetch(
+            url, headers=cached.conditional_headers() if cached else None
+        )
+        if result.rate_limited:
+            raise RateLimited(result.retry_after)
+        if result.error:
+            raise ImportFailed(result.error.split(':', 1)[0], result.error)
+        if cached is not None and result.not_modified:
+            await asyncio.to_thread(fetch_cache.revalidated, url, result)
+            return cached.metadata_for(url)
+        if not result.is_text:
+            return binary_metadata(url)
+
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(parse_pool, extract_metadata, url, result.body)
+        if data is not None:
+            await asyncio.to_thread(fetch_cache.store, url, result, data)
+        return data
+
+    async def _in_app(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking database call on the DB threads inside an app context."""
+        def call() -> Any:
+            with self.app.app_context():
+                return fn(*args)
+
+        return await asyncio.get_running_loop().run_in_executor(self._db_pool, call)
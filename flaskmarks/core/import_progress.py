@@ -0,0 +1,216 @@
+"""
+Coalesced progress counters and a push stream for import jobs.
+
+The import driver counts processed URLs in memory and writes them to
+``ImportJobStatus`` at most every ``IMPORT_PROGRESS_FLUSH_ITEMS`` URLs or
+``IMPORT_PROGRESS_FLUSH_SECONDS`` seconds, instead of one transaction per
+URL. Progress pages subscribe to a Server-Sent Events stream: when the
+job runs in the same process the stream reads the live counters, for a
+job running in another worker it samples the persisted row.
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from typing import Any, Iterator
+
+from flaskmarks.core.extensions import db
+from flaskmarks.core.import_job_status_service import (
+    get_import_job_status,
+    increment_import_job_status,
+)
+
+DEFAULT_FLUSH_ITEMS = 100
+DEFAULT_FLUSH_SECONDS = 2.0
+DEFAULT_STREAM_INTERVAL = 1.0
+# Comment line sent while nothing changes, so proxies keep the stream open
+STREAM_KEEPALIVE_SECONDS = 15.0
+
+_live_lock = threading.Lock()
+_live: dict[tuple[int, str], ImportProgress] = {}
+
+
+class ImportProgress:
+    """
+    Thread-safe progress counters of one running import job.
+
+    ``advance()`` is cheap and safe to call from the event loop; it only
+    says whether a flush is due. ``flush()`` writes the pending counts in
+    one UPDATE and must run inside an application context.
+    """
+
+    def __init__(
+        self,
+        user_id: int,
+        job_id: str,
+        flush_items: int = DEFAULT_FLUSH_ITEMS,
+        flush_seconds: float = DEFAULT_FLUSH_SECONDS,
+    ) -> None:
+        """
+        Initialize the counters.
+
+        Args:
+            user_id: ID of the user the job belongs to
+            job_id: Scoped job id
+            flush_items: Pending URLs that trigger a write
+            flush_seconds: Maximum age of unwritten progress
+        """
+        self.user_id = user_id
+        self.job_id = job_id
+        self.flush_items = max(int(flush_items), 1)
+        self.flush_seconds = flush_seconds
+        self.total = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._persisted = 0
+        self._persisted_failed = 0
+        self._pending = 0
+        self._pending_failed = 0
+        self._flush_claimed = False
+        self._last_flush = time.monotonic()
+
+    def open(self) -> None:
+        """
+        Start from the persisted counters and publish the job as live.
+
+        Must be called inside an application context.
+        """
+        job = get_import_job_status(self.user_id, self.job_id)
+        with self._lock:
+            if job is not None:
+                self._persisted = job.status
+                self._persisted_failed = job.failed
+                self.total = job.total_lines
+            self._last_flush = time.monotonic()
+        with _live_lock:
+            _live[(self.user_id, self.job_id)] = self
+
+    def close(self) -> None:
+        """Write what is left and stop serving live counters."""
+        try:
+            self.flush()
+        finally:
+            with _live_lock:
+                if _live.get((self.user_id, self.job_id)) is self:
+                    del _live[(self.user_id, self.job_id)]
+
+    def advance(self, processed: int = 1, failed: int = 0) -> bool:
+        """
+        Count processed URLs, ``failed`` of which did not become marks.
+
+        Returns:
+            True when the caller should ``flush()``; only one caller is told
+            so until that flush has taken the pending counts
+        """
+        with self._lock:
+            self._pending += processed
+            self._pending_failed += failed
+            due = not self._flush_claimed and (
+                self._pending >= self.flush_items
+                or (
+                    self._pending > 0
+                    and time.monotonic() - self._last_flush >= self.flush_seconds
+                )
+            )
+            if due:
+                self._flush_claimed = True
+            return due
+
+    def flush(self) -> None:
+        """Write the pending counts; a no-op when nothing is pending."""
+        # Serialised so increments are never applied out of order
+        with self._flush_lock:
+            with self._lock:
+                processed, failed = self._pending, self._pending_failed
+                self._pending = self._pending_failed = 0
+                self._flush_claimed = False
+                self._last_flush = time.monotonic()
+            if not processed and not failed:
+                return
+            try:
+                increment_import_job_status(self.user_id, self.job_id, processed, failed)
+            except Exception:
+                db.session.rollback()
+                with self._lock:
+                    self._pending += processed
+                    self._pending_failed += failed
+                raise
+            with self._lock:
+                self._persisted += processed
+                self._persisted_failed += failed
+
+    def counts(self) -> tuple[int, int, int]:
+        """(processed, failed, total) including progress not yet written."""
+        with self._lock:
+            processed = self._persisted + self._pending
+            if self.total > 0:
+                processed = min(processed, self.total)
+            return processed, self._persisted_failed + self._pending_failed, self.total
+
+
+def live_import_progress(user_id: int, job_id: str) -> ImportProgress | None:
+    """Counters of a job running in this process, if any."""
+    with _live_lock:
+        return _live.get((user_id, job_id))
+
+
+def _sample(user_id: int, job_id: str) -> dict[str, Any] | None:
+    """Current progress of a job, preferring live counters over the row."""
+    job = get_import_job_status(user_id, job_id)
+    if job is None:
+        return None
+    sample = job.as_dict()
+    progress = live_import_progress(user_id, job_id)
+    if progress is not None and not job.complete:
+        sample['status'], sample['failed'], sample['total_lines'] = progress.counts()
+    # End the read transaction so the next sample sees fresh data
+    db.session.rollback()
+    return sample
+
+
+def import_progress_events(
+    user_id: int,
+    job_id: str,
+    interval: float = DEFAULT_STREAM_INTERVAL,
+) -> Iterator[str]:
+    """
+    Server-Sent Events describing the progress of a job until it completes.
+
+    Each ``progress`` event carries the status fields plus ``rate`` (URLs
+    per second observed by this stream) and ``eta`` (seconds, or null
+    while unknown). An event is only sent when the counters changed.
+
+    Must be iterated inside an application context.
+    """
+    started = last_sent = time.monotonic()
+    baseline = None
+    previous = None
+
+    while True:
+        sample = _sample(user_id, job_id)
+        if sample is None:
+            yield 'event: error\ndata: {"error": "import job not found"}\n\n'
+            return
+
+        now = time.monotonic()
+        if baseline is None:
+            baseline = sample['status']
+        elapsed = now - started
+        rate = (sample['status'] - baseline) / elapsed if elapsed > 0 else 0.0
+        remaining = max(sample['total_lines'] - sample['status'], 0)
+        sample['rate'] = round(rate, 2)
+        sample['eta'] = round(remaining / rate) if rate > 0 else None
+
+        key = (sample['status'], sample['failed'], sample['complete'])
+        if key != previous:
+            previous = key
+            last_sent = now
+            yield f'event: progress\ndata: {json.dumps(sample)}\n\n'
+        elif now - last_sent >= STREAM_KEEPALIVE_SECONDS:
+            last_sent = now
+            yield ': keep-alive\n\n'
+
+        if sample['complete']:
+            return
+        time.sleep(interval)
@@ -0,0 +1,228 @@
+"""
+Per-host politeness scheduling for bulk imports.
+
+Browser exports are dominated by a handful of hosts. Handing URLs out in
+file order lets every fetch slot pile onto the same site, which then rate
+limits the whole import. ``HostScheduler`` shards pending URLs by
+registrable domain and hands them out round-robin, so that:
+
+* no host has more than ``per_host_concurrency`` requests in flight,
+* requests to one host start at least ``min_delay`` seconds apart,
+* a host that answers 429/503 is paused (for its ``Retry-After`` when it
+  sends one, exponentially longer otherwise) and the URL is retried
+  instead of failed,
+
+while the other hosts keep every global fetch slot busy.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any
+from urllib.parse import urlparse
+
+import tldextract
+
+DEFAULT_PER_HOST_CONCURRENCY = 2
+DEFAULT_PER_HOST_DELAY = 0.5
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF = 30.0
+MAX_BACKOFF = 600.0
+DEFAULT_MAX_PENDING = 10000
+
+
+def host_key(url: str) -> str:
+    """
+    Return the politeness key for a URL: its registrable domain.
+
+    ``www.github.com`` and ``gist.github.com`` share one budget; hosts
+    without a public suffix (IP addresses, ``localhost``) use the hostname.
+    """
+    extracted = tldextract.extract(url)
+    # tldextract 5.3 renamed registered_domain and deprecated the old name
+    if hasattr(extracted, 'top_domain_under_public_suffix'):
+        domain = extracted.top_domain_under_public_suffix
+    else:
+        domain = extracted.registered_domain
+    if domain:
+        return domain.lower()
+    return (urlparse(url).hostname or '').lower()
+
+
+@dataclass
+class ScheduledURL:
+    """A URL handed out by the scheduler, returned via ``release()``."""
+    url: str
+    host: str
+    attempts: int = 0
+    payload: Any = None
+
+
+@dataclass
+class _HostQueue:
+    """Pending URLs and rate-limit state for one host."""
+    urls: deque[ScheduledURL] = field(default_factory=deque)
+    active: int = 0
+    not_before: float = 0.0
+    backoff: float = 0.0
+
+
+class HostScheduler:
+    """
+    Asyncio work queue that enforces per-host limits.
+
+    Producers ``add()`` URLs and ``close()`` when done; workers loop on
+    ``acquire()`` until it returns None and ``release()`` every URL they
+    were given.
+    """
+
+    def __init__(
+        self,
+        per_host_concurrency: int = DEFAULT_PER_HOST_CONCURRENCY,
+        min_delay: float = DEFAULT_PER_HOST_DELAY,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        max_pending: int = DEFAULT_MAX_PENDING,
+    ) -> None:
+        """
+        Initialize the scheduler.
+
+        Args:
+            per_host_concurrency: Maximum in-flight requests per host
+            min_delay: Minimum seconds between request starts on one host
+            max_retries: Rate-limited attempts per URL before it fails
+            max_pending: ``add()`` blocks while this many URLs are queued
+        """
+        self.per_host_concurrency = max(int(per_host_concurrency), 1)
+        self.min_delay = max(float(min_delay), 0.0)
+        self.max_retries = max(int(max_retries), 0)
+        self.max_pending = max(int(max_pending), 1)
+        self._hosts: dict[str, _HostQueue] = {}
+        # Hosts with queued URLs, in round-robin order
+        self._ring: deque[str] = deque()
+        self._pending = 0
+        self._active = 0
+        self._closed = False
+        self._cond = asyncio.Condition()
+
+    async def add(self, url: str, payload: Any = None) -> None:
+        """
+        Queue a URL, waiting while ``max_pending`` URLs are already queued.
+
+        Args:
+            url: URL to fetch
+            payload: Caller data handed back with the URL by ``acquire()``
+        """
+        host = host_key(url)
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._pending < self.max_pending)
+            self._enqueue(ScheduledURL(url, host, payload=payload))
+            self._cond.notify_all()
+
+    async def close(self) -> None:
+        """Signal that no more URLs will be added."""
+        async with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    async def acquire(self) -> ScheduledURL | None:
+        """
+        Wait for the next URL whose host may be fetched now.
+
+        Returns:
+            ScheduledURL, or None once the scheduler is closed and every
+            URL has been released for good
+        """
+        async with self._cond:
+            while True:
+                item = self._next_ready()
+                if item is not None:
+                    return item
+                if self._closed and not self._pending and not self._active:
+                    return None
+                try:
+                    await asyncio.wait_for(self._cond.wait(), self._next_wakeup())
+                except asyncio.TimeoutError:
+                    pass
+
+    async def release(
+        self,
+        item: ScheduledURL,
+        rate_limited: bool = False,
+        retry_after: float | None = None,
+    ) -> bool:
+        """
+        Return a URL handed out by ``acquire()``.
+
+        Args:
+            item: The URL being released
+            rate_limited: True if the host answered 429/503
+            retry_after: Seconds from the host's ``Retry-After`` header
+
+        Returns:
+            True if the URL was queued again for a retry
+        """
+        async with self._cond:
+            queue = self._hosts[item.host]
+            queue.active -= 1
+            self._active -= 1
+
+            requeued = False
+            if rate_limited:
+                queue.backoff = min(
+                    queue.backoff * 2 if queue.backoff else DEFAULT_BACKOFF,
+                    MAX_BACKOFF,
+                )
+                delay = retry_after if retry_after is not None else queue.backoff
+                queue.not_before = max(queue.not_before, time.monotonic() + delay)
+                item.attempts += 1
+                if item.attempts <= self.max_retries:
+                    self._enqueue(item, front=True)
+                    requeued = True
+            else:
+                queue.backoff = 0.0
+
+            self._cond.notify_all()
+            return requeued
+
+    def _enqueue(self, item: ScheduledURL, front: bool = False) -> None:
+        """Add a URL to its host queue; caller holds the condition."""
+        queue = self._hosts.setdefault(item.host, _HostQueue())
+        if not queue.urls:
+            self._ring.append(item.host)
+        if front:
+            queue.urls.appendleft(item)
+        else:
+            queue.urls.append(item)
+        self._pending += 1
+
+    def _next_ready(self) -> ScheduledURL | None:
+        """Pop the next URL round-robin from a host that is under its limits."""
+        now = time.monotonic()
+        for _ in range(len(self._ring)):
+            host = self._ring[0]
+            self._ring.rotate(-1)
+            queue = self._hosts[host]
+            if queue.active >= self.per_host_concurrency or now < queue.not_before:
+                continue
+
+            item = queue.urls.popleft()
+            if not queue.urls:
+                self._ring.remove(host)
+            queue.active += 1
+            queue.not_before = now + self.min_delay
+            self._pending -= 1
+            self._active += 1
+            return item
+        return None
+
+    def _next_wakeup(self) -> float | None:
+        """Seconds until a delayed host becomes ready, None to wait for a release."""
+        now = time.monotonic()
+        delays = [
+            self._hosts[host].not_before - now
+            for host in self._ring
+            if self._hosts[host].active < self.per_host_concurrency
+        ]
+        return max(min(delays), 0.0) if delays else None
@@ -0,0 +1,239 @@
+"""
+Batched database writer stage for bulk imports.
+
+Fetch workers hand extracted marks to a single ``MarkWriter`` thread. It
+inserts them ``IMPORT_WRITE_BATCH_SIZE`` at a time: one multi-row INSERT
+each for ``marks``, ``mark_stats`` and ``marks_tags``, plus one bulk tag
+resolution, all in one transaction. Checkpointed job items of the batch
+are flagged ``done`` in the same transaction. Compared to a commit per URL from
+many threads, that is a few statements per batch on a single connection.
+"""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from datetime import datetime as dt
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import insert
+
+from flaskmarks.core.extensions import db
+from flaskmarks.models.import_job_item import ImportJobItem
+from flaskmarks.models.mark import Mark, ass_tbl
+from flaskmarks.models.mark_stats import MarkStats
+from flaskmarks.models.tag import Tag
+
+if TYPE_CHECKING:
+    from flask import Flask
+
+    from flaskmarks.core.import_progress import ImportProgress
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WRITE_BATCH_SIZE = 200
+DEFAULT_WRITE_INTERVAL = 1.0
+# Rows per multi-row VALUES statement, well below SQLite's bound
+# parameter limit at seven columns per mark
+ROWS_PER_INSERT = 500
+
+_STOP = object()
+
+
+def write_marks(owner_id: int, records: list[dict[str, Any]]) -> list[int]:
+    """
+    Insert extracted marks with their stats rows and tag links.
+
+    Must be called inside an application context; commits on success.
+
+    Args:
+        owner_id: ID of the user who owns the marks
+        records: Metadata dicts as built by ``extract_metadata``
+
+    Returns:
+        IDs of the new marks, in ``records`` order
+    """
+    if not records:
+        return []
+
+    now = dt.utcnow()
+    marks = Mark.__table__
+    tag_ids = Tag.resolve_many(tag for record in records for tag in record['tags'])
+
+    rows = [
+        {
+            'owner_id': owner_id,
+            'type': record['type'],
+            'title': Mark.clamp_title_length(record['title']),
+            'description': record['description'],
+            'full_html': record['full_html'],
+            'url': record['url'],
+            'created': record.get('created') or now,
+        }
+        for record in records
+    ]
+    if db.engine.dialect.name == 'postgresql':
+        # insertmanyvalues sends this as multi-row INSERT ... RETURNING
+        mark_ids = list(db.session.scalars(
+            insert(marks).returning(marks.c.id, sort_by_parameter_order=True),
+            rows,
+        ))
+    else:
+        mark_ids = _insert_marks(owner_id, rows)
+
+    db.session.execute(insert(MarkStats.__table__), [
+        {'mark_id': mark_id, 'owner_id': owner_id, 'clicks': 0}
+        for mark_id in mark_ids
+    ])
+
+    links = [
+        {'left_id': mark_id, 'right_id': tag_ids[title]}
+        for mark_id, record in zip(mark_ids, records)
+        for title in {Tag.normalize_title(tag) for tag in record['tags']}
+        if title in tag_ids
+    ]
+    if links:
+        db.session.execute(insert(ass_tbl), links)
+
+    ImportJobItem.mark_done([
+        record['import_item_id'] for record in records if record.get('import_item_id')
+    ])
+    db.session.commit()
+    return mark_ids
+
+
+def _insert_marks(owner_id: int, rows: list[dict[str, Any]]) -> list[int]:
+    """
+    Insert marks with multi-row VALUES and read their ids back by URL.
+
+    Ordered RETURNING falls back to one INSERT per row outside PostgreSQL.
+    The new rows of a URL are its highest ids, assigned in VALUES order,
+    and the insert holds the write lock until commit.
+    """
+    marks = Mark.__table__
+    for start in range(0, len(rows), ROWS_PER_INSERT):
+        db.session.execute(insert(marks).values(rows[start:start + ROWS_PER_INSERT]))
+
+    urls = {row['url'] for row in rows}
+    ids_by_url: dict[str, list[int]] = {}
+    for mark_id, url in db.session.execute(
+        db.select(marks.c.id, marks.c.url)
+        .where(marks.c.owner_id == owner_id, marks.c.url.in_(urls))
+        .order_by(marks.c.id)
+    ):
+        ids_by_url.setdefault(url, []).append(mark_id)
+
+    wanted: dict[str, int] = {}
+    for row in rows:
+        wanted[row['url']] = wanted.get(row['url'], 0) + 1
+    new_ids = {url: iter(ids_by_url[url][-count:]) for url, count in wanted.items()}
+    return [next(new_ids[row['url']]) for row in rows]
+
+
+class MarkWriter:
+    """
+    Single writer thread fed through a bounded queue.
+
+    ``put()`` blocks while ``batch_size * 4`` records are waiting, which
+    slows the fetch stage down instead of buffering without limit. A batch
+    is written once it is full or ``flush_interval`` seconds after its
+    first record arrived.
+    """
+
+    def __init__(
+        self,
+        app: Flask,
+        owner_id: int,
+        batch_size: int = DEFAULT_WRITE_BATCH_SIZE,
+        flush_interval: float = DEFAULT_WRITE_INTERVAL,
+        progress: ImportProgress | None = None,
+    ) -> None:
+        """
+        Initialize the writer.
+
+        Args:
+            app: The Flask application instance
+            owner_id: ID of the user the marks are imported for
+            batch_size: Maximum marks per transaction
+            flush_interval: Maximum seconds a record waits for its batch
+            progress: Job progress that marks failing to save count against
+        """
+        self.app = app
+        self.owner_id = owner_id
+        self.progress = progress
+        self.batch_size = max(int(batch_size), 1)
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.failed = 0
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=self.batch_size * 4)
+        self._thread = threading.Thread(
+            target=self._run,
+            name='import-writer',
+            daemon=True,
+        )
+
+    def start(self) -> None:
+        """Start the writer thread."""
+        self._thread.start()
+
+    def put(self, record: dict[str, Any]) -> None:
+        """Queue one extracted mark for insertion."""
+        self._queue.put(record)
+
+    def close(self) -> None:
+        """Write everything still queued and stop the thread."""
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self) -> None:
+        with self.app.app_context():
+            try:
+                while True:
+                    batch, stop = self._next_batch()
+                    if batch:
+                        self._write(batch)
+                    if stop:
+                        return
+            finally:
+                db.session.remove()
+
+    def _next_batch(self) -> tuple[list[dict[str, Any]], bool]:
+        """Collect up to ``batch_size`` records; True once close() was called."""
+        item = self._queue.get()
+        if item is _STOP:
+            return [], True
+
+        batch = [item]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _write(self, batch: list[dict[str, Any]]) -> None:
+        try:
+            self.written += len(write_marks(self.owner_id, batch))
+            return
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f'Batch of {len(batch)} marks failed ({e}), retrying one by one')
+
+        # Isolate the bad rows so one of them cannot sink the whole batch
+        for record in batch:
+            try:
+                self.written += len(write_marks(self.owner_id, [record]))
+            except Exception as e:
+                db.session.rollback()
+                self.failed += 1
+                if self.progress is not None:
+                    # The URL itself was already counted as processed
+                    self.progress.advance(0, failed=1)
+                logger.error(f'Could not save imported mark {record["url"]}: {e}')
+                if record.get('import_item_id'):
+                    ImportJobItem.mark_failed(record['import_item_id'], type(e).__name__, str(e))
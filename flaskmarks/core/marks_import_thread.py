@@ -3,31 +3,42 @@ Background thread for importing bookmarks from URLs.
 """
 from __future__ import annotations
 
+import logging
 from threading import Thread
 from typing import Any
 from urllib.parse import urlparse
 
-import requests
 import tldextract
 from flask import current_app
-from newspaper import Article, ArticleBinaryDataException
+from newspaper import Article
 from readability.readability import Document
 
 from flaskmarks.core.extensions import db
+from flaskmarks.core.fetch_cache import fetch_cache
+from flaskmarks.core.fetch_engine import fetch_page
 from flaskmarks.core.html_sanitizer import sanitize_external_html
+from flaskmarks.core.single_flight import advisory_lock, metadata_flights
 from flaskmarks.core.url_fetch_validation import (
     URLTargetValidationError,
     ensure_public_http_url,
 )
+from flaskmarks.core.url_normalize import normalize_url
 from flaskmarks.core.youtube import get_youtube_info, check_url_video
 from flaskmarks.models import Mark
 from flaskmarks.models.tag import Tag
 
+logger = logging.getLogger(__name__)
+
 
 def fetch_url_metadata(url: str) -> dict[str, Any] | None:
     """
     Fetch metadata from a URL without saving to database.
 
+    The page is downloaded once; its headers decide whether it is parsed
+    at all. Pages in ``fetch_cache`` are revalidated instead, and a
+    ``304 Not Modified`` returns the cached metadata. Concurrent calls
+    for the same normalised URL share one fetch (``metadata_flights``).
+
     Args:
         url: The URL to fetch metadata from
 
@@ -35,14 +46,65 @@ def fetch_url_metadata(url: str) -> dict[str, Any] | None:
         Dictionary with extracted metadata or None if failed
 
     Raises:
-        URLTargetValidationError: If URL is disallowed for outbound fetches
+        URLTargetValidationError: If URL (or a redirect target) is
+            disallowed for outbound fetches
     """
     ensure_public_http_url(url)
 
-    url_domain = tldextract.extract(url).domain
-    readable_title = None
+    key = normalize_url(url)
+    data = metadata_flights.do(key, lambda: _fetch_url_metadata(url, key))
+    if data is not None:
+        data['url'] = url
+    return data
+
+
+def _fetch_url_metadata(url: str, key: str) -> dict[str, Any] | None:
+    """Fetch as the single-flight leader, one worker process at a time."""
+    with advisory_lock(key):
+        return _fetch_url_metadata_locked(url)
+
+
+def _fetch_url_metadata_locked(url: str) -> dict[str, Any] | None:
+    # A worker that waited on the lock finds the result just fetched;
+    # failures are not kept, so its waiters try again themselves
+    cached = fetch_cache.lookup(url)
+    if cached is not None and cached.fresh:
+        return cached.metadata_for(url)
+
+    # Handle YouTube URLs
+    if is_youtube_video(url):
+        print(f"Processing YouTube URL: {url}")
+        try:
+            m = youtube_metadata(url)
+        except Exception as e:
+            print(f"YouTube extraction failed: {e}")
+            return _empty_metadata(url)
+        fetch_cache.share(url, m)
+        return m
+
+    result = fetch_page(url, headers=cached.conditional_headers() if cached else None)
+    if result.error:
+        print(f'Connection error for {url}: {result.error}')
+        return None
+    if cached is not None and result.not_modified:
+        fetch_cache.revalidated(url, result)
+        logger.info(f'Metadata unchanged for: "{cached.metadata.get("title")}"')
+        return cached.metadata_for(url)
+    if not result.is_text:
+        print(f'URL {url} is not text content')
+        m = binary_metadata(url)
+        fetch_cache.share(url, m)
+        return m
+
+    m = extract_metadata(url, result.body)
+    fetch_cache.store(url, result, m)
+    print(f'Metadata fetched for: "{m["title"]}"')
+    return m
+
 
-    m: dict[str, Any] = {
+def _empty_metadata(url: str) -> dict[str, Any]:
+    """Metadata for a URL before anything has been extracted."""
+    return {
         'type': 'bookmark',
         'tags': [],
         'url': url,
@@ -51,89 +113,134 @@ def fetch_url_metadata(url: str) -> dict[str, Any] | None:
         'full_html': '',
     }
 
-    # Handle YouTube URLs
-    if url_domain in ['youtube', 'youtu'] and check_url_video(url):
-        print(f"Processing YouTube URL: {url_domain}")
-        try:
-            youtube_info = get_youtube_info(url)
-            m['title'] = youtube_info['title']
-            m['description'] = youtube_info['description']
-            m['full_html'] = (
-                youtube_info['description'] + youtube_info['subtitles']
-            )
 
-            m['tags'].append(url_domain)
-            m['tags'].append('video')
+def is_youtube_video(url: str) -> bool:
+    """
+    Check whether a URL should be imported through yt-dlp.
 
-            if youtube_info['uploader']:
-                m['tags'].append(youtube_info['uploader'])
+    Only YouTube hosts are handed to ``check_url_video``, which itself
+    queries the network.
+    """
+    url_domain = tldextract.extract(url).domain
+    return url_domain in ['youtube', 'youtu'] and check_url_video(url)
 
-            for auto_tag in youtube_info['tags']:
-                m['tags'].append(auto_tag)
 
-            m['full_html'] = sanitize_external_html(m['full_html'])
-            return m
-        except Exception as e:
-            print(f"YouTube extraction failed: {e}")
-            m['full_html'] = sanitize_external_html(m['full_html'])
-            return m
+def youtube_metadata(url: str) -> dict[str, Any]:
+    """
+    Build mark metadata for a YouTube video via yt-dlp.
 
-    # Check content type
-    try:
-        with requests.head(url, timeout=4) as r:
-            content_type = r.headers.get('content-type', 'none')
+    Args:
+        url: URL of the video
 
-            if 'text' not in content_type:
-                m['tags'].append('binary_file')
-                print(f'URL {url} is not text content')
-                return m
-    except Exception as e:
-        print(f'Connection error for {url}: {e}')
-        return None
+    Returns:
+        Dictionary with extracted metadata
+    """
+    url_domain = tldextract.extract(url).domain
+    m = _empty_metadata(url)
 
-    # Parse article content
-    article = Article(url)
+    youtube_info = get_youtube_info(url)
+    m['title'] = youtube_info['title']
+    m['description'] = youtube_info['description']
+    m['full_html'] = sanitize_external_html(
+        youtube_info['description'] + youtube_info['subtitles']
+    )
 
-    try:
-        article.download()
-    except ArticleBinaryDataException:
-        print(f"URL {url} is binary data")
-        return m
+    m['tags'].append(url_domain)
+    m['tags'].append('video')
+
+    # Some videos don't have channel
+    if youtube_info['uploader']:
+        m['tags'].append(youtube_info['uploader'])
+
+    for auto_tag in youtube_info['tags']:
+        m['tags'].append(auto_tag)
+
+    return m
+
+
+def binary_metadata(url: str) -> dict[str, Any]:
+    """Metadata for a URL whose response is not text."""
+    m = _empty_metadata(url)
+    m['tags'].append('binary_file')
+    return m
+
+
+def extract_metadata(url: str, html: str) -> dict[str, Any]:
+    """
+    Build mark metadata from an already downloaded page.
+
+    Nothing here touches the network, so it is safe to run in a worker
+    process of the import pipeline's parse pool. The page is parsed by
+    newspaper and readability, and the readable HTML is sanitised once.
+
+    Args:
+        url: URL the page was fetched from
+        html: Decoded response body
+
+    Returns:
+        Dictionary with extracted metadata
+    """
+    url_domain = tldextract.extract(url).domain
+    m = _empty_metadata(url)
+
+    article = Article(url)
+    article.download(input_html=html)
 
     try:
         article.parse()
         article.nlp()
     except Exception as e:
         print(f"Article {url} parsing failed: {e}")
-    else:
-        if article.is_parsed:
-            full_html = article.html
-
-            if full_html:
-                readable = Document(full_html)
-                readable_html = readable.summary()
-                readable_title = readable.title()
-                m['full_html'] = sanitize_external_html(readable_html)
-                m['description'] = article.summary
-            else:
-                m['full_html'] = sanitize_external_html(article.summary)
-                m['description'] = article.summary
-        else:
-            m['full_html'] = sanitize_external_html(url)
-
-        m['title'] = readable_title if readable_title else url
-
-        # Add tags and keywords
-        m['tags'].append(url_domain)
-
-        for auto_tag in article.keywords[:5]:
-            m['tags'].append(auto_tag)
-
-    m['full_html'] = sanitize_external_html(m['full_html'])
-    print(f'Metadata fetched for: "{m["title"]}"')
+        return m
+
+    readable_title = None
+    if article.is_parsed and article.html:
+        readable = Document(article.html)
+        m['full_html'] = sanitize_external_html(readable.summary())
+        readable_title = readable.title()
+    elif article.is_parsed:
+        m['full_html'] = sanitize_external_html(article.summary)
+    m['description'] = article.summary if article.is_parsed else ''
+    m['title'] = readable_title if readable_title else url
+
+    m['tags'].append(url_domain)
+    for auto_tag in article.keywords[:5]:
+        m['tags'].append(auto_tag)
+
     return m
 
 
+def insert_imported_mark(user_id: int, data: dict[str, Any]) -> bool:
+    """
+    Save imported metadata as a new mark.
+
+    Must be called inside an application context.
+
+    Args:
+        user_id: ID of the user who owns the mark
+        data: Metadata from one of the extraction helpers
+
+    Returns:
+        True if the mark was committed
+    """
+    m = Mark(user_id)
+    m.url = data['url']
+    m.title = data['title']
+    m.description = data['description']
+    m.full_html = data['full_html']
+    m.type = data['type']
+
+    try:
+        m.tags = Tag.resolve(data['tags'])
+        db.session.add(m)
+        db.session.commit()
+    except Exception as e:
+        print(e)
+        db.session.rollback()
+        return False
+    return True
+
+
 class MarksImportThread(Thread):
     """
     Thread class for importing a bookmark from a URL.
@@ -226,98 +333,31 @@ class MarksImportThread(Thread):
     def get_url_data(self) -> None:
         """Fetch and extract data from the URL."""
         url = self.url
-        url_domain = tldextract.extract(url).domain
-        readable_title = None
-
-        m: dict[str, Any] = {
-            'type': 'bookmark',
-            'tags': [],
-            'url': url,
-            'title': url,
-            'description': '',
-            'full_html': '',
-        }
 
         # Handle YouTube URLs
-        if url_domain in ['youtube', 'youtu'] and check_url_video(url):
-            print(url_domain)
-            youtube_info = get_youtube_info(url)
-            m['title'] = youtube_info['title']
-            m['description'] = youtube_info['description']
-            m['full_html'] = (
-                youtube_info['description'] + youtube_info['subtitles']
-            )
-
-            m['tags'].append(url_domain)
-            m['tags'].append('video')
-
-            # Some videos don't have channel
-            if youtube_info['uploader']:
-                m['tags'].append(youtube_info['uploader'])
-
-            for auto_tag in youtube_info['tags']:
-                m['tags'].append(auto_tag)
-
-            m['full_html'] = sanitize_external_html(m['full_html'])
-            self.m = m
+        if is_youtube_video(url):
+            self.m = youtube_metadata(url)
             return
 
-        # Check content type
         try:
-            with requests.head(url, timeout=4) as r:
-                content_type = r.headers.get('content-type', 'none')
-
-                if 'text' not in content_type:
-                    m['tags'].append('binary_file')
-                    print('url not text')
-                    self.m = m
-                    return
-        except Exception as e:
-            print('requests connection error')
-            print(e)
+            result = fetch_page(url)
+        except URLTargetValidationError as exc:
+            current_app.logger.warning(
+                f'Rejected non-public redirect target for "{url}": {exc}'
+            )
             return
 
-        # Parse article content
-        article = Article(url)
-
-        try:
-            article.download()
-        except ArticleBinaryDataException:
-            print(f"URL {url} is binary data")
+        if result.error:
+            print('requests connection error')
+            print(result.error)
+            return
+        if not result.is_text:
+            print('url not text')
+            self.m = binary_metadata(url)
+            return
 
-        try:
-            article.parse()
-            article.nlp()
-        except Exception:
-            print(f"Article {url} not working: article not able to be parsed")
-        else:
-            if article.is_parsed:
-                full_html = article.html
-
-                if full_html:
-                    readable = Document(full_html)
-                    readable_html = readable.summary()
-                    readable_title = readable.title()
-                    m['full_html'] = sanitize_external_html(readable_html)
-                    m['description'] = article.summary
-                else:
-                    m['full_html'] = sanitize_external_html(article.summary)
-                    m['description'] = article.summary
-            else:
-                m['full_html'] = sanitize_external_html(url)
-
-            m['title'] = readable_title if readable_title else url
-
-            # Add tags and keywords
-            m['tags'].append(url_domain)
-
-            for auto_tag in article.keywords[:5]:
-                m['tags'].append(auto_tag)
-
-        print(f'New bookmark: "{m["title"]}", added.')
-
-        m['full_html'] = sanitize_external_html(m['full_html'])
-        self.m = m
+        self.m = extract_metadata(url, result.body)
+        print(f'New bookmark: "{self.m["title"]}", added.')
         self.insert_mark_thread()
 
     def insert_mark_thread(self) -> None:
@@ -330,19 +370,4 @@ class MarksImportThread(Thread):
         from flaskmarks import app
 
         with app.app_context():
-            m = Mark(self.user_id)
-            m.url = data['url']
-            m.title = data['title']
-            m.description = data['description']
-            m.full_html = sanitize_external_html(data['full_html'])
-            m.type = data['type']
-
-            for auto_tag in data['tags']:
-                m.tags.append(Tag(auto_tag))
-
-            try:
-                db.session.add(m)
-                db.session.commit()
-            except Exception as e:
-                print(e)
-                db.session.rollback()
+            insert_imported_mark(self.user_id, data)
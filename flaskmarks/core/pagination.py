@@ -0,0 +1,214 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Offset pagination re-reads and discards every row before the requested
+page and issues a separate ``COUNT(*)``. Keyset pagination instead seeks
+past the sort key of the last row already seen, so page 1000 costs the same
+as page 1. Cursors are opaque, URL-safe tokens bound to the sort they were
+issued for.
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Iterator, Sequence
+
+from flask_sqlalchemy.pagination import Pagination
+from sqlalchemy import and_, or_, tuple_
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor is malformed or belongs to another sort."""
+
+
+@dataclass(frozen=True)
+class SortKey:
+    """One column of a keyset sort order."""
+    attr: str
+    column: Any
+    descending: bool = True
+
+    def order_by(self) -> Any:
+        """Return the ORDER BY clause element for this key."""
+        return self.column.desc() if self.descending else self.column.asc()
+
+
+class KeysetPage:
+    """
+    One page of keyset-paginated results.
+
+    Mirrors the parts of Flask-SQLAlchemy's ``Pagination`` that templates
+    and serializers use, plus ``next_cursor``. ``total`` is only computed
+    when explicitly requested.
+    """
+
+    page = None
+
+    def __init__(
+        self,
+        items: list,
+        per_page: int,
+        cursor: str | None,
+        next_cursor: str | None,
+        total: int | None = None,
+    ) -> None:
+        self.items = items
+        self.per_page = per_page
+        self.cursor = cursor
+        self.next_cursor = next_cursor
+        self.total = total
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self) -> bool:
+        return bool(self.cursor)
+
+    def __iter__(self) -> Iterator:
+        return iter(self.items)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+class RankedPagination(Pagination):
+    """
+    Offset pagination over items ranked outside the ORM query.
+
+    Used when the page of IDs and the total come from a custom statement
+    (e.g. rank fusion); behaves like Flask-SQLAlchemy's ``Pagination``
+    for templates and serializers.
+    """
+
+    def __init__(self, items: list, page: int, per_page: int, total: int) -> None:
+        super().__init__(
+            page=page, per_page=per_page, max_per_page=None,
+            error_out=False, items=items, total=total,
+        )
+
+    def _query_items(self) -> list:
+        return self._query_args['items']
+
+    def _query_count(self) -> int:
+        return self._query_args['total']
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and set(value) == {'dt'}:
+        return datetime.fromisoformat(value['dt'])
+    return value
+
+
+def encode_cursor(scope: str, values: Sequence[Any]) -> str:
+    """
+    Encode sort key values into an opaque cursor token.
+
+    Args:
+        scope: Name of the sort the cursor belongs to
+        values: Sort key values of the last row on the page
+
+    Returns:
+        URL-safe cursor string
+    """
+    payload = json.dumps(
+        {'s': scope, 'k': [_encode_value(v) for v in values]},
+        separators=(',', ':'),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: str, scope: str, size: int) -> list[Any]:
+    """
+    Decode a cursor token issued by :func:`encode_cursor`.
+
+    Args:
+        token: Cursor string from the client
+        scope: Sort the cursor must belong to
+        size: Expected number of key values
+
+    Returns:
+        List of sort key values
+
+    Raises:
+        InvalidCursorError: If the token is malformed or for another sort
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = [_decode_value(v) for v in payload['k']]
+        issued_for = payload['s']
+    except (binascii.Error, ValueError, KeyError, TypeError) as exc:
+        raise InvalidCursorError('Malformed pagination cursor.') from exc
+
+    if issued_for != scope or len(values) != size:
+        raise InvalidCursorError('Pagination cursor does not match this sort order.')
+    return values
+
+
+def _seek_predicate(keys: Sequence[SortKey], values: Sequence[Any]) -> Any:
+    """Build the WHERE clause that skips everything up to the cursor row."""
+    if all(k.descending for k in keys) or not any(k.descending for k in keys):
+        # Uniform direction: a single row-value comparison the index can seek on
+        columns = tuple_(*(k.column for k in keys))
+        bound = tuple_(*values)
+        return columns < bound if keys[0].descending else columns > bound
+
+    clauses = []
+    for i, key in enumerate(keys):
+        equal_prefix = [keys[j].column == values[j] for j in range(i)]
+        after = key.column < values[i] if key.descending else key.column > values[i]
+        clauses.append(and_(*equal_prefix, after))
+    return or_(*clauses)
+
+
+def keyset_paginate(
+    query: Any,
+    keys: Sequence[SortKey],
+    cursor: str | None,
+    per_page: int,
+    scope: str,
+    with_total: bool = False,
+) -> KeysetPage:
+    """
+    Fetch one page of ``query`` after ``cursor`` in ``keys`` order.
+
+    Args:
+        query: Unordered SQLAlchemy query
+        keys: Sort keys, ending with a unique tie-breaker such as the id
+        cursor: Cursor from the previous page, empty/None for the first page
+        per_page: Page size
+        scope: Sort name embedded in issued cursors
+        with_total: Also run an exact ``COUNT(*)`` over the filtered query
+
+    Returns:
+        KeysetPage with up to ``per_page`` items
+
+    Raises:
+        InvalidCursorError: If ``cursor`` cannot be used for this sort
+    """
+    total = query.order_by(None).count() if with_total else None
+
+    if cursor:
+        values = decode_cursor(cursor, scope, len(keys))
+        query = query.filter(_seek_predicate(keys, values))
+
+    rows = query.order_by(*(k.order_by() for k in keys)).limit(per_page + 1).all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = encode_cursor(scope, [getattr(last, k.attr) for k in keys])
+
+    return KeysetPage(rows, per_page, cursor, next_cursor, total)
@@ -104,15 +104,22 @@ class RAGService:
         })
 
         mark_scores = [(row.id, row.similarity) for row in result]
-
-        # Fetch full mark objects
-        marks_with_scores = []
-        for mark_id, score in mark_scores:
-            mark = Mark.query.get(mark_id)
-            if mark:
-                marks_with_scores.append((mark, score))
-
-        return marks_with_scores
+        if not mark_scores:
+            return []
+
+        # Fetch mark objects (with content for context building) in one query
+        marks_by_id = {
+            mark.id: mark
+            for mark in Mark.query
+            .options(*Mark.content_options())
+            .filter(Mark.id.in_([mark_id for mark_id, _ in mark_scores]))
+        }
+
+        return [
+            (marks_by_id[mark_id], score)
+            for mark_id, score in mark_scores
+            if mark_id in marks_by_id
+        ]
 
     def build_context(
         self,
@@ -0,0 +1,479 @@
+"""
+Pluggable full-text search backends.
+
+PostgreSQL deployments search the stored, GIN-indexed ``search_vector`` and
+the pg_trgm index. SQLite deployments keep an FTS5 virtual table,
+``marks_fts``, in sync with ``marks`` through triggers and rank with BM25.
+The backend is chosen from the ``SQLALCHEMY_DATABASE_URI`` dialect.
+"""
+from __future__ import annotations
+
+import re
+from abc import ABC, abstractmethod
+from typing import Any
+
+from flask import current_app
+from sqlalchemy import func, literal_column, table, column, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.schema import CreateColumn
+
+from flaskmarks.core.extensions import db
+
+# Control characters delimit highlighted matches so snippets can be
+# HTML-escaped before the highlight markup is added back
+HEADLINE_START_SEL = '\x02'
+HEADLINE_STOP_SEL = '\x03'
+
+_FTS_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+DEFAULT_HYBRID_CANDIDATES = 100
+DEFAULT_RRF_K = 60
+
+
+class SearchBackend(ABC):
+    """Interface for the database-specific parts of mark search."""
+
+    name = 'base'
+    # Whether hybrid() can fuse in a vector ranking
+    supports_vectors = False
+
+    def install(self, connection: Any) -> None:
+        """Create backend-specific structures after ``marks`` is created."""
+
+    @abstractmethod
+    def fulltext(self, query: Any, string: str) -> Any:
+        """Filter ``query`` to matching marks, best match first."""
+
+    @abstractmethod
+    def substring(self, query: Any, string: str) -> Any:
+        """Filter ``query`` to marks containing ``string`` (unordered)."""
+
+    @abstractmethod
+    def fuzzy(self, query: Any, string: str) -> Any:
+        """Filter ``query`` to marks approximately matching, closest first."""
+
+    @abstractmethod
+    def headlines(self, ids: list[int], string: str) -> dict[int, str]:
+        """Return highlighted snippets for the given mark IDs."""
+
+    @abstractmethod
+    def hybrid(
+        self,
+        owner_id: int,
+        string: str,
+        embedding: list[float] | None,
+        page: int,
+        per_page: int,
+        marktype: str | None = None,
+        candidates: int = DEFAULT_HYBRID_CANDIDATES,
+        rrf_k: int = DEFAULT_RRF_K,
+    ) -> tuple[list[tuple[int, float]], int]:
+        """Fuse lexical and vector rankings; see PostgresSearchBackend."""
+
+
+class PostgresSearchBackend(SearchBackend):
+    """tsvector/ts_rank_cd full-text search and pg_trgm substring search."""
+
+    name = 'postgresql'
+    supports_vectors = True
+
+    @staticmethod
+    def tsquery(string: str) -> Any:
+        """Parse web-search style input (quotes, OR, -word) into a tsquery."""
+        return func.websearch_to_tsquery('english', string)
+
+    def fulltext(self, query: Any, string: str) -> Any:
+        from flaskmarks.models.mark import Mark
+
+        tsquery = self.tsquery(string)
+        rank = func.ts_rank_cd(Mark.search_vector, tsquery)
+        return (
+            query.filter(Mark.search_vector.bool_op('@@')(tsquery))
+            .order_by(rank.desc(), Mark.id.desc())
+        )
+
+    def substring(self, query: Any, string: str) -> Any:
+        from sqlalchemy import or_
+        from flaskmarks.models.mark import Mark
+
+        escaped = string.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return query.filter(
+            or_(
+                Mark.search_text().ilike(f'%{escaped}%', escape='\\'),
+                Mark.search_vector.bool_op('@@')(self.tsquery(string)),
+            )
+        )
+
+    def fuzzy(self, query: Any, string: str) -> Any:
+        from flaskmarks.models.mark import Mark
+
+        search_text = Mark.search_text()
+        return (
+            query.filter(search_text.op('%>')(string))
+            .order_by(func.word_similarity(string, search_text).desc(), Mark.id.desc())
+        )
+
+    def headlines(self, ids: list[int], string: str) -> dict[int, str]:
+        from flaskmarks.models.mark import Mark
+
+        if not ids:
+            return {}
+
+        body = func.regexp_replace(
+            func.coalesce(Mark.full_html, Mark.description, ''), '<[^>]*>', ' ', 'g'
+        )
+        options = (
+            f'StartSel="{HEADLINE_START_SEL}", StopSel="{HEADLINE_STOP_SEL}", '
+            'MaxWords=35, MinWords=15, MaxFragments=2, FragmentDelimiter=" … "'
+        )
+        rows = db.session.execute(
+            db.select(
+                Mark.id,
+                func.ts_headline('english', body, self.tsquery(string), options),
+            ).where(Mark.id.in_(ids))
+        )
+        return {mark_id: headline for mark_id, headline in rows}
+
+    def hybrid(
+        self,
+        owner_id: int,
+        string: str,
+        embedding: list[float] | None,
+        page: int,
+        per_page: int,
+        marktype: str | None = None,
+        candidates: int = DEFAULT_HYBRID_CANDIDATES,
+        rrf_k: int = DEFAULT_RRF_K,
+    ) -> tuple[list[tuple[int, float]], int]:
+        """
+        Rank marks by reciprocal rank fusion of full-text and vector search.
+
+        Both candidate lists are capped at ``candidates`` rows and read from
+        their own index (GIN ``search_vector`` and HNSW ``embedding``); the
+        fusion, ``sum(1 / (rrf_k + rank))`` per mark, and the page slice run
+        in the same statement.
+
+        Args:
+            owner_id: ID of the user whose marks are searched
+            string: Web-search style input
+            embedding: Query embedding, or None for lexical ranking only
+            page: Page number
+            per_page: Page size
+            marktype: Optional mark type to restrict to
+            candidates: Per-retriever candidate limit
+            rrf_k: RRF damping constant
+
+        Returns:
+            Tuple of ([(mark_id, fused_score), ...] for the page, total
+            number of fused candidates)
+        """
+        type_filter = 'AND type = :marktype' if marktype else ''
+        ctes = [f"""
+            lexical AS (
+                SELECT id, row_number() OVER (
+                    ORDER BY ts_rank_cd(search_vector, query) DESC, id DESC
+                ) AS rnk
+                FROM marks, websearch_to_tsquery('english', :string) AS query
+                WHERE owner_id = :owner_id {type_filter}
+                  AND search_vector @@ query
+                ORDER BY ts_rank_cd(search_vector, query) DESC, id DESC
+                LIMIT :candidates
+            )"""]
+        branches = ['SELECT id, rnk FROM lexical']
+        if embedding is not None:
+            ctes.append(f"""
+            semantic AS (
+                SELECT id, row_number() OVER (
+                    ORDER BY embedding <=> CAST(:embedding AS vector)
+                ) AS rnk
+                FROM marks
+                WHERE owner_id = :owner_id {type_filter}
+                  AND embedding IS NOT NULL
+                ORDER BY embedding <=> CAST(:embedding AS vector)
+                LIMIT :candidates
+            )""")
+            branches.append('SELECT id, rnk FROM semantic')
+
+        sql = text(f"""
+            WITH {','.join(ctes)},
+            fused AS (
+                SELECT id, sum(1.0 / (:rrf_k + rnk)) AS score
+                FROM ({' UNION ALL '.join(branches)}) AS candidates
+                GROUP BY id
+            )
+            SELECT id, score, count(*) OVER () AS total
+            FROM fused
+            ORDER BY score DESC, id DESC
+            LIMIT :limit OFFSET :offset
+        """)
+        params = {
+            'owner_id': owner_id,
+            'string': string,
+            'candidates': candidates,
+            'rrf_k': rrf_k,
+            'limit': per_page,
+            'offset': (page - 1) * per_page,
+        }
+        if marktype:
+            params['marktype'] = marktype
+        if embedding is not None:
+            params['embedding'] = str(embedding)
+
+        rows = db.session.execute(sql, params).all()
+        if not rows:
+            return [], 0
+        return [(row.id, float(row.score)) for row in rows], rows[0].total
+
+
+marks_fts = table(
+    'marks_fts',
+    column('rowid'),
+    column('title'),
+    column('description'),
+    column('full_html'),
+    column('url'),
+)
+
+_SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS marks_fts USING fts5("
+    "title, description, full_html, url, "
+    "content='marks', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS marks_fts_ai AFTER INSERT ON marks BEGIN "
+    "INSERT INTO marks_fts(rowid, title, description, full_html, url) "
+    "VALUES (new.id, new.title, new.description, new.full_html, new.url); END",
+    "CREATE TRIGGER IF NOT EXISTS marks_fts_ad AFTER DELETE ON marks BEGIN "
+    "INSERT INTO marks_fts(marks_fts, rowid, title, description, full_html, url) "
+    "VALUES ('delete', old.id, old.title, old.description, old.full_html, old.url); END",
+    "CREATE TRIGGER IF NOT EXISTS marks_fts_au "
+    "AFTER UPDATE OF title, description, full_html, url ON marks BEGIN "
+    "INSERT INTO marks_fts(marks_fts, rowid, title, description, full_html, url) "
+    "VALUES ('delete', old.id, old.title, old.description, old.full_html, old.url); "
+    "INSERT INTO marks_fts(rowid, title, description, full_html, url) "
+    "VALUES (new.id, new.title, new.description, new.full_html, new.url); END",
+)
+
+
+class SqliteFtsSearchBackend(SearchBackend):
+    """FTS5 search with BM25 ranking for SQLite deployments."""
+
+    name = 'sqlite'
+
+    # bm25() column weights: title, description, full_html, url
+    weights = (10.0, 4.0, 1.0, 2.0)
+
+    def install(self, connection: Any) -> None:
+        for statement in _SQLITE_FTS_DDL:
+            connection.exec_driver_sql(statement)
+
+    @staticmethod
+    def rebuild(connection: Any) -> None:
+        """Re-index every mark from the ``marks`` table."""
+        connection.exec_driver_sql("INSERT INTO marks_fts(marks_fts) VALUES ('rebuild')")
+
+    @staticmethod
+    def match_expression(string: str, prefix: bool = False) -> str | None:
+        """
+        Translate user input into a safe FTS5 query.
+
+        Every word is quoted, so FTS5 operators and punctuation in the input
+        cannot cause syntax errors. A literal ``OR`` between words is kept;
+        ``-word`` excludes a word.
+
+        Args:
+            string: Search input
+            prefix: Match words as prefixes (``"pyth"*``)
+
+        Returns:
+            FTS5 query string, or None if the input has no searchable words
+        """
+        include: list[str] = []
+        exclude: list[str] = []
+        pending_or = False
+        for raw in string.split():
+            if raw == 'OR' and include:
+                pending_or = True
+                continue
+            negate = raw.startswith('-')
+            words = _FTS_TOKEN.findall(raw)
+            if not words:
+                continue
+            phrase = '"' + ' '.join(words) + '"' + ('*' if prefix else '')
+            if negate:
+                exclude.append(phrase)
+            elif pending_or:
+                include[-1] = f'{include[-1]} OR {phrase}'
+            else:
+                include.append(phrase)
+            pending_or = False
+
+        if not include:
+            return None
+        expression = ' AND '.join(f'({term})' for term in include)
+        for term in exclude:
+            expression = f'{expression} NOT {term}'
+        return expression
+
+    def _match(self, query: Any, string: str, prefix: bool) -> Any:
+        from flaskmarks.models.mark import Mark
+
+        expression = self.match_expression(string, prefix=prefix)
+        if expression is None:
+            return query.filter(db.false())
+        return (
+            query.join(marks_fts, marks_fts.c.rowid == Mark.id)
+            .filter(literal_column('marks_fts').op('MATCH')(expression))
+        )
+
+    def _bm25(self) -> Any:
+        return func.bm25(literal_column('marks_fts'), *self.weights)
+
+    def fulltext(self, query: Any, string: str) -> Any:
+        from flaskmarks.models.mark import Mark
+
+        # bm25() is lower for better matches
+        return self._match(query, string, prefix=False).order_by(
+            self._bm25().asc(), Mark.id.desc()
+        )
+
+    def substring(self, query: Any, string: str) -> Any:
+        return self._match(query, string, prefix=True)
+
+    def fuzzy(self, query: Any, string: str) -> Any:
+        from flaskmarks.models.mark import Mark
+
+        # FTS5 has no edit-distance matching; prefixes are the closest fit
+        return self._match(query, string, prefix=True).order_by(
+            self._bm25().asc(), Mark.id.desc()
+        )
+
+    def headlines(self, ids: list[int], string: str) -> dict[int, str]:
+        expression = self.match_expression(string)
+        if not ids or expression is None:
+            return {}
+
+        rows = db.session.execute(
+            db.select(
+                marks_fts.c.rowid,
+                func.snippet(
+                    literal_column('marks_fts'), -1,
+                    HEADLINE_START_SEL, HEADLINE_STOP_SEL, ' … ', 32,
+                ),
+            )
+            .where(literal_column('marks_fts').op('MATCH')(expression))
+            .where(marks_fts.c.rowid.in_(ids))
+        )
+        return {mark_id: headline for mark_id, headline in rows}
+
+    def hybrid(
+        self,
+        owner_id: int,
+        string: str,
+        embedding: list[float] | None,
+        page: int,
+        per_page: int,
+        marktype: str | None = None,
+        candidates: int = DEFAULT_HYBRID_CANDIDATES,
+        rrf_k: int = DEFAULT_RRF_K,
+    ) -> tuple[list[tuple[int, float]], int]:
+        """
+        Rank marks by reciprocal rank fusion of the FTS5 ranking alone.
+
+        SQLite has no vector index, so ``embedding`` is ignored and the
+        fusion runs over the BM25 candidate list only. Scores stay on the
+        ``1 / (rrf_k + rank)`` scale of the PostgreSQL backend.
+
+        Returns:
+            Tuple of ([(mark_id, fused_score), ...] for the page, total
+            number of fused candidates)
+        """
+        expression = self.match_expression(string)
+        if expression is None:
+            return [], 0
+
+        type_filter = 'AND marks.type = :marktype' if marktype else ''
+        weights = ', '.join(str(weight) for weight in self.weights)
+        sql = text(f"""
+            WITH lexical AS (
+                SELECT id, row_number() OVER (ORDER BY score, id DESC) AS rnk
+                FROM (
+                    SELECT marks.id AS id, bm25(marks_fts, {weights}) AS score
+                    FROM marks_fts JOIN marks ON marks.id = marks_fts.rowid
+                    WHERE marks_fts MATCH :expression
+                      AND marks.owner_id = :owner_id {type_filter}
+                    ORDER BY score, marks.id DESC
+                    LIMIT :candidates
+                )
+            ),
+            fused AS (
+                SELECT id, sum(1.0 / (:rrf_k + rnk)) AS score
+                FROM lexical
+                GROUP BY id
+            )
+            SELECT id, score, count(*) OVER () AS total
+            FROM fused
+            ORDER BY score DESC, id DESC
+            LIMIT :limit OFFSET :offset
+        """)
+        params = {
+            'owner_id': owner_id,
+            'expression': expression,
+            'candidates': candidates,
+            'rrf_k': rrf_k,
+            'limit': per_page,
+            'offset': (page - 1) * per_page,
+        }
+        if marktype:
+            params['marktype'] = marktype
+
+        rows = db.session.execute(sql, params).all()
+        if not rows:
+            return [], 0
+        return [(row.id, float(row.score)) for row in rows], rows[0].total
+
+_BACKENDS: dict[str, SearchBackend] = {
+    'postgresql': PostgresSearchBackend(),
+    'sqlite': SqliteFtsSearchBackend(),
+}
+
+
+def search_backend_for(dialect_name: str) -> SearchBackend:
+    """
+    Get the search backend for a SQLAlchemy dialect name.
+
+    Args:
+        dialect_name: e.g. 'postgresql' or 'sqlite'
+
+    Returns:
+        The matching backend; PostgreSQL for anything else
+    """
+    return _BACKENDS.get(dialect_name, _BACKENDS['postgresql'])
+
+
+def get_search_backend() -> SearchBackend:
+    """
+    Get the search backend for the current app's database URI.
+
+    Returns:
+        SearchBackend instance
+    """
+    uri = current_app.config['SQLALCHEMY_DATABASE_URI']
+    return search_backend_for(make_url(uri).get_backend_name())
+
+
+# SQLite has no tsvector: keep search_vector as a plain, always-NULL TEXT
+# column so ORM statements stay valid, without the generated expression.
+
+@compiles(TSVECTOR, 'sqlite')
+def _compile_tsvector_sqlite(type_: Any, compiler: Any, **kw: Any) -> str:
+    return 'TEXT'
+
+
+@compiles(CreateColumn, 'sqlite')
+def _compile_tsvector_column_sqlite(element: Any, compiler: Any, **kw: Any) -> str:
+    column = element.element
+    if isinstance(column.type, TSVECTOR):
+        return f'{compiler.preparer.format_column(column)} TEXT'
+    return compiler.visit_create_column(element, **kw)
@@ -0,0 +1,231 @@
+"""
+Single-flight coalescing of concurrent metadata fetches.
+
+When several users quick-add the same trending article, or two imports
+containing the same links run at once, every caller used to download and
+parse the page on its own. ``metadata_flights`` lets the first caller
+for a normalised URL do the work while later callers wait for its result
+(threads with ``do``, event loops with ``do_async``).
+
+Across worker processes the leader also holds ``advisory_lock`` on the
+URL: a PostgreSQL session advisory lock, so a worker fetching the same
+URL waits and then finds the result just stored in ``fetch_cache``. The
+wait is bounded by ``SINGLE_FLIGHT_LOCK_TIMEOUT``, and the lock is held
+on a small connection pool of its own rather than the application's.
+Failed fetches are not cached, so their waiters fetch again. Other
+databases, or a disabled ``fetch_cache``, leave nothing to share between
+processes: there calls are only coalesced within a worker.
+"""
+from __future__ import annotations
+
+import asyncio
+import copy
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Iterator, TypeVar
+from weakref import WeakKeyDictionary
+
+from flask import current_app, has_app_context
+from sqlalchemy import Connection, Engine, create_engine, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from flaskmarks.core.extensions import db
+from flaskmarks.core.fetch_cache import fetch_cache
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+DEFAULT_LOCK_TIMEOUT = 15.0
+LOCK_POLL_INTERVAL = 0.1
+# Connections per process that may hold a lock; more leaders go unlocked
+LOCK_POOL_SIZE = 10
+
+_lock_engines: WeakKeyDictionary[Engine, Engine] = WeakKeyDictionary()
+_lock_engines_guard = threading.Lock()
+
+
+class _Call:
+    """One in-flight call and the callers waiting for it."""
+
+    def __init__(self) -> None:
+        self.future: Future = Future()
+        self.waiting = 0
+
+
+class SingleFlight:
+    """
+    Run a function once per key for all concurrent callers.
+
+    The first caller of a key becomes the leader and runs the function;
+    callers arriving before it finishes get a deep copy of its result, or
+    its exception. The key is forgotten as soon as the leader finishes,
+    so nothing is cached beyond the call itself.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[str, _Call] = {}
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        """
+        Call ``fn`` unless a call for ``key`` is already in flight.
+
+        Args:
+            key: Identity of the work, e.g. a normalised URL
+            fn: The work; only the leader runs it
+
+        Returns:
+            The leader's result
+        """
+        call, leader = self._join(key)
+        if not leader:
+            return copy.deepcopy(call.future.result())
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, call, error=e)
+            raise
+        self._finish(key, call, result=result)
+        return result
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Await ``fn()`` unless a call for ``key`` is already in flight.
+
+        Followers wait without holding a thread, and may run on another
+        event loop than the leader.
+        """
+        call, leader = self._join(key)
+        if not leader:
+            return copy.deepcopy(await asyncio.wrap_future(call.future))
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._finish(key, call, error=e)
+            raise
+        self._finish(key, call, result=result)
+        return result
+
+    def waiting(self, key: str) -> int:
+        """Number of callers waiting on the in-flight call for ``key``."""
+        with self._lock:
+            call = self._calls.get(key)
+            return call.waiting if call is not None else 0
+
+    def _join(self, key: str) -> tuple[_Call, bool]:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiting += 1
+                return call, False
+            call = self._calls[key] = _Call()
+            return call, True
+
+    def _finish(
+        self,
+        key: str,
+        call: _Call,
+        result: Any = None,
+        error: BaseException | None = None,
+    ) -> None:
+        with self._lock:
+            self._calls.pop(key, None)
+        if call.waiting:
+            logger.debug(f'{call.waiting} callers shared the fetch of {key}')
+        if error is not None:
+            call.future.set_exception(error)
+        else:
+            call.future.set_result(result)
+
+
+def _lock_id(key: str) -> int:
+    """Signed 64-bit advisory lock id of a key."""
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+def _lock_engine(engine: Engine) -> Engine:
+    """Engine with a pool of its own for advisory locks on ``engine``'s database."""
+    with _lock_engines_guard:
+        lock_engine = _lock_engines.get(engine)
+        if lock_engine is None:
+            lock_engine = _lock_engines[engine] = create_engine(
+                engine.url,
+                pool_size=LOCK_POOL_SIZE,
+                max_overflow=0,
+                pool_timeout=0,
+            )
+        return lock_engine
+
+
+@contextmanager
+def advisory_lock(key: str) -> Iterator[None]:
+    """
+    Hold a cross-process lock on ``key`` where it lets workers share a result.
+
+    Polls a PostgreSQL session advisory lock for up to
+    ``SINGLE_FLIGHT_LOCK_TIMEOUT`` seconds on a connection from a pool of
+    its own, so the caller's session, transaction and the application's
+    pool are untouched; waiters hold no connection between attempts. If
+    the wait times out or the lock pool is exhausted, the caller goes on
+    without the lock. Without an application context, on other databases,
+    or with ``fetch_cache`` disabled, this does nothing.
+    """
+    if not (has_app_context() and fetch_cache.enabled) or db.engine.dialect.name != 'postgresql':
+        yield
+        return
+
+    lock_id = _lock_id(key)
+    timeout = float(current_app.config.get('SINGLE_FLIGHT_LOCK_TIMEOUT', DEFAULT_LOCK_TIMEOUT))
+    connection = _acquire(_lock_engine(db.engine), lock_id, time.monotonic() + timeout)
+    if connection is None:
+        logger.info(f'Fetching {key} without the advisory lock')
+        yield
+        return
+
+    try:
+        yield
+    finally:
+        try:
+            connection.execute(text('SELECT pg_advisory_unlock(:id)'), {'id': lock_id})
+            connection.commit()
+        except SQLAlchemyError as e:
+            # Closing the session releases the lock anyway
+            logger.warning(f'Advisory unlock of {key} failed: {e}')
+            connection.invalidate()
+        finally:
+            connection.close()
+
+
+def _acquire(engine: Engine, lock_id: int, deadline: float) -> Connection | None:
+    """Connection holding advisory lock ``lock_id``, or None by ``deadline``."""
+    while True:
+        try:
+            connection = engine.connect()
+        except SQLAlchemyError as e:
+            # Pool exhausted or database unreachable: not worth waiting for
+            logger.debug(f'No connection for advisory lock {lock_id}: {e}')
+            return None
+        try:
+            locked = connection.execute(
+                text('SELECT pg_try_advisory_lock(:id)'), {'id': lock_id}
+            ).scalar()
+            connection.commit()
+        except SQLAlchemyError as e:
+            logger.warning(f'Advisory lock {lock_id} failed: {e}')
+            connection.close()
+            return None
+        if locked:
+            return connection
+        connection.close()
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(LOCK_POLL_INTERVAL)
+
+
+metadata_flights = SingleFlight()
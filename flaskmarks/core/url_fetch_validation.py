@@ -7,6 +7,8 @@ import ipaddress
 import socket
 from urllib.parse import urlparse
 
+from flaskmarks.core.dns_cache import dns_cache
+
 IPAddress = ipaddress.IPv4Address | ipaddress.IPv6Address
 
 
@@ -33,36 +35,26 @@ def _ip_rejection_reason(ip: IPAddress) -> str | None:
     return None
 
 
-def ensure_public_http_url(url: str) -> None:
+def resolve_public_address(hostname: str) -> str:
     """
-    Validate that URL uses http/https and resolves only to public addresses.
+    Resolve a hostname through the DNS cache and pick an address to use.
+
+    Every address the name resolves to must be public. HTTP clients
+    connect to the returned address instead of resolving the name again,
+    so the address that was checked is the one that is dialled.
 
     Args:
-        url: Candidate URL.
+        hostname: Host name or IP literal
+
+    Returns:
+        IP address as text
 
     Raises:
-        URLTargetValidationError: If URL is malformed, uses disallowed scheme,
-            cannot be resolved, or resolves to any non-public address.
+        URLTargetValidationError: If the name cannot be resolved or any of
+            its addresses is not public.
     """
     try:
-        parsed = urlparse(url)
-    except Exception as exc:  # pragma: no cover - extremely defensive
-        raise URLTargetValidationError("URL parsing failed.") from exc
-
-    if parsed.scheme not in {"http", "https"}:
-        raise URLTargetValidationError(
-            "Only http and https URL schemes are allowed."
-        )
-
-    if not parsed.netloc:
-        raise URLTargetValidationError("URL must include a hostname.")
-
-    hostname = parsed.hostname
-    if not hostname:
-        raise URLTargetValidationError("URL must include a valid hostname.")
-
-    try:
-        addrinfos = socket.getaddrinfo(hostname, parsed.port, proto=socket.IPPROTO_TCP)
+        addrinfos = dns_cache.getaddrinfo(hostname)
     except socket.gaierror as exc:
         raise URLTargetValidationError(
             "URL hostname could not be resolved."
@@ -84,3 +76,38 @@ def ensure_public_http_url(url: str) -> None:
         raise URLTargetValidationError(
             f"URL resolves to a blocked non-public target: {blocked}."
         )
+    return addrinfos[0][4][0]
+
+
+def ensure_public_http_url(url: str) -> str:
+    """
+    Validate that URL uses http/https and resolves only to public addresses.
+
+    Args:
+        url: Candidate URL.
+
+    Returns:
+        The validated address the URL's host resolves to.
+
+    Raises:
+        URLTargetValidationError: If URL is malformed, uses disallowed scheme,
+            cannot be resolved, or resolves to any non-public address.
+    """
+    try:
+        parsed = urlparse(url)
+    except Exception as exc:  # pragma: no cover - extremely defensive
+        raise URLTargetValidationError("URL parsing failed.") from exc
+
+    if parsed.scheme not in {"http", "https"}:
+        raise URLTargetValidationError(
+            "Only http and https URL schemes are allowed."
+        )
+
+    if not parsed.netloc:
+        raise URLTargetValidationError("URL must include a hostname.")
+
+    hostname = parsed.hostname
+    if not hostname:
+        raise URLTargetValidationError("URL must include a valid hostname.")
+
+    return resolve_public_address(hostname)
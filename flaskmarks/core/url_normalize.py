@@ -0,0 +1,46 @@
+"""
+URL normalisation used to recognise the same page written differently.
+"""
+from __future__ import annotations
+
+from urllib.parse import urlsplit, urlunsplit
+
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def normalize_url(url: str) -> str | None:
+    """
+    Return the canonical form of an http(s) URL.
+
+    Surrounding whitespace and the fragment are dropped, the scheme and
+    host are lower-cased, a default port is removed and an empty path
+    becomes ``/``. Path and query are kept as-is because servers may treat
+    them case-sensitively.
+
+    Args:
+        url: URL as written in a bookmark file or form
+
+    Returns:
+        Normalised URL, or None if it is not an absolute http(s) URL
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except (AttributeError, ValueError):
+        return None
+
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if scheme not in _DEFAULT_PORTS or not host:
+        return None
+
+    if ':' in host:
+        host = f'[{host}]'
+    netloc = host if port in (None, _DEFAULT_PORTS[scheme]) else f'{host}:{port}'
+    if parts.username or parts.password:
+        userinfo = parts.username or ''
+        if parts.password:
+            userinfo += f':{parts.password}'
+        netloc = f'{userinfo}@{netloc}'
+
+    return urlunsplit((scheme, netloc, parts.path or '/', parts.query, ''))
@@ -6,9 +6,10 @@ from __future__ import annotations
 import re
 from typing import Any, TypedDict
 
-import requests
 import yt_dlp
 
+from flaskmarks.core.http_client import outbound_http
+
 
 class YouTubeInfo(TypedDict):
     """Type definition for YouTube video information."""
@@ -36,7 +37,8 @@ def download_subtitles(subtitles_url: str | None) -> str:
     if not subtitles_url:
         return ''
 
-    response = requests.get(subtitles_url, stream=True)
+    # Pooled client: subtitle files of one host reuse a connection
+    response = outbound_http.client.get(subtitles_url)
 
     # Remove timestamps and formatting
     pattern = (
@@ -1,7 +1,6 @@
 # flaskmarks/forms/mark.py
 
 from .base import Form, strip_filter
-from ..core.setup import db
 from ..models.tag import Tag
 #import flask_whooshalchemy
 
@@ -34,19 +33,8 @@ class TagListField(StringField):
 
     def process_formdata(self, valuelist):
         if valuelist:
-            tags = []
-            tag_keys = {}
             form_tags = valuelist[0].strip().replace(',', ' ').split(' ')
-            for t in form_tags:
-                if t:
-                    tag_keys[t] = 1
-            for t in tag_keys.keys():
-                tag = Tag.check(t.lower())
-                if not tag:
-                    tag = Tag(t.lower())
-                    db.session.add(tag)
-                tags.append(tag)
-            self.data = tags
+            self.data = Tag.resolve(form_tags)
         else:
             self.data = []
 
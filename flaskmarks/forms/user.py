@@ -54,7 +54,8 @@ class UserProfileForm(UserRegisterForm):
 
 
 class MarksImportForm(Form):
-    file = FileField('Import file (Json)', validators=[
+    # Chromium's extension-less "Bookmarks" file is uploaded as Bookmarks.json
+    file = FileField('Import file (txt, html or json)', validators=[
                      FileRequired(),
                      FileAllowed(['json', 'txt', 'html', 'csv'], 'Only json, txt, html, csv files')])
     submit_button = SubmitField('Upload')
@@ -3,7 +3,9 @@ Models package for Flaskmarks application.
 """
 from .user import User
 from .mark import Mark
+from .mark_stats import MarkStats
 from .tag import Tag
 from .import_job_status import ImportJobStatus
+from .import_job_item import ImportJobItem
 
-__all__ = ["User", "Mark", "Tag", "ImportJobStatus"]
+__all__ = ["User", "Mark", "MarkStats", "Tag", "ImportJobStatus", "ImportJobItem"]
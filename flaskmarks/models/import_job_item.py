@@ -0,0 +1,189 @@
+"""
+Checkpointed per-URL state of an import job.
+"""
+from __future__ import annotations
+
+from datetime import datetime as dt
+from typing import Iterable
+
+from sqlalchemy import func, insert, select, update
+
+from flaskmarks.core.bookmark_import import BookmarkRecord
+from flaskmarks.core.extensions import db
+
+
+class ImportJobItem(db.Model):
+    """
+    One URL of an import job and how far it got.
+
+    Items are staged as ``pending`` once they pass the pre-filter, claimed
+    as ``fetching`` in small batches, and end up ``done`` (in the same
+    transaction that inserts the mark) or ``failed`` with the class of the
+    error. A job that was interrupted resumes from its ``pending`` and
+    ``fetching`` items, so finished work is never repeated.
+    """
+    __tablename__ = 'import_job_items'
+
+    PENDING = 'pending'
+    FETCHING = 'fetching'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    id = db.Column(db.Integer, primary_key=True)
+    import_job_id = db.Column(
+        db.Integer,
+        db.ForeignKey('import_job_statuses.id', ondelete='CASCADE'),
+        nullable=False,
+    )
+    url = db.Column(db.UnicodeText, nullable=False)
+    title = db.Column(db.UnicodeText, nullable=True)
+    add_date = db.Column(db.DateTime, nullable=True)
+    folder_path = db.Column(db.JSON, nullable=True)
+    tags = db.Column(db.JSON, nullable=True)
+    state = db.Column(db.Unicode(16), nullable=False, default=PENDING)
+    error_class = db.Column(db.Unicode(64), nullable=True)
+    error = db.Column(db.UnicodeText, nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    updated = db.Column(db.DateTime, nullable=False, default=dt.utcnow, onupdate=dt.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_import_job_items_job_state', import_job_id, state, id),
+    )
+
+    def to_record(self) -> BookmarkRecord:
+        """Rebuild the bookmark record the item was staged from."""
+        return BookmarkRecord(
+            url=self.url,
+            title=self.title or '',
+            add_date=self.add_date,
+            folder_path=tuple(self.folder_path or ()),
+            tags=list(self.tags or ()),
+        )
+
+    @classmethod
+    def stage(cls, import_job_id: int, records: Iterable[BookmarkRecord]) -> int:
+        """
+        Insert records as pending items with one multi-row INSERT.
+
+        Args:
+            import_job_id: Primary key of the ``ImportJobStatus``
+            records: Pre-filtered records, in import order
+
+        Returns:
+            Number of items staged
+        """
+        rows = [
+            {
+                'import_job_id': import_job_id,
+                'url': record.url,
+                'title': record.title or None,
+                'add_date': record.add_date,
+                'folder_path': list(record.folder_path),
+                'tags': record.tags,
+                'state': cls.PENDING,
+                'attempts': 0,
+                'updated': dt.utcnow(),
+            }
+            for record in records
+        ]
+        if rows:
+            db.session.execute(insert(cls.__table__), rows)
+            db.session.commit()
+        return len(rows)
+
+    @classmethod
+    def claim(cls, import_job_id: int, limit: int) -> list[tuple[int, BookmarkRecord]]:
+        """
+        Move the next ``limit`` pending items to ``fetching``.
+
+        Args:
+            import_job_id: Primary key of the ``ImportJobStatus``
+            limit: Maximum number of items to claim
+
+        Returns:
+            (item id, record) pairs in staging order; empty when none are left
+        """
+        items = cls.query.filter_by(
+            import_job_id=import_job_id,
+            state=cls.PENDING,
+        ).order_by(cls.id).limit(limit).all()
+        if not items:
+            return []
+
+        db.session.execute(
+            update(cls)
+            .where(cls.id.in_([item.id for item in items]))
+            .values(state=cls.FETCHING, attempts=cls.attempts + 1, updated=dt.utcnow())
+        )
+        claimed = [(item.id, item.to_record()) for item in items]
+        db.session.commit()
+        return claimed
+
+    @classmethod
+    def requeue_interrupted(cls, import_job_id: int) -> int:
+        """Return items a dead runner left in ``fetching`` to ``pending``."""
+        result = db.session.execute(
+            update(cls)
+            .where(cls.import_job_id == import_job_id, cls.state == cls.FETCHING)
+            .values(state=cls.PENDING, updated=dt.utcnow())
+        )
+        db.session.commit()
+        return result.rowcount
+
+    @classmethod
+    def mark_done(cls, item_ids: list[int]) -> None:
+        """Flag items as imported; runs in the caller's mark transaction."""
+        if item_ids:
+            db.session.execute(
+                update(cls)
+                .where(cls.id.in_(item_ids))
+                .values(state=cls.DONE, error_class=None, error=None, updated=dt.utcnow())
+            )
+
+    @classmethod
+    def mark_failed(cls, item_id: int, error_class: str, error: str = '') -> None:
+        """Flag one item as failed and commit."""
+        db.session.execute(
+            update(cls)
+            .where(cls.id == item_id)
+            .values(
+                state=cls.FAILED,
+                error_class=error_class[:64],
+                error=error[:1000] or None,
+                updated=dt.utcnow(),
+            )
+        )
+        db.session.commit()
+
+    @classmethod
+    def retry_failed(cls, import_job_id: int, error_class: str | None = None) -> int:
+        """
+        Queue failed items again; the caller commits.
+
+        Args:
+            import_job_id: Primary key of the ``ImportJobStatus``
+            error_class: Only retry items that failed with this class
+
+        Returns:
+            Number of items moved back to ``pending``
+        """
+        stmt = update(cls).where(
+            cls.import_job_id == import_job_id,
+            cls.state == cls.FAILED,
+        )
+        if error_class:
+            stmt = stmt.where(cls.error_class == error_class)
+        result = db.session.execute(stmt.values(state=cls.PENDING, updated=dt.utcnow()))
+        return result.rowcount
+
+    @classmethod
+    def state_counts(cls, import_job_id: int) -> dict[str, int]:
+        """Number of items per state for one job."""
+        return dict(db.session.execute(
+            select(cls.state, func.count())
+            .where(cls.import_job_id == import_job_id)
+            .group_by(cls.state)
+        ).all())
+
+    def __repr__(self) -> str:
+        return f'<ImportJobItem {self.id} {self.state} {self.url!r}>'
@@ -18,6 +18,8 @@ class ImportJobStatus(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     job_id = db.Column(db.Unicode(64), nullable=False)
     status = db.Column(db.Integer, nullable=False, default=0)
+    # URLs counted in ``status`` that did not become marks
+    failed = db.Column(db.Integer, nullable=False, default=0)
     total_lines = db.Column(db.Integer, nullable=False, default=0)
     complete = db.Column(db.Boolean, nullable=False, default=False)
     created = db.Column(db.DateTime, nullable=False, default=dt.utcnow)
@@ -28,6 +30,9 @@ class ImportJobStatus(db.Model):
         onupdate=dt.utcnow,
     )
     completed = db.Column(db.DateTime, nullable=True)
+    # Process running the job and when it last showed signs of life
+    runner_id = db.Column(db.Unicode(128), nullable=True)
+    heartbeat = db.Column(db.DateTime, nullable=True)
 
     __table_args__ = (
         db.UniqueConstraint("user_id", "job_id", name="uq_import_job_status_user_job"),
@@ -39,6 +44,7 @@ class ImportJobStatus(db.Model):
         return {
             "job_id": self.job_id,
             "status": self.status,
+            "failed": self.failed,
             "total_lines": self.total_lines,
             "complete": self.complete,
         }
@@ -6,19 +6,44 @@ from __future__ import annotations
 from datetime import datetime as dt
 from typing import Any
 
-from sqlalchemy import event, Column, Text, Computed
+from sqlalchemy import event, Column, Text, Computed, literal_column
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.sql import func
 # from sqlalchemy.dialects.mysql import LONGTEXT
-from sqlalchemy.orm import relationship, validates
+from sqlalchemy.orm import deferred, relationship, undefer, validates
 from sqlalchemy.dialects.postgresql import TSVECTOR
 from pgvector.sqlalchemy import Vector
 # from sqlalchemy_fulltext import FullText
 
 
+from ..core.pagination import SortKey
+from ..core.search_backend import (
+    HEADLINE_START_SEL,
+    HEADLINE_STOP_SEL,
+    get_search_backend,
+    search_backend_for,
+)
 from ..core.setup import db
+from .mark_stats import MarkStats
 from .tag import Tag
 
 
+def _search_text(title: Any, description: Any, url: Any) -> Any:
+    """
+    Concatenate the short text columns for trigram matching.
+
+    Built from literal SQL constants (not bind parameters) so queries
+    produce exactly the expression ``ix_marks_search_text_trgm`` indexes.
+    """
+    empty = literal_column("''")
+    space = literal_column("' '")
+    return (
+        func.coalesce(title, empty) + space
+        + func.coalesce(description, empty) + space
+        + url
+    )
+
+
 ass_tbl = db.Table(
     'marks_tags',
     db.metadata,
@@ -42,24 +67,24 @@ class Mark(db.Model):
     type = db.Column(db.Unicode(255), nullable=False)
     title = db.Column(db.Unicode(255), nullable=False)
     description = db.Column(Text(), nullable=True)
-    full_html = db.Column(Text(), nullable=True)
+    # Heavy columns are deferred so list/paginated queries only fetch the
+    # narrow row; detail views opt back in with Mark.content_options().
+    full_html = deferred(db.Column(Text(), nullable=True))
     url = db.Column(db.Unicode(512), nullable=False)
-    clicks = db.Column(db.Integer, default=0)
-    last_clicked = db.Column(db.DateTime)
     created = db.Column(db.DateTime)
     updated = db.Column(db.DateTime)
     # PostgreSQL generated column - computed automatically from title and full_html
-    search_vector = db.Column(
+    search_vector = deferred(db.Column(
         TSVECTOR,
         Computed(
             "setweight(to_tsvector('english', COALESCE(title, '')), 'A') || "
             "setweight(to_tsvector('english', COALESCE(full_html, '')), 'B')",
             persisted=True
         )
-    )
+    ))
 
     # RAG embedding columns
-    embedding = db.Column(Vector(384), nullable=True)
+    embedding = deferred(db.Column(Vector(384), nullable=True))
     embedding_updated = db.Column(db.DateTime, nullable=True)
 
     tags = relationship(
@@ -69,15 +94,47 @@ class Mark(db.Model):
         backref='marks'
     )
 
+    # Click counters live in the narrow mark_stats table (see MarkStats)
+    stats = relationship(
+        'MarkStats',
+        uselist=False,
+        lazy='joined',
+        cascade='all, delete-orphan',
+        passive_deletes=True,
+    )
+
     # Create a GiST or GIN index for better performance
     __table_args__ = (
-        db.Index('idx_search_vector', 'search_vector', postgresql_using='gin'),
+        db.Index(
+            'idx_search_vector', 'search_vector', postgresql_using='gin'
+        ).ddl_if(dialect='postgresql'),
+        # One composite index per sort order in Mark.sort_keys, plus the
+        # exact URL lookup done on every create/import
+        db.Index('ix_marks_owner_created_id', owner_id, created.desc(), id.desc()),
+        db.Index('ix_marks_owner_updated_id', owner_id, updated.desc(), id.desc()),
+        db.Index('ix_marks_owner_recent', owner_id, id.desc()),
+        db.Index('ix_marks_owner_url', owner_id, url),
+        # pg_trgm index for substring (ILIKE) and fuzzy (%>) API search
+        db.Index(
+            'ix_marks_search_text_trgm',
+            _search_text(title, description, url).label('search_text'),
+            postgresql_using='gin',
+            postgresql_ops={'search_text': 'gin_trgm_ops'},
+        ).ddl_if(dialect='postgresql'),
     )
 
+    # Don't RETURNING the generated search_vector after every INSERT; it is
+    # deferred, never read back by the app, and absent on SQLite
+    __mapper_args__ = {'eager_defaults': False}
+
     valid_types = ['bookmark', 'feed', 'youtube']
     valid_feed_types = ['feed', 'youtube']
     max_title_length = 255
 
+    # Delimiters around highlighted matches in search headlines
+    headline_start_sel = HEADLINE_START_SEL
+    headline_stop_sel = HEADLINE_STOP_SEL
+
     def __init__(self, owner_id: int, created: dt | None = None) -> None:
         """
         Initialize a new Mark.
@@ -88,6 +145,39 @@ class Mark(db.Model):
         """
         self.owner_id = owner_id
         self.created = created if created else dt.utcnow()
+        self.stats = MarkStats(owner_id=owner_id)
+
+    @hybrid_property
+    def clicks(self) -> int:
+        """Number of times this mark was opened."""
+        return self.stats.clicks if self.stats else 0
+
+    @clicks.setter
+    def clicks(self, value: int) -> None:
+        self._ensure_stats().clicks = value or 0
+
+    @clicks.expression
+    def clicks(cls):
+        return MarkStats.clicks
+
+    @hybrid_property
+    def last_clicked(self) -> dt | None:
+        """Timestamp of the most recent click."""
+        return self.stats.last_clicked if self.stats else None
+
+    @last_clicked.setter
+    def last_clicked(self, value: dt | None) -> None:
+        self._ensure_stats().last_clicked = value
+
+    @last_clicked.expression
+    def last_clicked(cls):
+        return MarkStats.last_clicked
+
+    def _ensure_stats(self) -> MarkStats:
+        """Return the stats row, creating it for marks that lack one."""
+        if self.stats is None:
+            self.stats = MarkStats(owner_id=self.owner_id)
+        return self.stats
 
     def insert_from_import(self, data: dict[str, Any]) -> None:
         """
@@ -112,19 +202,117 @@ class Mark(db.Model):
         if data['last_clicked']:
             self.last_clicked = dt.fromtimestamp(int(data['last_clicked']))
 
-        # Process tags
-        tags = []
-        for t in data['tags']:
-            tag = Tag.check(t.lower())
-            if not tag:
-                tag = Tag(t.lower())
-                db.session.add(tag)
-            tags.append(tag)
-        self.tags = tags
+        self.tags = Tag.resolve(data['tags'])
 
     def __repr__(self) -> str:
         return f'<Mark {self.title!r}>'
 
+    @classmethod
+    def existing_urls(
+        cls,
+        owner_id: int,
+        urls: list[str],
+        chunk_size: int = 1000,
+    ) -> set[str]:
+        """
+        Find which of many URLs a user has already bookmarked.
+
+        One ``IN`` query per ``chunk_size`` URLs, each an index range scan
+        on ``ix_marks_owner_url``, instead of one query per URL.
+
+        Args:
+            owner_id: ID of the user
+            urls: Candidate URLs, compared exactly
+            chunk_size: Maximum URLs per query
+
+        Returns:
+            Subset of ``urls`` that already exist for the user
+        """
+        found: set[str] = set()
+        for start in range(0, len(urls), chunk_size):
+            chunk = urls[start:start + chunk_size]
+            found.update(db.session.scalars(
+                db.select(cls.url).where(
+                    cls.owner_id == owner_id,
+                    cls.url.in_(chunk),
+                )
+            ))
+        return found
+
+    @classmethod
+    def sort_keys(cls, sort: str) -> list[SortKey]:
+        """
+        Get the full, unique sort order for a named mark listing.
+
+        Every order ends with ``id`` so it is total, which keyset
+        pagination requires and keeps offset pages stable.
+
+        Args:
+            sort: One of 'clicks', 'dateasc', 'datedesc'/'created',
+                'added', 'updated' or 'clicked'; anything else sorts by
+                clicks. 'updated' is nullable and only valid for offset
+                pagination
+
+        Returns:
+            List of SortKey
+        """
+        match sort:
+            case 'dateasc':
+                return [
+                    SortKey('created', cls.created, descending=False),
+                    SortKey('id', cls.id, descending=False),
+                ]
+            case 'datedesc' | 'created':
+                return [SortKey('created', cls.created), SortKey('id', cls.id)]
+            case 'added':
+                return [SortKey('id', cls.id)]
+            case 'updated':
+                return [SortKey('updated', cls.updated), SortKey('id', cls.id)]
+            case 'clicked':
+                return [SortKey('last_clicked', cls.last_clicked), SortKey('id', cls.id)]
+            case _:
+                # Ties break on id rather than created so the whole order
+                # can be read from the mark_stats (owner, clicks) index
+                return [SortKey('clicks', cls.clicks), SortKey('id', cls.id)]
+
+    @staticmethod
+    def content_options() -> tuple:
+        """
+        Loader options that undefer the article body for detail views.
+
+        Returns:
+            Tuple of options to pass to ``Query.options()``
+        """
+        return (undefer(Mark.full_html),)
+
+    @classmethod
+    def search_text(cls) -> Any:
+        """
+        SQL expression for title, description and URL as one string.
+
+        Matches the ``ix_marks_search_text_trgm`` trigram index, so
+        ``ILIKE`` and ``%>`` predicates on it are index-assisted.
+        """
+        return _search_text(cls.title, cls.description, cls.url)
+
+    @classmethod
+    def search_headlines(cls, ids: list[int], string: str) -> dict[int, str]:
+        """
+        Compute highlighted search snippets for a handful of marks.
+
+        Snippet functions re-parse the whole document, so only call this
+        for the rows that are actually displayed.
+
+        Args:
+            ids: IDs of the marks on the current page
+            string: The search input the marks matched
+
+        Returns:
+            Dict of mark ID to snippet, matches wrapped in
+            ``headline_start_sel``/``headline_stop_sel``
+        """
+        return get_search_backend().headlines(ids, string)
+
     @staticmethod
     def clamp_title_length(value: Any) -> str | None:
         """Ensure titles always fit in the DB column constraint."""
@@ -201,7 +389,8 @@ def receive_after_create(
     """
     Event listener for after table creation.
 
-    Note: Fulltext index is created via migrations.
-    See: migrations/versions/be4a02ad2b40_adding_create_after_triger_for_full_.py
+    Creates the search backend's own structures (the FTS5 table and sync
+    triggers on SQLite). PostgreSQL search indexes are created via
+    migrations.
     """
-    pass
+    search_backend_for(connection.dialect.name).install(connection)
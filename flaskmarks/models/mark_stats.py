@@ -0,0 +1,172 @@
+"""
+Click statistics for marks, kept out of the wide marks row.
+"""
+from __future__ import annotations
+
+from datetime import datetime as dt
+from typing import Any, Iterable
+
+from sqlalchemy import bindparam, column, func, values
+
+from flaskmarks.core.extensions import db
+
+
+class MarkStats(db.Model):
+    """
+    Narrow per-mark click counters.
+
+    Clicks are written far more often than anything else on a mark. Keeping
+    them in their own table means a click never rewrites the TOASTed
+    ``full_html`` row or recomputes the stored ``search_vector``.
+    """
+    __tablename__ = 'mark_stats'
+
+    mark_id = db.Column(
+        db.Integer,
+        db.ForeignKey('marks.id', ondelete='CASCADE'),
+        primary_key=True,
+    )
+    owner_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    clicks = db.Column(db.Integer, nullable=False, default=0)
+    last_clicked = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_mark_stats_owner_clicks', owner_id, clicks.desc(), mark_id.desc()),
+        db.Index(
+            'ix_mark_stats_owner_last_clicked',
+            owner_id,
+            last_clicked.desc(),
+            mark_id.desc(),
+            postgresql_where=clicks > 0,
+            sqlite_where=clicks > 0,
+        ),
+    )
+
+    def __init__(
+        self,
+        owner_id: int | None = None,
+        clicks: int = 0,
+        last_clicked: dt | None = None,
+    ) -> None:
+        """
+        Initialize click statistics for a mark.
+
+        Args:
+            owner_id: ID of the user who owns the mark
+            clicks: Initial click count
+            last_clicked: Timestamp of the last click
+        """
+        self.owner_id = owner_id
+        self.clicks = clicks
+        self.last_clicked = last_clicked
+
+    @classmethod
+    def for_owner(cls, mark_id: int, owner_id: int) -> MarkStats | None:
+        """
+        Get the stats row for a mark if it is owned by the user.
+
+        Args:
+            mark_id: ID of the mark
+            owner_id: ID of the user who must own the mark
+
+        Returns:
+            MarkStats instance or None
+        """
+        return cls.query.filter_by(mark_id=mark_id, owner_id=owner_id).first()
+
+    @classmethod
+    def owned_ids(cls, owner_id: int, mark_ids: Iterable[int]) -> set[int]:
+        """
+        Filter mark ids down to the ones the user owns.
+
+        Args:
+            owner_id: ID of the user who must own the marks
+            mark_ids: Candidate mark ids
+
+        Returns:
+            Set of the ids owned by the user
+        """
+        mark_ids = set(mark_ids)
+        if not mark_ids:
+            return set()
+        rows = db.session.execute(
+            db.select(cls.mark_id).where(
+                cls.owner_id == owner_id,
+                cls.mark_id.in_(mark_ids),
+            )
+        )
+        return set(rows.scalars())
+
+    @classmethod
+    def apply_clicks(cls, rows: list[dict[str, Any]]) -> None:
+        """
+        Apply coalesced click increments in a single transaction.
+
+        On PostgreSQL this is one ``UPDATE ... FROM (VALUES ...)`` statement;
+        other backends run the same owner-scoped UPDATE as an executemany.
+        Rows for marks the owner does not own match nothing and are ignored.
+        ``last_clicked`` only moves forward, so backdated offline events do
+        not hide a more recent click.
+
+        Args:
+            rows: Dicts with ``mark_id``, ``owner_id``, ``count`` and
+                ``last_clicked`` keys
+        """
+        if not rows:
+            return
+
+        table = cls.__table__
+        dialect = db.engine.dialect.name
+        # SQLite spells the scalar greatest() as multi-argument max()
+        latest = func.max if dialect == 'sqlite' else func.greatest
+
+        if dialect == 'postgresql':
+            pending = values(
+                column('mark_id', db.Integer),
+                column('owner_id', db.Integer),
+                column('count', db.Integer),
+                column('last_clicked', db.DateTime),
+                name='pending',
+            ).data([
+                (row['mark_id'], row['owner_id'], row['count'], row['last_clicked'])
+                for row in rows
+            ])
+            stmt = (
+                db.update(table)
+                .where(
+                    table.c.mark_id == pending.c.mark_id,
+                    table.c.owner_id == pending.c.owner_id,
+                )
+                .values(
+                    clicks=table.c.clicks + pending.c.count,
+                    last_clicked=latest(
+                        func.coalesce(table.c.last_clicked, pending.c.last_clicked),
+                        pending.c.last_clicked,
+                    ),
+                )
+            )
+            db.session.execute(stmt)
+        else:
+            stmt = (
+                db.update(table)
+                .where(
+                    table.c.mark_id == bindparam('b_mark_id'),
+                    table.c.owner_id == bindparam('b_owner_id'),
+                )
+                .values(
+                    clicks=table.c.clicks + bindparam('b_count'),
+                    last_clicked=latest(
+                        func.coalesce(table.c.last_clicked, bindparam('b_last_clicked')),
+                        bindparam('b_last_clicked'),
+                    ),
+                )
+            )
+            db.session.connection().execute(stmt, [
+                {f'b_{key}': value for key, value in row.items()}
+                for row in rows
+            ])
+
+        db.session.commit()
+
+    def __repr__(self) -> str:
+        return f'<MarkStats mark={self.mark_id} clicks={self.clicks}>'
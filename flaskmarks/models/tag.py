@@ -1,15 +1,137 @@
 """
 Tag model for categorizing bookmarks.
+
+Tag titles are stored normalised (trimmed, lower-case) and are unique, so
+every write path resolves titles to ids in bulk with ``Tag.resolve_many``
+or ``Tag.resolve`` instead of one ``Tag.check`` SELECT per title:
+
+* a bounded per-process LRU maps title to id for ``TAG_ID_CACHE_TTL``
+  seconds, so popular tags cost no query at all,
+* as soon as one title is not cached, every title of the call is resolved
+  in a single round trip on PostgreSQL (``INSERT ... ON CONFLICT DO
+  NOTHING RETURNING`` joined with a SELECT of the tags that already
+  exist), and with a SELECT plus an upsert of the missing titles
+  elsewhere. Cached ids are re-checked by that same statement.
+
+Ids only enter the cache once the transaction that resolved them commits,
+so a rolled-back insert can never leave a dangling id behind. Renaming or
+deleting a tag evicts it from the cache of the worker that changed it;
+other workers keep the old title -> id entry at most ``TAG_ID_CACHE_TTL``
+seconds, or until the next lookup that misses the cache.
 """
 from __future__ import annotations
 
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Iterable
+
+from flask import current_app
+from sqlalchemy import event, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+
 from ..core.setup import db
 
+DEFAULT_TAG_ID_CACHE_SIZE = 10000
+DEFAULT_TAG_ID_CACHE_TTL = 60.0
+
+# session.info key for ids resolved in the current transaction
+_PENDING_KEY = 'tag_ids_pending'
+
+
+class TagIdCache:
+    """Thread-safe, bounded title -> id LRU for one database engine."""
+
+    def __init__(
+        self,
+        maxsize: int = DEFAULT_TAG_ID_CACHE_SIZE,
+        ttl: float = DEFAULT_TAG_ID_CACHE_TTL,
+    ) -> None:
+        self.maxsize = max(int(maxsize), 0)
+        self.ttl = max(float(ttl), 0.0)
+        # title -> (id, monotonic expiry)
+        self._ids: OrderedDict[str, tuple[int, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, titles: Iterable[str]) -> dict[str, int]:
+        """Return the unexpired ids for ``titles``, marking them recently used."""
+        found = {}
+        now = time.monotonic()
+        with self._lock:
+            for title in titles:
+                entry = self._ids.get(title)
+                if entry is None:
+                    continue
+                if entry[1] <= now:
+                    del self._ids[title]
+                    continue
+                self._ids.move_to_end(title)
+                found[title] = entry[0]
+        return found
+
+    def put_many(self, ids: Iterable[tuple[str, int]]) -> None:
+        """Remember title -> id pairs, evicting the least recently used."""
+        if not self.maxsize or not self.ttl:
+            return
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for title, tag_id in ids:
+                self._ids[title] = (tag_id, expires)
+                self._ids.move_to_end(title)
+            while len(self._ids) > self.maxsize:
+                self._ids.popitem(last=False)
+
+    def discard_id(self, tag_id: int) -> None:
+        """Forget every title cached for ``tag_id``."""
+        with self._lock:
+            for title in [t for t, (i, _) in self._ids.items() if i == tag_id]:
+                del self._ids[title]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ids.clear()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+# One cache per engine: ids are only meaningful within one database
+_caches: weakref.WeakKeyDictionary[Engine, TagIdCache] = weakref.WeakKeyDictionary()
+_caches_lock = threading.Lock()
+
+
+def tag_id_cache(engine: Engine | None = None) -> TagIdCache:
+    """
+    Return the tag id cache for an engine, creating it on first use.
+
+    Must be called inside an application context when ``engine`` is None.
+
+    Args:
+        engine: Engine the ids belong to, defaults to ``db.engine``
+    """
+    engine = engine if engine is not None else db.engine
+    with _caches_lock:
+        cache = _caches.get(engine)
+        if cache is None:
+            cache = _caches[engine] = TagIdCache(
+                current_app.config.get('TAG_ID_CACHE_SIZE', DEFAULT_TAG_ID_CACHE_SIZE),
+                current_app.config.get('TAG_ID_CACHE_TTL', DEFAULT_TAG_ID_CACHE_TTL),
+            )
+        return cache
+
 
 class Tag(db.Model):
     """Model representing a tag for categorizing marks."""
 
     __tablename__ = 'tags'
+    __table_args__ = (
+        db.Index('uq_tags_title', 'title', unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.Unicode(255), nullable=False)
@@ -36,5 +158,142 @@ class Tag(db.Model):
         """
         return cls.query.filter(Tag.title == title).first()
 
+    @staticmethod
+    def normalize_title(title: str) -> str:
+        """Lower-case and trim a tag title the way every write path stores it."""
+        return str(title).strip().lower()[:255]
+
+    @classmethod
+    def resolve_many(cls, titles: Iterable[str]) -> dict[str, int]:
+        """
+        Map many tag titles to tag ids, creating the missing tags.
+
+        A call whose titles are all cached costs nothing; otherwise all
+        of them, cached ones included, take one statement on PostgreSQL
+        and at most two elsewhere, whatever their number. The caller
+        commits.
+
+        Args:
+            titles: Tag titles, normalised with ``normalize_title``
+
+        Returns:
+            Dict of normalised title to tag id
+        """
+        wanted = {cls.normalize_title(title) for title in titles}
+        wanted.discard('')
+        if not wanted:
+            return {}
+
+        engine = db.engine
+        ids = tag_id_cache(engine).get_many(wanted)
+        if len(ids) == len(wanted):
+            return ids
+
+        # The round trip is paid anyway, so the cached titles are checked
+        # in it too: a tag renamed by another worker must not keep its
+        # old title
+        if engine.dialect.name == 'postgresql':
+            found = cls._upsert_returning_all(wanted)
+        else:
+            found = cls._select_then_insert(wanted, engine.dialect.name)
+
+        # A concurrent transaction inserted these between our statements
+        raced = wanted - found.keys()
+        if raced:
+            found.update(cls._select_ids(raced))
+
+        db.session.info.setdefault(_PENDING_KEY, []).append((engine, found))
+        return found
+
+    @classmethod
+    def resolve(cls, titles: Iterable[str]) -> list[Tag]:
+        """
+        Return persistent Tag instances for titles, creating missing tags.
+
+        Ids come from ``resolve_many``; the instances are attached to the
+        session without loading them, so assigning them to ``Mark.tags``
+        costs no further SELECT.
+
+        Args:
+            titles: Tag titles in any case or spacing; blanks are dropped
+
+        Returns:
+            One Tag per distinct normalised title, in input order
+        """
+        ordered = list(dict.fromkeys(cls.normalize_title(t) for t in titles))
+        ids = cls.resolve_many(ordered)
+
+        tags = []
+        for title in ordered:
+            if title not in ids:
+                continue
+            tag = db.session.identity_map.get(identity_key(cls, ids[title]))
+            if tag is None:
+                tag = cls(title)
+                tag.id = ids[title]
+                make_transient_to_detached(tag)
+                db.session.add(tag)
+            tags.append(tag)
+        return tags
+
+    @classmethod
+    def _upsert_returning_all(cls, titles: set[str]) -> dict[str, int]:
+        """One statement: insert the new titles and select the existing ones."""
+        table = cls.__table__
+        inserted = (
+            pg_insert(table)
+            .values([{'title': title} for title in sorted(titles)])
+            .on_conflict_do_nothing(index_elements=[table.c.title])
+            .returning(table.c.title, table.c.id)
+            .cte('inserted')
+        )
+        stmt = select(inserted.c.title, inserted.c.id).union_all(
+            select(table.c.title, table.c.id).where(table.c.title.in_(titles))
+        )
+        return dict(db.session.execute(stmt).all())
+
+    @classmethod
+    def _select_then_insert(cls, titles: set[str], dialect: str) -> dict[str, int]:
+        """SELECT the existing titles, then insert the rest."""
+        table = cls.__table__
+        ids = cls._select_ids(titles)
+
+        new = titles - ids.keys()
+        if new:
+            if dialect == 'sqlite':
+                stmt = sqlite_insert(table).on_conflict_do_nothing(
+                    index_elements=[table.c.title]
+                )
+            else:
+                stmt = insert(table)
+            ids.update(db.session.execute(
+                stmt.returning(table.c.title, table.c.id),
+                [{'title': title} for title in sorted(new)],
+            ).all())
+        return ids
+
+    @classmethod
+    def _select_ids(cls, titles: set[str]) -> dict[str, int]:
+        return dict(db.session.execute(
+            select(cls.title, cls.id).where(cls.title.in_(titles))
+        ).all())
+
     def __repr__(self) -> str:
         return f'<Tag {self.title!r}>'
+
+
+@event.listens_for(Session, 'after_commit')
+def _promote_pending_tag_ids(session: Session) -> None:
+    for engine, ids in session.info.pop(_PENDING_KEY, ()):
+        tag_id_cache(engine).put_many(ids.items())
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending_tag_ids(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+@event.listens_for(Tag, 'after_update')
+@event.listens_for(Tag, 'after_delete')
+def _evict_changed_tag(_mapper, connection, target: Tag) -> None:
+    tag_id_cache(connection.engine).discard_id(target.id)
@@ -3,12 +3,21 @@ User model for authentication and bookmark ownership.
 """
 from __future__ import annotations
 
+import logging
 from typing import TYPE_CHECKING
 
+from flask import current_app
 from flask_login import UserMixin
-from sqlalchemy import or_, desc, asc
+from sqlalchemy import or_, desc
+from sqlalchemy.orm import contains_eager
 
 from flaskmarks.core.extensions import db, bcrypt
+from flaskmarks.core.pagination import KeysetPage, RankedPagination, keyset_paginate
+from flaskmarks.core.search_backend import (
+    DEFAULT_HYBRID_CANDIDATES,
+    DEFAULT_RRF_K,
+    get_search_backend,
+)
 
 if TYPE_CHECKING:
     from flask_sqlalchemy.pagination import Pagination
@@ -16,6 +25,8 @@ if TYPE_CHECKING:
 # Import Tag at module level for use in tags_by_click
 from flaskmarks.models.tag import Tag
 
+logger = logging.getLogger(__name__)
+
 
 class User(UserMixin, db.Model):
     """
@@ -57,6 +68,24 @@ class User(UserMixin, db.Model):
         from flaskmarks.models.mark import Mark
         return Mark.query.filter(Mark.owner_id == self.id)
 
+    def my_marks_with_stats(self):
+        """
+        Get query for this user's marks joined to their click statistics.
+
+        Use this for any query that filters or sorts on ``Mark.clicks`` or
+        ``Mark.last_clicked``; the joined row also populates ``Mark.stats``.
+        The redundant owner filter on ``mark_stats`` lets the planner walk
+        the ``(owner_id, clicks)`` / ``(owner_id, last_clicked)`` indexes.
+        """
+        from flaskmarks.models.mark import Mark
+        from flaskmarks.models.mark_stats import MarkStats
+        return (
+            self.my_marks()
+            .join(Mark.stats)
+            .filter(MarkStats.owner_id == self.id)
+            .options(contains_eager(Mark.stats))
+        )
+
     def my_tags(self):
         """Get query for all tags used by this user's marks."""
         return Tag.query.filter(Tag.marks.any(owner_id=self.id))
@@ -65,37 +94,76 @@ class User(UserMixin, db.Model):
         """Get all marks owned by this user."""
         return self.my_marks().all()
 
-    def marks(self, page: int) -> Pagination:
+    def paginate_marks(
+        self,
+        query,
+        sort: str,
+        page: int = 1,
+        cursor: str | None = None,
+        per_page: int | None = None,
+        with_total: bool = False,
+    ) -> Pagination | KeysetPage:
         """
-        Get paginated marks for this user.
+        Order and paginate a marks query by a named sort.
 
         Args:
-            page: Page number
+            query: Unordered marks query
+            sort: Sort name understood by ``Mark.sort_keys``
+            page: Page number (offset mode)
+            cursor: Keyset cursor; any non-None value (including '')
+                switches to cursor mode
+            per_page: Page size (defaults to the user's setting)
+            with_total: In cursor mode, also compute the exact total
 
         Returns:
-            Paginated marks query result
+            Flask-SQLAlchemy Pagination, or KeysetPage in cursor mode
+
+        Raises:
+            InvalidCursorError: If the cursor is malformed or for another sort
         """
         from flaskmarks.models.mark import Mark
 
-        base = self.my_marks()
+        keys = Mark.sort_keys(sort)
+        per_page = per_page or self.per_page
 
-        match self.sort_type:
-            case 'clicks':
-                base = base.order_by(desc(Mark.clicks)).order_by(desc(Mark.created))
-            case 'dateasc':
-                base = base.order_by(asc(Mark.created))
-            case 'datedesc':
-                base = base.order_by(desc(Mark.created))
+        if cursor is not None:
+            return keyset_paginate(
+                query, keys, cursor, per_page, scope=sort, with_total=with_total
+            )
 
-        return base.paginate(page=page, per_page=self.per_page, error_out=False)
+        return (
+            query.order_by(*(key.order_by() for key in keys))
+            .paginate(page=page, per_page=per_page, error_out=False)
+        )
 
-    def recent_marks(self, page: int, type: str) -> Pagination | bool:
+    def marks(self, page: int, cursor: str | None = None) -> Pagination | KeysetPage:
+        """
+        Get paginated marks for this user.
+
+        Args:
+            page: Page number
+            cursor: Keyset cursor (opt-in cursor mode when not None)
+
+        Returns:
+            Paginated marks query result
+        """
+        return self.paginate_marks(
+            self.my_marks_with_stats(), self.sort_type, page, cursor
+        )
+
+    def recent_marks(
+        self,
+        page: int,
+        type: str,
+        cursor: str | None = None,
+    ) -> Pagination | KeysetPage | bool:
         """
         Get recently added or clicked marks.
 
         Args:
             page: Page number
             type: Either 'added' or 'clicked'
+            cursor: Keyset cursor (opt-in cursor mode when not None)
 
         Returns:
             Paginated marks or False if invalid type
@@ -104,22 +172,30 @@ class User(UserMixin, db.Model):
 
         match type:
             case 'added':
-                base = self.my_marks().order_by(desc(Mark.id))
-                return base.paginate(page=page, per_page=self.per_page, error_out=False)
+                return self.paginate_marks(self.my_marks(), 'added', page, cursor)
             case 'clicked':
-                base = (
-                    self.my_marks()
-                    .filter(Mark.clicks > 0)
-                    .order_by(desc(Mark.last_clicked))
-                )
-                return base.paginate(page=page, per_page=self.per_page, error_out=False)
+                base = self.my_marks_with_stats().filter(Mark.clicks > 0)
+                return self.paginate_marks(base, 'clicked', page, cursor)
             case _:
                 return False
 
-    def get_mark_by_id(self, id: int):
-        """Get a specific mark by ID if owned by this user."""
+    def get_mark_by_id(self, id: int, include_content: bool = False):
+        """
+        Get a specific mark by ID if owned by this user.
+
+        Args:
+            id: Mark ID
+            include_content: Load the deferred ``full_html`` column in the
+                same query (for detail views that render the article)
+
+        Returns:
+            Mark instance or None
+        """
         from flaskmarks.models.mark import Mark
-        return self.my_marks().filter(Mark.id == id).first()
+        query = self.my_marks().filter(Mark.id == id)
+        if include_content:
+            query = query.options(*Mark.content_options())
+        return query.first()
 
     def get_mark_type_count(self, type: str) -> int:
         """Get count of marks of a specific type."""
@@ -131,33 +207,195 @@ class User(UserMixin, db.Model):
         from flaskmarks.models.mark import Mark
         return self.my_marks().order_by(desc(Mark.created)).first()
 
-    def q_marks_by_tag(self, tag: str, page: int) -> Pagination:
-        """Get marks with a specific tag."""
+    def q_marks_by_tag(
+        self,
+        tag: str,
+        page: int,
+        cursor: str | None = None,
+    ) -> Pagination | KeysetPage:
+        """Get marks with a specific tag, newest first."""
         from flaskmarks.models.mark import Mark
-        return (
-            self.my_marks()
-            .filter(Mark.tags.any(title=tag))
-            .paginate(page=page, per_page=self.per_page, error_out=False)
+        base = self.my_marks().filter(Mark.tags.any(title=tag))
+        return self.paginate_marks(base, 'added', page, cursor)
+
+    def q_marks_by_string(
+        self,
+        page: int,
+        string: str,
+        marktype: str,
+        cursor: str | None = None,
+    ) -> Pagination | KeysetPage:
+        """
+        Search marks by substring in title, url or description.
+
+        On PostgreSQL short columns are matched case-insensitively through
+        the ``ix_marks_search_text_trgm`` trigram index and the article body
+        by word through the ``search_vector`` index, so no predicate has to
+        read the TOASTed ``full_html``. On SQLite words are prefix-matched
+        in the FTS5 index.
+
+        Args:
+            page: Page number
+            string: Substring to look for
+            marktype: Optional mark type to restrict to
+            cursor: Keyset cursor (opt-in cursor mode when not None)
+
+        Returns:
+            Paginated marks, most clicked first
+        """
+        from flaskmarks.models.mark import Mark
+
+        base = get_search_backend().substring(self.my_marks_with_stats(), string)
+        if marktype in Mark.valid_types:
+            base = base.filter(Mark.type == marktype)
+        return self.paginate_marks(base, 'clicks', page, cursor)
+
+    def q_marks_by_fuzzy(
+        self,
+        page: int,
+        string: str,
+        marktype: str | None = None,
+    ) -> Pagination:
+        """
+        Typo-tolerant search over title, url and description.
+
+        Uses pg_trgm word similarity (``%>``), which the trigram index
+        serves, and ranks by ``word_similarity``. SQLite falls back to
+        BM25-ranked prefix matching.
+
+        Args:
+            page: Page number
+            string: Search input
+            marktype: Optional mark type to restrict to
+
+        Returns:
+            Paginated marks, closest match first
+        """
+        from flaskmarks.models.mark import Mark
+
+        base = self.my_marks_with_stats()
+        if marktype in Mark.valid_types:
+            base = base.filter(Mark.type == marktype)
+        return get_search_backend().fuzzy(base, string).paginate(
+            page=page, per_page=self.per_page, error_out=False
         )
 
-    def q_marks_by_string(self, page: int, string: str, marktype: str) -> Pagination:
-        """Search marks by string in title, url, html, or description."""
+    def fulltext_marks(self, string: str, marktype: str | None = None):
+        """
+        Get a query for marks matching a full-text search, best match first.
+
+        On PostgreSQL this matches the stored, GIN-indexed ``search_vector``
+        and ranks with ``ts_rank_cd`` using its title (A) / body (B)
+        weights; on SQLite it matches the FTS5 index and ranks with BM25.
+
+        Args:
+            string: Web-search style input (quotes, OR, -word)
+            marktype: Optional mark type to restrict to
+
+        Returns:
+            Ordered marks query
+        """
         from flaskmarks.models.mark import Mark
 
-        search_string = f"%{string}%"
-        base = self.my_marks().filter(
-            or_(
-                Mark.title.like(search_string),
-                Mark.url.like(search_string),
-                Mark.full_html.like(search_string),
-                Mark.description.like(search_string)
-            )
+        base = self.my_marks_with_stats()
+        if marktype in Mark.valid_types:
+            base = base.filter(Mark.type == marktype)
+        if not string:
+            return base.order_by(Mark.id.desc())
+
+        return get_search_backend().fulltext(base, string)
+
+    def q_marks_by_fulltext(
+        self,
+        page: int,
+        string: str,
+        marktype: str | None = None,
+        headlines: bool = True,
+    ) -> Pagination:
+        """
+        Full-text search this user's marks, paginated by relevance.
+
+        Args:
+            page: Page number
+            string: Web-search style input
+            marktype: Optional mark type to restrict to
+            headlines: Attach ``ts_headline`` snippets as ``mark.headline``
+                for the rows on this page
+
+        Returns:
+            Paginated marks
+        """
+        from flaskmarks.models.mark import Mark
+
+        pagination = self.fulltext_marks(string, marktype).paginate(
+            page=page, per_page=self.per_page, error_out=False
         )
-        return (
-            base.order_by(desc(Mark.clicks))
-            .paginate(page=page, per_page=self.per_page, error_out=False)
+        if headlines and string and pagination.items:
+            snippets = Mark.search_headlines([m.id for m in pagination.items], string)
+            for mark in pagination.items:
+                mark.headline = snippets.get(mark.id)
+        return pagination
+
+    def q_marks_by_hybrid(
+        self,
+        page: int,
+        string: str,
+        marktype: str | None = None,
+    ) -> Pagination:
+        """
+        Semantic + lexical search fused with reciprocal rank fusion.
+
+        Embeds the query locally (no LLM call) and lets the database rank
+        full-text and vector candidates in one statement. If the embedding
+        model is unavailable, or the backend has no vector index (SQLite),
+        results fall back to the lexical ranking.
+
+        Args:
+            page: Page number
+            string: Search input
+            marktype: Optional mark type to restrict to
+
+        Returns:
+            Paginated marks, best fused score first
+        """
+        from flaskmarks.models.mark import Mark
+        from flaskmarks.core.rag import get_rag_service
+
+        backend = get_search_backend()
+        embedding = None
+        if backend.supports_vectors:
+            try:
+                embedding = get_rag_service().embedding_service.generate_embedding(string)
+            except Exception as e:
+                logger.warning(f"Hybrid search without vectors, embedding failed: {e}")
+
+        ranked, total = backend.hybrid(
+            self.id,
+            string,
+            embedding,
+            page,
+            self.per_page,
+            marktype if marktype in Mark.valid_types else None,
+            candidates=current_app.config.get(
+                'HYBRID_SEARCH_CANDIDATES', DEFAULT_HYBRID_CANDIDATES
+            ),
+            rrf_k=current_app.config.get('HYBRID_SEARCH_RRF_K', DEFAULT_RRF_K),
         )
 
+        ids = [mark_id for mark_id, _ in ranked]
+        marks_by_id = {
+            mark.id: mark
+            for mark in self.my_marks_with_stats().filter(Mark.id.in_(ids))
+        } if ids else {}
+        items = []
+        for mark_id, score in ranked:
+            mark = marks_by_id.get(mark_id)
+            if mark is not None:
+                mark.score = score
+                items.append(mark)
+
+        return RankedPagination(items, page, self.per_page, total)
+
     def q_marks_by_url(self, string: str):
         """Find a mark by exact URL match."""
         from flaskmarks.models.mark import Mark
@@ -170,9 +408,10 @@ class User(UserMixin, db.Model):
     def tags_by_click(self, page: int) -> Pagination:
         """Get tags sorted by click count of associated marks."""
         from flaskmarks.models.mark import Mark
+        from flaskmarks.models.mark_stats import MarkStats
         return (
             self.my_tags()
-            .order_by(Tag.marks.any(Mark.clicks))
+            .order_by(Tag.marks.any(Mark.stats.has(MarkStats.clicks > 0)))
             .paginate(page=page, per_page=self.per_page, error_out=False)
         )
 
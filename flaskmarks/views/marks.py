@@ -13,6 +13,8 @@ from flask import (
     abort,
     jsonify,
     current_app,
+    Response,
+    stream_with_context,
 )
 from flask_login import login_user, logout_user, login_required
 from flask_wtf.csrf import validate_csrf
@@ -28,19 +30,31 @@ from typing import Iterable
 from newspaper import Article, ArticleBinaryDataException
 #from gensim.summarization import keywords
 from werkzeug.utils import secure_filename
-from bs4 import BeautifulSoup
-from typing import List
 from uuid import uuid4
 
 from ..core.setup import app, db
 from ..core.error import is_safe_url
+from ..core.bookmark_import import (
+    count_json_bookmarks,
+    count_netscape_bookmarks,
+    count_url_lines,
+    iter_json_bookmarks,
+    iter_netscape_bookmarks,
+    iter_url_lines,
+    sniff_bookmark_format,
+)
+from ..core.click_buffer import click_buffer
+from ..core.export import export_response, export_stream, iter_mark_records
+from ..core.pagination import InvalidCursorError
+from ..core.search_backend import get_search_backend
 from ..core.html_sanitizer import sanitize_external_html
 from ..core.import_job_status_service import (
-    complete_import_job,
     create_or_reset_import_job,
     get_import_job_status,
     increment_import_job_status,
 )
+from ..core.import_jobs import run_import_job
+from ..core.import_progress import DEFAULT_STREAM_INTERVAL, import_progress_events
 from ..core.marks_import_thread import MarksImportThread
 from ..core.theme_utils import render_themed_template
 
@@ -88,47 +102,6 @@ def uri_validator(url_to_test):
         return False
 
 
-def extract_urls_from_bookmarks(file_path: str) -> List[str]:
-    """
-    Extract all URLs from a browser bookmark HTML file.
-
-    Args:
-        file_path (str): Path to the bookmark HTML file
-
-    Returns:
-        List[str]: A list of all URLs found in the bookmark file
-
-    Example:
-        >>> urls = extract_urls_from_bookmarks('bookmarks.html')
-        >>> print(f"Found {len(urls)} URLs")
-        >>> print(urls[:5])  # Print first 5 URLs
-    """
-    urls = []
-
-    try:
-        # Read the HTML file
-        with open(file_path, 'r', encoding='utf-8') as file:
-            html_content = file.read()
-
-        # Parse the HTML
-        soup = BeautifulSoup(html_content, 'html.parser')
-
-        # Find all anchor tags with HREF attribute
-        for link in soup.find_all('a', href=True):
-            url = link['href']
-            # Filter out any non-http(s) URLs (like javascript:, place:, etc.)
-            if url.startswith('http://') or url.startswith('https://'):
-                urls.append(url)
-
-    except FileNotFoundError:
-        print(f"Error: File '{file_path}' not found.")
-    except Exception as e:
-        print(f"Error processing file: {e}")
-
-    return urls
-
-
-
 LOG_DIR = os.environ.get('FLASKMARKS_LOG_DIR', '/app/logs')
 try:
     os.makedirs(LOG_DIR, exist_ok=True)
@@ -156,6 +129,14 @@ def webroot():
     return redirect(url_for('marks.recently_added'))
 
 
+def _paginated(fetch, *args):
+    """Run a paginated user query, honouring an optional ?cursor= argument."""
+    try:
+        return fetch(*args, cursor=request.args.get('cursor'))
+    except InvalidCursorError:
+        abort(400)
+
+
 @marks.route('/marks/all')
 @marks.route('/marks/all/<int:page>')
 @login_required
@@ -164,7 +145,7 @@ def allmarks(page=1):
     return render_themed_template('mark/index.html',
                            title='Marks - page %d' % page,
                            header='',
-                           marks=u.marks(page))
+                           marks=_paginated(u.marks, page))
 
 
 @marks.route('/marks/sort/clicked')
@@ -175,7 +156,7 @@ def recently_clicked(page=1):
     return render_themed_template('mark/index.html',
                            title='Marks - page %d' % page,
                            header='',
-                           marks=u.recent_marks(page, 'clicked'))
+                           marks=_paginated(u.recent_marks, page, 'clicked'))
 
 
 @marks.route('/marks/sort/recently')
@@ -186,7 +167,7 @@ def recently_added(page=1):
     return render_themed_template('mark/index.html',
                            title='Marks - page %d' % page,
                            header='',
-                           marks=u.recent_marks(page, 'added'))
+                           marks=_paginated(u.recent_marks, page, 'added'))
 
 
 @marks.route('/marks/search/tag/<slug>')
@@ -196,7 +177,7 @@ def mark_q_tag(slug, page=1):
     return render_themed_template('mark/index.html',
                            title='Marks with tag: %s' % (slug),
                            header='Marks with tag: %s' % (slug),
-                           marks=g.user.q_marks_by_tag(slug, page))
+                           marks=_paginated(g.user.q_marks_by_tag, slug, page))
 
 
 @marks.route('/marks/search/string', methods=['GET'])
@@ -209,21 +190,7 @@ def search_string(page=1):
     if not q and not t:
         return redirect(url_for('marks.allmarks'))
 
-    # results = Mark.query.session.query(Mark)\
-    #                     .filter(FullTextSearch(q, Mark, FullTextMode.NATURAL))\
-    #                     .filter(Mark.owner_id == g.user.id)\
-    #                     .paginate(page=page, per_page=5, error_out=False)
-
-    # results = Mark.query.filter(
-    #     func.to_tsvector('english', Mark.full_html).match(q))\
-    #                     .filter(Mark.owner_id == g.user.id)\
-    #                     .paginate(page=page, per_page=5, error_out=False)
-
-    results = Mark.query.with_entities(Mark.id, Mark.title, Mark.url, Mark.description) \
-        .filter(func.to_tsvector('english', Mark.full_html).match(q)) \
-        .filter(Mark.owner_id == g.user.id) \
-        .paginate(page=page, per_page=5, error_out=False)
-
+    results = g.user.q_marks_by_fulltext(page, q, t)
 
     return render_themed_template('mark/index.html',
                            title='Search results for: %s' % (q),
@@ -233,9 +200,7 @@ def search_string(page=1):
 
 
 def search(query):
-    return Mark.query.filter(
-        func.to_tsvector('english', Mark.full_html).match(query)
-    ).all()
+    return get_search_backend().fulltext(Mark.query, query).all()
 
 
 @marks.route('/mark/new', methods=['GET'])
@@ -280,14 +245,7 @@ def new_mark(type):
                 m.description = imported_mark.get('description') or m.description
                 m.full_html = sanitize_external_html(imported_mark.get('full_html')) or m.full_html
                 if not form.tags.data and imported_mark.get('tags'):
-                    tags = []
-                    for tag_title in imported_mark.get('tags', []):
-                        tag = Tag.check(tag_title.lower())
-                        if not tag:
-                            tag = Tag(tag_title.lower())
-                            db.session.add(tag)
-                        tags.append(tag)
-                    m.tags = tags
+                    m.tags = Tag.resolve(imported_mark['tags'])
 
         if not m.title:
             m.title = m.url
@@ -316,10 +274,7 @@ def view_mark(id, type):
 
     data = feedparser.parse(m.url)
 
-    m.clicks = m.clicks + 1
-    m.last_clicked = datetime.utcnow()
-    db.session.add(m)
-    db.session.commit()
+    click_buffer.record(m.id, g.user.id)
 
     return render_themed_template('mark/view_%s.html' % (type),
                            mark=m,
@@ -365,7 +320,7 @@ def edit_mark(id):
 @marks.route('/mark/viewhtml/<int:id>', methods=['GET', 'POST'])
 @login_required
 def view_html_mark(id):
-    m = g.user.get_mark_by_id(id)
+    m = g.user.get_mark_by_id(id, include_content=True)
     if not m:
         abort(403)
     return render_themed_template('mark/view_html.html',
@@ -413,14 +368,10 @@ def ajax_mark_inc():
         mark_id = payload.get('id')
 
     if mark_id:
-        id = int(mark_id)
-        m = g.user.get_mark_by_id(id)
-        if not m:
+        if not g.user.get_mark_by_id(int(mark_id)):
             return jsonify(status='forbidden')
-        m.clicks = m.clicks + 1
-        m.last_clicked = datetime.utcnow()
-        db.session.add(m)
-        db.session.commit()
+        # Buffered and written in bulk by the click flusher
+        click_buffer.record(int(mark_id), g.user.id)
         return jsonify(status='success')
     return jsonify(status='error')
 
@@ -429,82 +380,14 @@ def ajax_mark_inc():
 # Import / Export #
 ###################
 @marks.route('/marks/export.json', methods=['GET'])
+@marks.route('/marks/export.<any(ndjson, html):fmt>', methods=['GET'])
 @login_required
-def export_marks():
-    u = g.user
-    d = [{'title': m.title,
-          'type': m.type,
-          'url': m.url,
-          'clicks': m.clicks,
-          'last_clicked': m.last_clicked,
-          'created': m.created.strftime('%s'),
-          'updated': m.updated.strftime('%s') if m.updated else '',
-          'tags': [t.title for t in m.tags]}
-         for m in u.all_marks()]
-    return jsonify(marks=d)
-
-
-#######################
-# Import Firefox JSON #
-#######################
-def iterdict(d):
-  app.logger.info('Info level log')
-  i = 0
-  if 'children' in d:
-    iterdict(d['children'])
-  else:
-      for bookmark in d:
-        if 'children' in bookmark:
-            iterdict(bookmark['children'])
-        if 'uri' in bookmark:
-            i = i + 1
-            try:
-                app.logger.debug(bookmark['uri'])
-                # new_imported_mark(bookmark['uri'])
-            except Exception as e:
-                app.logger.error(e)
-                # app.logger.error('Exception %s, not added. %s' % (bookmark['uri'], e))
-                # print('Exception %s, not added. %s' % (bookmark['uri'], e))
-
-
-def iterdict2(d):
-    """
-    data = json.load(open('file.json'))
-    a = iterdict2(data)
-    """
-    i = 0
-    final_list = []
-    if 'children' in d:
-        l = iterdict2(d['children'])
-        final_list.append(l)
-    else:
-        for bookmark in d:
-            if 'children' in bookmark:
-                l = iterdict2(bookmark['children'])
-                final_list.append(l)
-            if 'uri' in bookmark:
-                i = i + 1
-                print(i)
-                try:
-                    uri = bookmark['uri']
-                    final_list.append(uri)
-                    # print(bookmark['uri'])
-
-                    # print(bookmark.keys())
-                except Exception as e:
-                    print(f"Exception: {e}")
-                    uri = ''
-    return list(flatten(final_list))
-
-
-def flatten(items):
-    """Yield items from any nested iterable; see Reference."""
-    for x in items:
-        if isinstance(x, Iterable) and not isinstance(x, (str, bytes)):
-            for sub_x in flatten(x):
-                yield sub_x
-        else:
-            yield x
+def export_marks(fmt='json'):
+    # Streamed from a server-side cursor; ?gzip=1 compresses on the fly
+    chunks = export_stream(fmt, iter_mark_records(g.user.id))
+    return export_response(
+        fmt, chunks, 'marks', compress=request.args.get('gzip') in ('1', 'true')
+    )
 
 
 ###################
@@ -513,54 +396,35 @@ def flatten(items):
 
 
 def thread_import_file(
-    text_file_path: str | List[str],
+    text_file_path: str | Iterable,
     app,
     user_id: int,
     job_id: str,
+    total_lines: int | None = None,
 ):
-    maxthreads = 20
     lines_new = []
 
     if isinstance(text_file_path, str):
-        # Reading from a text file with URLs
-        with open(text_file_path) as fp:
-            lines_new = [line.strip() for line in fp if line.strip()]
-        total_lines = len(lines_new)
+        # Text file with URLs, streamed into the pipeline line by line
+        if total_lines is None:
+            total_lines = count_url_lines(text_file_path)
+        lines_new = iter_url_lines(text_file_path)
     elif isinstance(text_file_path, list):
         lines_new = text_file_path
         total_lines = len(lines_new)
+    elif isinstance(text_file_path, Iterable) and total_lines is not None:
+        # Records streamed from a bookmark export, counted up front
+        lines_new = text_file_path
     else:
-        raise TypeError("text_file_path must be a string or a list of strings")
+        raise TypeError("text_file_path must be a path, a list or an iterable with total_lines")
 
     with app.app_context():
         create_or_reset_import_job(user_id=user_id, job_id=job_id, total_lines=total_lines)
 
-        if not lines_new:
-            complete_import_job(user_id=user_id, job_id=job_id)
-            return
-
-        with concurrent.futures.ThreadPoolExecutor(max_workers=maxthreads) as exe:
-            futures = []
-            for url in lines_new:
-                future = exe.submit(marks_import_threads, (url, user_id))
-                futures.append(future)
-
-            # Wait for each future and update scoped persisted status
-            for future in concurrent.futures.as_completed(futures):
-                increment_import_job_status(user_id=user_id, job_id=job_id)
-                try:
-                    future.result()
-                except Exception as e:
-                    print(f"Import error: {e}")
-
-        complete_import_job(user_id=user_id, job_id=job_id)
-
-
-def marks_import_threads(url_user_id):
-    url, user_id = url_user_id
-    logger.info(f"importing url: {url}")
-    r = MarksImportThread(url, user_id)
-    r.run()
+    # URLs are checkpointed as job items first, so a restart resumes the
+    # job instead of losing it; fetches run concurrently on an event loop
+    summary = run_import_job(app, user_id, job_id, lines_new)
+    app.logger.info(f"Import {job_id} finished: {summary}")
 
 
 @marks.route('/marks/import', methods=['GET', 'POST'])
@@ -585,24 +449,29 @@ def import_marks():
             app.logger.info(f"content_type: {f.content_type}")
             
             # Count lines for progress
-            with open(file_path) as fp:
-                lines = [line.strip() for line in fp if line.strip()]
-                total_lines = len(lines)
+            total_lines = count_url_lines(file_path)
 
             print('Total Lines', total_lines)
             import_data = file_path  # Pass file path for text files
             
         elif f.content_type == 'text/html':
             app.logger.info(f"content_type: {f.content_type}")
-            
-            # Extract URLs from HTML bookmark file
-            urls = extract_urls_from_bookmarks(file_path)
-            total_lines = len(urls)
+
+            # Bookmark export: parsed while importing, folders become tags
+            total_lines = count_netscape_bookmarks(file_path)
             print('Total URLs from HTML', total_lines)
-            import_data = urls  # Pass list of URLs for HTML files
-            
+            import_data = iter_netscape_bookmarks(file_path)
+
+        elif sniff_bookmark_format(file_path) == 'json':
+            app.logger.info(f"content_type: {f.content_type}")
+
+            # Firefox bookmarks-*.json backup or Chromium "Bookmarks" file
+            total_lines = count_json_bookmarks(file_path)
+            print('Total URLs from JSON', total_lines)
+            import_data = iter_json_bookmarks(file_path)
+
         else:
-            flash('Unsupported file type. Please upload a .txt or .html file.', category='danger')
+            flash('Unsupported file type. Please upload a .txt, .html or .json file.', category='danger')
             return render_template('profile/import_progress.html', form=form, status=0)
 
         if total_lines == 0:
@@ -614,7 +483,7 @@ def import_marks():
 
         t1 = Thread(
             target=thread_import_file,
-            args=(import_data, current_app._get_current_object(), u.id, job_id),
+            args=(import_data, current_app._get_current_object(), u.id, job_id, total_lines),
         )
         t1.start()
 
@@ -641,14 +510,42 @@ def getStatus():
 
     return jsonify(scoped_status.as_dict())
 
+
+@marks.route('/marks/import/events')
+@login_required
+def import_events():
+    """Push import progress as Server-Sent Events until the job completes."""
+    job_id = request.args.get('job_id', type=str)
+    if not job_id:
+        return jsonify(error='job_id is required'), 400
+    if get_import_job_status(user_id=g.user.id, job_id=job_id) is None:
+        return jsonify(error='import job not found for current user'), 404
+
+    events = import_progress_events(
+        g.user.id,
+        job_id,
+        interval=app.config.get('IMPORT_PROGRESS_STREAM_INTERVAL', DEFAULT_STREAM_INTERVAL),
+    )
+    response = Response(stream_with_context(events), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Keep nginx from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 #########
 # Other #
 #########
 @marks.route('/mark/redirect/<int:id>')
 @login_required
 def mark_redirect(id):
-    url = url_for('marks.mark_meta', id=id)
-    return render_template('meta.html', url=url)
+    m = g.user.get_mark_by_id(id)
+    if not m:
+        abort(403)
+    click_buffer.record(m.id, g.user.id)
+    response = redirect(m.url)
+    # Same referrer hiding the old meta-refresh hop gave us
+    response.headers['Referrer-Policy'] = 'no-referrer'
+    return response
 
 
 @marks.route('/meta/<int:id>')
@@ -656,9 +553,6 @@ def mark_redirect(id):
 def mark_meta(id):
     m = g.user.get_mark_by_id(id)
     if m:
-        m.clicks = m.clicks + 1
-        m.last_clicked = datetime.utcnow()
-        db.session.add(m)
-        #db.session.commit()
+        click_buffer.record(m.id, g.user.id)
         return render_template('meta.html', url=m.url)
     abort(403)
@@ -0,0 +1,28 @@
+"""add failed counter to import_job_statuses
+
+Revision ID: a6d3c8e5f1b9
+Revises: f4c9e1a7b2d8
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a6d3c8e5f1b9"
+down_revision = "f4c9e1a7b2d8"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("import_job_statuses", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("failed", sa.Integer(), nullable=False, server_default="0")
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("import_job_statuses", schema=None) as batch_op:
+        batch_op.drop_column("failed")
@@ -0,0 +1,64 @@
+"""add composite indexes for mark list sort orders
+
+Revision ID: b7d3e9f1a2c4
+Revises: e2a7c9d4b1f3
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "b7d3e9f1a2c4"
+down_revision = "e2a7c9d4b1f3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # marks(owner_id, ...) serve the date, recently added and URL lookups
+    op.create_index(
+        "ix_marks_owner_created_id",
+        "marks",
+        ["owner_id", sa.text("created DESC"), sa.text("id DESC")],
+        unique=False,
+    )
+    op.create_index(
+        "ix_marks_owner_updated_id",
+        "marks",
+        ["owner_id", sa.text("updated DESC"), sa.text("id DESC")],
+        unique=False,
+    )
+    op.create_index(
+        "ix_marks_owner_recent",
+        "marks",
+        ["owner_id", sa.text("id DESC")],
+        unique=False,
+    )
+    op.create_index("ix_marks_owner_url", "marks", ["owner_id", "url"], unique=False)
+
+    # mark_stats(owner_id, ...) drive the click-ordered listings
+    op.create_index(
+        "ix_mark_stats_owner_clicks",
+        "mark_stats",
+        ["owner_id", sa.text("clicks DESC"), sa.text("mark_id DESC")],
+        unique=False,
+    )
+    op.create_index(
+        "ix_mark_stats_owner_last_clicked",
+        "mark_stats",
+        ["owner_id", sa.text("last_clicked DESC"), sa.text("mark_id DESC")],
+        unique=False,
+        postgresql_where=sa.text("clicks > 0"),
+        sqlite_where=sa.text("clicks > 0"),
+    )
+
+
+def downgrade():
+    op.drop_index("ix_mark_stats_owner_last_clicked", table_name="mark_stats")
+    op.drop_index("ix_mark_stats_owner_clicks", table_name="mark_stats")
+    op.drop_index("ix_marks_owner_url", table_name="marks")
+    op.drop_index("ix_marks_owner_recent", table_name="marks")
+    op.drop_index("ix_marks_owner_updated_id", table_name="marks")
+    op.drop_index("ix_marks_owner_created_id", table_name="marks")
@@ -0,0 +1,35 @@
+"""add pg_trgm index for substring and fuzzy search
+
+Revision ID: c8e4f0a2b3d5
+Revises: b7d3e9f1a2c4
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "c8e4f0a2b3d5"
+down_revision = "b7d3e9f1a2c4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Must match Mark.search_text() exactly for the planner to use it
+    op.execute(
+        "CREATE INDEX ix_marks_search_text_trgm ON marks USING gin "
+        "((coalesce(title, '') || ' ' || coalesce(description, '') || ' ' || url) "
+        "gin_trgm_ops)"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("DROP INDEX IF EXISTS ix_marks_search_text_trgm")
@@ -0,0 +1,57 @@
+"""add FTS5 search table for SQLite deployments
+
+Revision ID: d9f5a1b3c4e6
+Revises: c8e4f0a2b3d5
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "d9f5a1b3c4e6"
+down_revision = "c8e4f0a2b3d5"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != "sqlite":
+        return
+
+    # External-content FTS5 index over marks, kept in sync by triggers
+    op.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS marks_fts USING fts5("
+        "title, description, full_html, url, "
+        "content='marks', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2')"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS marks_fts_ai AFTER INSERT ON marks BEGIN "
+        "INSERT INTO marks_fts(rowid, title, description, full_html, url) "
+        "VALUES (new.id, new.title, new.description, new.full_html, new.url); END"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS marks_fts_ad AFTER DELETE ON marks BEGIN "
+        "INSERT INTO marks_fts(marks_fts, rowid, title, description, full_html, url) "
+        "VALUES ('delete', old.id, old.title, old.description, old.full_html, old.url); END"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS marks_fts_au "
+        "AFTER UPDATE OF title, description, full_html, url ON marks BEGIN "
+        "INSERT INTO marks_fts(marks_fts, rowid, title, description, full_html, url) "
+        "VALUES ('delete', old.id, old.title, old.description, old.full_html, old.url); "
+        "INSERT INTO marks_fts(rowid, title, description, full_html, url) "
+        "VALUES (new.id, new.title, new.description, new.full_html, new.url); END"
+    )
+    op.execute("INSERT INTO marks_fts(marks_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "sqlite":
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS marks_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS marks_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS marks_fts_ai")
+    op.execute("DROP TABLE IF EXISTS marks_fts")
@@ -0,0 +1,53 @@
+"""normalise tag titles and make them unique
+
+Revision ID: e3b8d2f6a7c1
+Revises: d9f5a1b3c4e6
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "e3b8d2f6a7c1"
+down_revision = "d9f5a1b3c4e6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    # Point links at the lowest id among tags that normalise to the same title
+    op.execute(
+        "UPDATE marks_tags SET right_id = ("
+        "SELECT MIN(t2.id) FROM tags t2 WHERE lower(trim(t2.title)) = ("
+        "SELECT lower(trim(t1.title)) FROM tags t1 WHERE t1.id = marks_tags.right_id))"
+    )
+
+    # Merging can leave a mark linked to the same tag twice
+    if dialect == "postgresql":
+        op.execute(
+            "DELETE FROM marks_tags a USING marks_tags b "
+            "WHERE a.ctid < b.ctid AND a.left_id = b.left_id AND a.right_id = b.right_id"
+        )
+    else:
+        op.execute(
+            "DELETE FROM marks_tags WHERE rowid NOT IN ("
+            "SELECT MIN(rowid) FROM marks_tags GROUP BY left_id, right_id)"
+        )
+
+    op.execute(
+        "DELETE FROM tags WHERE id NOT IN ("
+        "SELECT MIN(id) FROM tags GROUP BY lower(trim(title)))"
+    )
+    op.execute(
+        "UPDATE tags SET title = lower(trim(title)) WHERE title <> lower(trim(title))"
+    )
+
+    op.create_index("uq_tags_title", "tags", ["title"], unique=True)
+
+
+def downgrade():
+    # Merged duplicates are not restored
+    op.drop_index("uq_tags_title", table_name="tags")
@@ -0,0 +1,57 @@
+"""add import_job_items table and import job runner columns
+
+Revision ID: f4c9e1a7b2d8
+Revises: e3b8d2f6a7c1
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "f4c9e1a7b2d8"
+down_revision = "e3b8d2f6a7c1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("import_job_statuses", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("runner_id", sa.Unicode(length=128), nullable=True))
+        batch_op.add_column(sa.Column("heartbeat", sa.DateTime(), nullable=True))
+
+    op.create_table(
+        "import_job_items",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("import_job_id", sa.Integer(), nullable=False),
+        sa.Column("url", sa.UnicodeText(), nullable=False),
+        sa.Column("title", sa.UnicodeText(), nullable=True),
+        sa.Column("add_date", sa.DateTime(), nullable=True),
+        sa.Column("folder_path", sa.JSON(), nullable=True),
+        sa.Column("tags", sa.JSON(), nullable=True),
+        sa.Column("state", sa.Unicode(length=16), nullable=False),
+        sa.Column("error_class", sa.Unicode(length=64), nullable=True),
+        sa.Column("error", sa.UnicodeText(), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["import_job_id"], ["import_job_statuses.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_import_job_items_job_state",
+        "import_job_items",
+        ["import_job_id", "state", "id"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index("ix_import_job_items_job_state", table_name="import_job_items")
+    op.drop_table("import_job_items")
+
+    with op.batch_alter_table("import_job_statuses", schema=None) as batch_op:
+        batch_op.drop_column("heartbeat")
+        batch_op.drop_column("runner_id")
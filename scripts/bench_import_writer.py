@@ -0,0 +1,145 @@
+"""
+Measure import write throughput: one commit per mark vs batched writes.
+
+Generates synthetic extracted marks (title, description, a few KB of HTML
+and five tags drawn from a small vocabulary, like real keyword tags) and
+saves them twice for a dedicated ``bench-import`` user:
+
+* ``per-mark``  - ``insert_imported_mark``, one ORM insert and commit per
+  mark, the path every import worker used to take
+* ``batched``   - ``write_marks`` in batches of ``--batch-size``, the path
+  ``MarkWriter`` takes
+
+Usage (against a scratch database migrated to head; SQLite works too):
+
+    python scripts/bench_import_writer.py --database-url postgresql://.../bench \\
+        --marks 5000 --batch-size 200
+
+Everything the run creates is removed again unless ``--keep`` is given.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import text  # noqa: E402
+
+from flaskmarks import create_app  # noqa: E402
+from flaskmarks.core.extensions import db  # noqa: E402
+from flaskmarks.core.import_writer import write_marks  # noqa: E402
+from flaskmarks.core.marks_import_thread import insert_imported_mark  # noqa: E402
+from flaskmarks.models import User  # noqa: E402
+
+BENCH_USERNAME = 'bench-import'
+TAG_PREFIX = 'bench-import-'
+WORDS = ['python', 'postgres', 'flask', 'indexing', 'caching', 'asyncio',
+         'search', 'vectors', 'queues', 'parsing', 'http', 'sqlite']
+
+
+def _config(database_url: str) -> type:
+    class BenchConfig:
+        SECRET_KEY = 'bench'
+        SQLALCHEMY_DATABASE_URI = database_url
+        CLICK_BUFFER_ENABLED = False
+
+    return BenchConfig
+
+
+def records(label: str, count: int) -> list[dict[str, Any]]:
+    """Synthetic extracted marks shaped like ``extract_metadata`` output."""
+    return [
+        {
+            'type': 'bookmark',
+            'url': f'https://bench.example/{label}/{n}',
+            'title': f'Bench import {n} about {WORDS[n % len(WORDS)]}',
+            'description': f'Notes on {WORDS[n % 5]} and {WORDS[n % 7]}',
+            'full_html': '<p>' + (WORDS[n % 3] + ' ') * 600 + '</p>',
+            'tags': [TAG_PREFIX + WORDS[(n + k) % len(WORDS)] for k in range(5)],
+        }
+        for n in range(count)
+    ]
+
+
+def per_mark(user_id: int, batch: list[dict[str, Any]], _batch_size: int) -> None:
+    for record in batch:
+        insert_imported_mark(user_id, record)
+
+
+def batched(user_id: int, batch: list[dict[str, Any]], batch_size: int) -> None:
+    for start in range(0, len(batch), batch_size):
+        write_marks(user_id, batch[start:start + batch_size])
+
+
+def get_user() -> User:
+    user = User.query.filter_by(username=BENCH_USERNAME).first()
+    if user is None:
+        user = User()
+        user.username = BENCH_USERNAME
+        user.email = 'bench-import@example.invalid'
+        user.password = '!'
+        db.session.add(user)
+        db.session.commit()
+    return user
+
+
+def cleanup(user: User) -> None:
+    """Remove the bench user's marks, links, stats and tags."""
+    params = {'owner': user.id, 'prefix': TAG_PREFIX + '%'}
+    db.session.execute(text(
+        "DELETE FROM marks_tags WHERE left_id IN (SELECT id FROM marks WHERE owner_id = :owner)"
+    ), params)
+    db.session.execute(text("DELETE FROM mark_stats WHERE owner_id = :owner"), params)
+    db.session.execute(text("DELETE FROM marks WHERE owner_id = :owner"), params)
+    db.session.execute(text("DELETE FROM tags WHERE title LIKE :prefix"), params)
+    db.session.execute(text("DELETE FROM users WHERE id = :owner"), params)
+    db.session.commit()
+
+
+def measure(
+    label: str,
+    write: Callable[[int, list[dict[str, Any]], int], None],
+    user: User,
+    count: int,
+    batch_size: int,
+) -> float:
+    batch = records(label, count)
+    started = time.perf_counter()
+    write(user.id, batch, batch_size)
+    elapsed = time.perf_counter() - started
+    rate = count / elapsed if elapsed else float('inf')
+    print(f'{label:<10} {count:>7} marks  {elapsed:8.2f} s  {rate:9.1f} marks/s')
+    return rate
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--database-url', required=True,
+                        help='URL of a scratch database migrated to head')
+    parser.add_argument('--marks', type=int, default=2000,
+                        help='Marks written per strategy (default: 2000)')
+    parser.add_argument('--batch-size', type=int, default=200,
+                        help='Marks per batched transaction (default: 200)')
+    parser.add_argument('--keep', action='store_true', help='Keep the written rows')
+    args = parser.parse_args(argv)
+
+    app = create_app(_config(args.database_url))
+    with app.app_context():
+        user = get_user()
+        try:
+            slow = measure('per-mark', per_mark, user, args.marks, args.batch_size)
+            fast = measure('batched', batched, user, args.marks, args.batch_size)
+            print(f'speedup    {fast / slow:.1f}x')
+        finally:
+            if not args.keep:
+                cleanup(user)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
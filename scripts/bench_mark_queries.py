@@ -0,0 +1,266 @@
+"""
+EXPLAIN (ANALYZE, BUFFERS) every User mark query against a seeded dataset.
+
+Runs the real ``User`` query methods, captures the SQL they emit and
+re-runs each statement under ``EXPLAIN``. Plans that stop using the sort
+indexes (a ``Sort`` or ``Seq Scan`` node over ``marks``/``mark_stats``)
+show up as a jump in execution time and shared buffers read.
+
+Usage (against a scratch PostgreSQL database migrated to head):
+
+    FLASK_APP=run.py flask db upgrade
+    python scripts/bench_mark_queries.py --database-url postgresql://.../bench \\
+        --marks 200000 --seed
+
+The seeded rows belong to a dedicated ``bench`` user and are removed again
+unless ``--keep`` is given.
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import event, or_, text  # noqa: E402
+
+from flaskmarks import create_app  # noqa: E402
+from flaskmarks.core.extensions import db  # noqa: E402
+from flaskmarks.models import Mark, User  # noqa: E402
+
+BENCH_USERNAME = 'bench'
+BENCH_TAG = 'bench-tag'
+
+_EXECUTION_TIME = re.compile(r'Execution Time: ([\d.]+) ms')
+_SHARED_BUFFERS = re.compile(r'Buffers: shared hit=(\d+)(?: read=(\d+))?')
+
+
+def _config(database_url: str) -> type:
+    class BenchConfig:
+        SECRET_KEY = 'bench'
+        SQLALCHEMY_DATABASE_URI = database_url
+        CLICK_BUFFER_ENABLED = False
+
+    return BenchConfig
+
+
+def seed(marks: int, clicked_ratio: float) -> User:
+    """
+    Insert a bench user with ``marks`` marks, stats and one tag.
+
+    Rows are generated server-side with ``generate_series`` so seeding a few
+    hundred thousand marks takes seconds.
+    """
+    user = User.query.filter_by(username=BENCH_USERNAME).first()
+    if user is None:
+        user = User()
+        user.username = BENCH_USERNAME
+        user.email = 'bench@example.invalid'
+        user.password = '!'
+        user.per_page = 50
+        db.session.add(user)
+        db.session.commit()
+
+    params = {'owner': user.id, 'n': marks, 'ratio': clicked_ratio}
+    db.session.execute(text(
+        "INSERT INTO marks (owner_id, type, title, url, description, full_html, "
+        "                   created, updated) "
+        "SELECT :owner, 'bookmark', "
+        "       'Bench mark ' || g || ' about ' || w.words[1 + g % 8], "
+        "       'https://bench.example/' || :owner || '/' || g, "
+        "       'Notes on ' || w.words[1 + g % 5] || ' and ' || w.words[1 + g % 7], "
+        "       '<p>' || repeat(w.words[1 + g % 3] || ' ' || w.words[1 + g % 8] || ' ', 200) || '</p>', "
+        "       now() - (g || ' minutes')::interval, "
+        "       CASE WHEN g % 3 = 0 THEN now() - (g || ' seconds')::interval END "
+        "FROM generate_series(1, :n) AS g, "
+        "     (SELECT ARRAY['python', 'postgres', 'flask', 'indexing', "
+        "                   'caching', 'asyncio', 'search', 'vectors'] AS words) AS w"
+    ), params)
+    db.session.execute(text(
+        "INSERT INTO mark_stats (mark_id, owner_id, clicks, last_clicked) "
+        "SELECT m.id, m.owner_id, "
+        "       CASE WHEN random() < :ratio THEN 1 + (random() * 500)::int ELSE 0 END, "
+        "       NULL "
+        "FROM marks m LEFT JOIN mark_stats s ON s.mark_id = m.id "
+        "WHERE m.owner_id = :owner AND s.mark_id IS NULL"
+    ), params)
+    db.session.execute(text(
+        "UPDATE mark_stats SET last_clicked = now() - (random() * interval '365 days') "
+        "WHERE owner_id = :owner AND clicks > 0"
+    ), params)
+
+    tag_id = db.session.execute(
+        text("SELECT id FROM tags WHERE title = :title"), {'title': BENCH_TAG}
+    ).scalar()
+    if tag_id is None:
+        tag_id = db.session.execute(
+            text("INSERT INTO tags (title) VALUES (:title) RETURNING id"),
+            {'title': BENCH_TAG},
+        ).scalar()
+    db.session.execute(text(
+        "INSERT INTO marks_tags (left_id, right_id) "
+        "SELECT id, :tag FROM marks WHERE owner_id = :owner AND id % 10 = 0"
+    ), {**params, 'tag': tag_id})
+
+    db.session.commit()
+    db.session.execute(text("ANALYZE marks"))
+    db.session.execute(text("ANALYZE mark_stats"))
+    db.session.execute(text("ANALYZE marks_tags"))
+    db.session.commit()
+    return user
+
+
+def cleanup(user: User) -> None:
+    """Remove everything :func:`seed` created."""
+    params = {'owner': user.id}
+    db.session.execute(text(
+        "DELETE FROM marks_tags WHERE left_id IN (SELECT id FROM marks WHERE owner_id = :owner)"
+    ), params)
+    db.session.execute(text("DELETE FROM mark_stats WHERE owner_id = :owner"), params)
+    db.session.execute(text("DELETE FROM marks WHERE owner_id = :owner"), params)
+    db.session.execute(text("DELETE FROM tags WHERE title = :title"), {'title': BENCH_TAG})
+    db.session.execute(text("DELETE FROM users WHERE id = :owner"), params)
+    db.session.commit()
+
+
+@contextmanager
+def captured_selects() -> Iterator[list[tuple[str, Any]]]:
+    """Collect the SELECT statements (and params) issued inside the block."""
+    statements: list[tuple[str, Any]] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def cases(
+    user: User,
+    page: int,
+    term: str,
+) -> list[tuple[str, Callable[[], Any]]]:
+    """The User query methods to explain, labelled for the report."""
+    sample_url = db.session.execute(
+        text("SELECT url FROM marks WHERE owner_id = :owner ORDER BY id DESC LIMIT 1"),
+        {'owner': user.id},
+    ).scalar()
+
+    def with_sort(sort: str) -> Callable[[], Any]:
+        def run():
+            user.sort_type = sort
+            return user.marks(page)
+        return run
+
+    return [
+        ('marks(clicks)', with_sort('clicks')),
+        ('marks(dateasc)', with_sort('dateasc')),
+        ('marks(datedesc)', with_sort('datedesc')),
+        ('marks(clicks, cursor)', lambda: user.paginate_marks(
+            user.my_marks_with_stats(), 'clicks', cursor='')),
+        ("recent_marks('added')", lambda: user.recent_marks(page, 'added')),
+        ("recent_marks('clicked')", lambda: user.recent_marks(page, 'clicked')),
+        ('q_marks_by_tag', lambda: user.q_marks_by_tag(BENCH_TAG, page)),
+        ('q_marks_by_url', lambda: user.q_marks_by_url(sample_url)),
+        # Search modes, with the old four-column LIKE scan as the baseline
+        ('search legacy LIKE', lambda: legacy_like_search(user, term).limit(50).all()),
+        ('search substring', lambda: user.q_marks_by_string(page, term, None)),
+        ('search fulltext', lambda: user.q_marks_by_fulltext(page, term)),
+        ('search fuzzy', lambda: user.q_marks_by_fuzzy(page, term[:-1] + 'x')),
+    ]
+
+
+def legacy_like_search(user: User, term: str):
+    """The pre-trigram substring search, kept for latency comparison."""
+    pattern = f'%{term}%'
+    return user.my_marks_with_stats().filter(or_(
+        Mark.title.like(pattern),
+        Mark.url.like(pattern),
+        Mark.full_html.like(pattern),
+        Mark.description.like(pattern),
+    )).order_by(Mark.clicks.desc())
+
+
+def explain(statement: str, parameters: Any) -> str:
+    """Return the text plan of ``EXPLAIN (ANALYZE, BUFFERS)`` for a statement."""
+    connection = db.session.connection()
+    rows = connection.exec_driver_sql(
+        f'EXPLAIN (ANALYZE, BUFFERS) {statement}', parameters
+    ).fetchall()
+    return '\n'.join(row[0] for row in rows)
+
+
+def summarize(plan: str) -> str:
+    time_match = _EXECUTION_TIME.search(plan)
+    buffers_match = _SHARED_BUFFERS.search(plan)
+    elapsed = f'{float(time_match.group(1)):9.3f} ms' if time_match else '        ? ms'
+    if buffers_match:
+        hit, read = buffers_match.group(1), buffers_match.group(2) or '0'
+        buffers = f'hit={hit} read={read}'
+    else:
+        buffers = 'buffers=?'
+    flags = []
+    if 'Seq Scan on marks' in plan or 'Seq Scan on mark_stats' in plan:
+        flags.append('SEQ SCAN')
+    if re.search(r'^\s*(->\s*)?Sort\b', plan, re.MULTILINE):
+        flags.append('SORT')
+    return f'{elapsed}  {buffers}  {" ".join(flags)}'.rstrip()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--database-url', required=True,
+                        help='PostgreSQL URL of a scratch database migrated to head')
+    parser.add_argument('--marks', type=int, default=100_000,
+                        help='Number of marks to seed (default: 100000)')
+    parser.add_argument('--clicked-ratio', type=float, default=0.2,
+                        help='Fraction of seeded marks with clicks (default: 0.2)')
+    parser.add_argument('--page', type=int, default=1,
+                        help='Offset page to request (default: 1)')
+    parser.add_argument('--search', default='postgres',
+                        help='Term for the search mode comparison (default: postgres)')
+    parser.add_argument('--seed', action='store_true', help='Seed the bench dataset first')
+    parser.add_argument('--keep', action='store_true', help='Keep the seeded rows')
+    parser.add_argument('--plans', action='store_true', help='Print full plans')
+    args = parser.parse_args(argv)
+
+    app = create_app(_config(args.database_url))
+    with app.app_context():
+        if db.engine.dialect.name != 'postgresql':
+            parser.error('EXPLAIN (ANALYZE, BUFFERS) requires PostgreSQL')
+
+        if args.seed:
+            user = seed(args.marks, args.clicked_ratio)
+        else:
+            user = User.query.filter_by(username=BENCH_USERNAME).first()
+            if user is None:
+                parser.error('No bench user found; run with --seed')
+
+        try:
+            for label, run in cases(user, args.page, args.search):
+                with captured_selects() as statements:
+                    run()
+                for index, (statement, parameters) in enumerate(statements, 1):
+                    plan = explain(statement, parameters)
+                    name = label if len(statements) == 1 else f'{label} #{index}'
+                    print(f'{name:<32} {summarize(plan)}')
+                    if args.plans:
+                        print(plan, end='\n\n')
+                db.session.rollback()
+        finally:
+            if args.seed and not args.keep:
+                cleanup(user)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
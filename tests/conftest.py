@@ -5,10 +5,14 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Callable
 
+import httpx
 import pytest
 from flask_login import UserMixin
 
 from flaskmarks import create_app
+from flaskmarks.core.dns_cache import dns_cache
+from flaskmarks.core.fetch_cache import fetch_cache
+from flaskmarks.core.http_client import outbound_http
 
 
 @dataclass
@@ -26,7 +30,7 @@ class FakeUser(UserMixin):
     def q_marks_by_url(self, _url):
         return None
 
-    def get_mark_by_id(self, mark_id):
+    def get_mark_by_id(self, mark_id, include_content=False):
         if int(mark_id) == self._mark.id:
             return self._mark
         return None
@@ -40,6 +44,31 @@ class FakeScopedStatus:
         return dict(self._payload)
 
 
+@pytest.fixture(autouse=True)
+def fresh_dns_cache():
+    """Tests fake DNS answers per test, so none may leak into the next."""
+    dns_cache.clear()
+    yield
+    dns_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def no_fetch_cache(monkeypatch):
+    """Apps built without TESTING enable the on-disk cache; tests opt in."""
+    monkeypatch.setattr(fetch_cache, "enabled", False)
+
+
+@pytest.fixture
+def outbound_transport(monkeypatch):
+    """Route the shared outbound client through ``httpx.MockTransport(handler)``."""
+    def install(handler):
+        outbound_http.close()
+        monkeypatch.setattr(outbound_http, "transport", httpx.MockTransport(handler))
+
+    yield install
+    outbound_http.close()
+
+
 @pytest.fixture
 def app():
     application = create_app()
@@ -1,8 +1,65 @@
 """Shared import-suite fixtures."""
 
+import socket
+
 import pytest
 
+from flaskmarks import create_app
+from flaskmarks.core import url_fetch_validation
+from flaskmarks.core.extensions import db
+from flaskmarks.models import User
+
+
+class SqliteConfig:
+    SECRET_KEY = "test-secret"
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+    TESTING = True
+    CLICK_BUFFER_ENABLED = False
+    IMPORT_FETCH_CONCURRENCY = 8
+    IMPORT_PARSE_WORKERS = 0
+    IMPORT_PER_HOST_DELAY_MS = 0
+
 
 @pytest.fixture
 def import_suite_name():
     return "import_regression"
+
+
+@pytest.fixture
+def resolve(monkeypatch):
+    """Resolve ``*.internal`` to a private address and everything else publicly."""
+    def fake_getaddrinfo(host, port, proto=None):
+        ip = "10.0.0.7" if host.endswith(".internal") else "93.184.216.34"
+        return [(socket.AF_INET, socket.SOCK_STREAM, proto, "", (ip, port or 80))]
+
+    monkeypatch.setattr(url_fetch_validation.socket, "getaddrinfo", fake_getaddrinfo)
+
+
+@pytest.fixture
+def app_config():
+    """Configuration of ``sqlite_app``; modules override it with a subclass."""
+    return SqliteConfig
+
+
+@pytest.fixture
+def sqlite_app(app_config):
+    """Application on an in-memory database with every table created."""
+    application = create_app(app_config)
+    with application.app_context():
+        db.create_all()
+    yield application
+    with application.app_context():
+        db.session.remove()
+
+
+@pytest.fixture
+def owner(sqlite_app):
+    """Id of the user the imports run for."""
+    with sqlite_app.app_context():
+        user = User()
+        user.username = "importer"
+        user.email = "importer@example.com"
+        user.password = "x"
+        db.session.add(user)
+        db.session.commit()
+        return user.id
@@ -0,0 +1,120 @@
+"""Bulk imports fetch on one event loop with per-hop SSRF validation."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from flaskmarks.core import import_pipeline
+from flaskmarks.core.extensions import db
+from flaskmarks.core.fetch_engine import AsyncFetchEngine
+from flaskmarks.core.import_pipeline import ImportPipeline
+from flaskmarks.core.url_fetch_validation import URLTargetValidationError
+from flaskmarks.models import Mark
+
+
+def _fetch_all(engine, urls):
+    async def run():
+        async with engine:
+            return await asyncio.gather(*(engine.fetch(url) for url in urls))
+
+    return asyncio.run(run())
+
+
+@pytest.mark.import_regression
+def test_fetches_overlap_beyond_the_old_thread_cap(resolve):
+    in_flight = {"now": 0, "peak": 0}
+
+    async def handler(request):
+        in_flight["now"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        await asyncio.sleep(0.05)
+        in_flight["now"] -= 1
+        return httpx.Response(200, headers={"content-type": "text/html"}, text="<p>ok</p>")
+
+    engine = AsyncFetchEngine(concurrency=50, transport=httpx.MockTransport(handler))
+    results = _fetch_all(engine, [f"https://site{n}.example/" for n in range(50)])
+
+    assert all(result.body == "<p>ok</p>" for result in results)
+    assert in_flight["peak"] == 50
+
+
+@pytest.mark.import_regression
+def test_redirect_to_private_target_is_rejected(resolve):
+    def handler(request):
+        if request.url.host == "public.example":
+            return httpx.Response(302, headers={"location": "http://admin.internal/"})
+        raise AssertionError("Private redirect target must not be requested")
+
+    engine = AsyncFetchEngine(transport=httpx.MockTransport(handler))
+
+    with pytest.raises(URLTargetValidationError, match="10.0.0.7"):
+        _fetch_all(engine, ["https://public.example/"])
+
+
+@pytest.mark.import_regression
+def test_binary_responses_are_not_downloaded(resolve):
+    engine = AsyncFetchEngine(transport=httpx.MockTransport(
+        lambda request: httpx.Response(
+            200, headers={"content-type": "application/pdf"}, content=b"%PDF" * 1000
+        )
+    ))
+
+    [result] = _fetch_all(engine, ["https://files.example/report.pdf"])
+
+    assert not result.is_text
+    assert result.content_type == "application/pdf"
+
+
+@pytest.mark.import_regression
+def test_error_pages_are_failures_not_content(resolve):
+    engine = AsyncFetchEngine(transport=httpx.MockTransport(
+        lambda request: httpx.Response(
+            int(request.url.path.strip("/")),
+            headers={"content-type": "text/html"},
+            text="<title>Not Found</title>",
+        )
+    ))
+
+    results = _fetch_all(engine, [f"https://gone.example/{status}" for status in (404, 410, 500)])
+
+    assert [(result.error, result.body) for result in results] == [
+        ("HTTP 404", None), ("HTTP 410", None), ("HTTP 500", None),
+    ]
+
+
+@pytest.mark.import_regression
+def test_pipeline_imports_new_urls_and_skips_existing(monkeypatch, resolve, sqlite_app, owner):
+    monkeypatch.setattr(import_pipeline, "is_youtube_video", lambda _url: False)
+    monkeypatch.setattr(
+        import_pipeline,
+        "extract_metadata",
+        lambda url, html: {
+            "type": "bookmark", "tags": ["example"], "url": url,
+            "title": html, "description": "", "full_html": "",
+        },
+    )
+    transport = httpx.MockTransport(lambda request: httpx.Response(
+        200, headers={"content-type": "text/html"}, text=f"Title {request.url.path}"
+    ))
+
+    with sqlite_app.app_context():
+        existing = Mark(owner)
+        existing.type = "bookmark"
+        existing.title = "already here"
+        existing.url = "https://example.com/0"
+        db.session.add(existing)
+        db.session.commit()
+
+    pipeline = ImportPipeline(
+        sqlite_app,
+        owner,
+        engine_factory=lambda: AsyncFetchEngine(transport=transport),
+    )
+    summary = pipeline.run([f"https://example.com/{n}" for n in range(4)])
+
+    assert (summary.imported, summary.skipped, summary.failed) == (3, 1, 0)
+    with sqlite_app.app_context():
+        titles = sorted(m.title for m in Mark.query.filter_by(owner_id=owner))
+        db.session.remove()
+    assert titles == ["Title /1", "Title /2", "Title /3", "already here"]
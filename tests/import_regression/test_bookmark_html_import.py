@@ -0,0 +1,97 @@
+"""Netscape bookmark exports are streamed and keep folders as tags."""
+
+from datetime import datetime
+
+import httpx
+import pytest
+
+from flaskmarks.core import import_pipeline
+from flaskmarks.core.bookmark_import import (
+    count_netscape_bookmarks,
+    iter_netscape_bookmarks,
+)
+from flaskmarks.core.extensions import db
+from flaskmarks.core.fetch_engine import AsyncFetchEngine
+from flaskmarks.core.import_pipeline import ImportPipeline
+from flaskmarks.models import Mark
+
+EXPORT = """<!DOCTYPE NETSCAPE-Bookmark-file-1>
+<META HTTP-EQUIV="Content-Type" CONTENT="text/html; charset=UTF-8">
+<TITLE>Bookmarks</TITLE>
+<H1>Bookmarks Menu</H1>
+<DL><p>
+    <DT><A HREF="https://menu.example/" ADD_DATE="1600000000">Menu &amp; more</A>
+    <DT><H3 PERSONAL_TOOLBAR_FOLDER="true">Bookmarks Toolbar</H3>
+    <DL><p>
+        <DT><H3 ADD_DATE="1600000000">Programming</H3>
+        <DL><p>
+            <DT><H3>Python</H3>
+            <DL><p>
+                <DT><A HREF="https://docs.python.org/3/" ADD_DATE="1600000000000000" TAGS="docs,reference">Python docs</A>
+                <DD>The official documentation
+                <DT><A HREF="place:sort=8&maxResults=10">Recently bookmarked</A>
+            </DL><p>
+            <DT><A HREF="http://flask.example/">Flask</A>
+        </DL><p>
+    </DL><p>
+    <DT><A HREF="https://top.example/">Top level</A>
+</DL>
+"""
+
+
+@pytest.fixture
+def export_file(tmp_path):
+    path = tmp_path / "bookmarks.html"
+    path.write_text(EXPORT, encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.import_regression
+def test_records_carry_title_date_and_folder_path(export_file):
+    # A tiny chunk size splits tags and attributes across feeds
+    records = list(iter_netscape_bookmarks(export_file, chunk_size=7))
+
+    assert [(r.url, r.title, r.folder_path, r.tags) for r in records] == [
+        ("https://menu.example/", "Menu & more", (), []),
+        ("https://docs.python.org/3/", "Python docs", ("Programming", "Python"), ["docs", "reference"]),
+        ("http://flask.example/", "Flask", ("Programming",), []),
+        ("https://top.example/", "Top level", (), []),
+    ]
+    # Seconds and microseconds since the epoch both land on the same day
+    assert records[0].add_date == datetime(2020, 9, 13, 12, 26, 40)
+    assert records[1].add_date == records[0].add_date
+    assert records[2].add_date is None
+    assert records[1].all_tags() == ["docs", "reference", "Programming", "Python"]
+    assert count_netscape_bookmarks(export_file) == len(records)
+
+
+@pytest.mark.import_regression
+def test_pipeline_keeps_bookmark_details(monkeypatch, resolve, export_file, sqlite_app, owner):
+    monkeypatch.setattr(import_pipeline, "is_youtube_video", lambda _url: False)
+    monkeypatch.setattr(
+        import_pipeline,
+        "extract_metadata",
+        lambda url, html: {
+            "type": "bookmark", "tags": ["extracted"], "url": url,
+            "title": "Page title", "description": "", "full_html": "",
+        },
+    )
+    transport = httpx.MockTransport(lambda request: httpx.Response(
+        200, headers={"content-type": "text/html"}, text="<p>page</p>"
+    ))
+
+    summary = ImportPipeline(
+        sqlite_app,
+        owner,
+        engine_factory=lambda: AsyncFetchEngine(transport=transport),
+    ).run(iter_netscape_bookmarks(export_file))
+
+    assert (summary.imported, summary.skipped, summary.failed) == (4, 0, 0)
+    with sqlite_app.app_context():
+        mark = Mark.query.filter_by(url="https://docs.python.org/3/").one()
+        assert mark.title == "Python docs"
+        assert mark.created == datetime(2020, 9, 13, 12, 26, 40)
+        assert sorted(t.title for t in mark.tags) == [
+            "docs", "extracted", "programming", "python", "reference",
+        ]
+        db.session.remove()
@@ -0,0 +1,93 @@
+"""Firefox and Chromium JSON bookmark files are read incrementally."""
+
+import json
+from datetime import datetime
+
+import pytest
+
+from flaskmarks.core.bookmark_import import (
+    count_json_bookmarks,
+    iter_json_bookmarks,
+    sniff_bookmark_format,
+)
+
+ADDED = datetime(2020, 9, 13, 12, 26, 40)
+
+FIREFOX = {
+    "guid": "root________", "title": "", "type": "text/x-moz-place-container",
+    "root": "placesRoot", "children": [{
+        "guid": "toolbar_____", "title": "toolbar",
+        "type": "text/x-moz-place-container", "root": "toolbarFolder",
+        "children": [
+            {
+                "title": "Programming", "type": "text/x-moz-place-container",
+                "children": [
+                    {
+                        "title": "Python docs", "type": "text/x-moz-place",
+                        "uri": "https://docs.python.org/3/", "dateAdded": 1600000000000000,
+                        "tags": "docs,reference",
+                        "annos": [{"name": "bookmarkProperties/description", "value": "x"}],
+                    },
+                    {"title": "Recent", "type": "text/x-moz-place", "uri": "place:sort=8"},
+                ],
+            },
+            {"title": "Top", "type": "text/x-moz-place", "uri": "https://top.example/"},
+        ],
+    }],
+}
+
+# Chromium sorts keys, so a folder's children come before its name
+CHROMIUM = {
+    "checksum": "0", "version": 1, "roots": {
+        "bookmark_bar": {
+            "children": [
+                {
+                    "children": [{
+                        "date_added": "13244473600000000", "name": "Flask",
+                        "type": "url", "url": "https://flask.example/",
+                    }],
+                    "name": "Web", "type": "folder",
+                },
+                {"name": "Bar link", "type": "url", "url": "https://bar.example/"},
+            ],
+            "name": "Bookmarks bar", "type": "folder",
+        },
+        "other": {"children": [], "name": "Other bookmarks", "type": "folder"},
+    },
+}
+
+
+def _write(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.import_regression
+def test_firefox_backup_maps_containers_to_folder_path(tmp_path):
+    path = _write(tmp_path, "bookmarks-2026-10-16.json", FIREFOX)
+
+    records = list(iter_json_bookmarks(path))
+
+    assert sniff_bookmark_format(path) == "json"
+    assert [(r.url, r.title, r.folder_path, r.tags) for r in records] == [
+        ("https://docs.python.org/3/", "Python docs", ("Programming",), ["docs", "reference"]),
+        ("https://top.example/", "Top", (), []),
+    ]
+    assert records[0].add_date == ADDED
+    assert count_json_bookmarks(path) == 2
+
+
+@pytest.mark.import_regression
+def test_chromium_profile_file_uses_folder_names_written_after_children(tmp_path):
+    path = _write(tmp_path, "Bookmarks", CHROMIUM)
+
+    records = list(iter_json_bookmarks(path))
+
+    assert [(r.url, r.title, r.folder_path) for r in records] == [
+        ("https://flask.example/", "Flask", ("Web",)),
+        ("https://bar.example/", "Bar link", ()),
+    ]
+    # Microseconds since 1601-01-01
+    assert records[0].add_date == ADDED
+    assert records[1].add_date is None
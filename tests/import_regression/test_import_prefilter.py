@@ -0,0 +1,86 @@
+"""Imports drop duplicate and already bookmarked URLs before any fetch."""
+
+import pytest
+from sqlalchemy import event
+
+from flaskmarks.core.extensions import db
+from flaskmarks.core.import_pipeline import ImportPipeline
+from flaskmarks.core.url_normalize import normalize_url
+from flaskmarks.models import Mark
+
+
+@pytest.fixture
+def known(sqlite_app, owner):
+    with sqlite_app.app_context():
+        for url in ["https://example.com/kept", "HTTPS://Example.com/as-written#top"]:
+            mark = Mark(owner)
+            mark.type = "bookmark"
+            mark.title = url
+            mark.url = url
+            db.session.add(mark)
+        db.session.commit()
+    return sqlite_app, owner
+
+
+@pytest.mark.import_regression
+def test_normalize_url_canonicalises_equivalent_spellings():
+    assert normalize_url(" HTTPS://Example.COM:443#frag") == "https://example.com/"
+    assert normalize_url("http://example.com:8080/Path?q=1") == "http://example.com:8080/Path?q=1"
+    assert normalize_url("javascript:alert(1)") is None
+    assert normalize_url("not a url") is None
+
+
+@pytest.mark.import_regression
+def test_new_urls_dedupes_in_memory_and_checks_the_database_in_bulk(known):
+    application, user_id = known
+    urls = (
+        ["https://example.com/kept", "https://EXAMPLE.com/kept#again"]
+        + ["HTTPS://Example.com/as-written#top"]
+        + [f"https://example.com/new/{n}" for n in range(2500)]
+        + ["https://example.com/new/0", "ftp://example.com/file", ""]
+    )
+    statements = []
+
+    def capture(_conn, _cursor, statement, *_args):
+        statements.append(statement)
+
+    with application.app_context():
+        event.listen(db.engine, "before_cursor_execute", capture)
+        try:
+            new = ImportPipeline(application, user_id).new_urls(urls)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", capture)
+
+    assert new == [f"https://example.com/new/{n}" for n in range(2500)]
+    # Roughly 2500 distinct candidates in chunks of 1000, not one per URL
+    assert len(statements) <= 4
+
+
+@pytest.mark.import_regression
+def test_new_urls_keep_fragments_and_case_as_written(known):
+    application, user_id = known
+    urls = [
+        " https://App.example.com/#/inbox ",
+        "https://app.example.com/#/settings",
+        "https://example.com/guide#Install",
+    ]
+
+    with application.app_context():
+        new = ImportPipeline(application, user_id).new_urls(urls)
+
+    # One normalised key per page, but the first spelling is what is saved
+    assert new == ["https://App.example.com/#/inbox", "https://example.com/guide#Install"]
+
+
+@pytest.mark.import_regression
+def test_reimporting_known_urls_never_reaches_the_network(known):
+    application, user_id = known
+
+    def no_engine():
+        raise AssertionError("Nothing new to fetch")
+
+    summary = ImportPipeline(application, user_id, engine_factory=no_engine).run(
+        ["https://example.com/kept", "https://example.com/kept#dupe"]
+    )
+
+    assert (summary.imported, summary.skipped) == (0, 2)
@@ -0,0 +1,146 @@
+"""Import progress is written in coalesced batches and pushed as events."""
+
+import json
+
+import httpx
+import pytest
+from sqlalchemy import event
+
+from flaskmarks.core import import_pipeline, import_writer
+from flaskmarks.core.extensions import db
+from flaskmarks.core.fetch_engine import AsyncFetchEngine
+from flaskmarks.core.import_job_status_service import (
+    complete_import_job,
+    create_or_reset_import_job,
+    get_import_job_status,
+)
+from flaskmarks.core.import_pipeline import ImportPipeline
+from flaskmarks.core.import_progress import ImportProgress, import_progress_events
+
+from .conftest import SqliteConfig
+
+
+class ProgressConfig(SqliteConfig):
+    IMPORT_PROGRESS_FLUSH_ITEMS = 10
+    IMPORT_PROGRESS_FLUSH_SECONDS = 3600
+
+
+@pytest.fixture
+def app_config():
+    return ProgressConfig
+
+
+@pytest.mark.import_regression
+def test_progress_is_flushed_every_n_urls(monkeypatch, resolve, sqlite_app, owner):
+    monkeypatch.setattr(import_pipeline, "is_youtube_video", lambda _url: False)
+    monkeypatch.setattr(
+        import_pipeline,
+        "extract_metadata",
+        lambda url, html: {
+            "type": "bookmark", "tags": [], "url": url,
+            "title": url, "description": "", "full_html": "",
+        },
+    )
+
+    def handler(request):
+        if request.url.path.endswith("7"):
+            return httpx.Response(404)
+        return httpx.Response(200, headers={"content-type": "text/html"}, text="ok")
+
+    urls = [f"https://example.com/{n}" for n in range(25)]
+    with sqlite_app.app_context():
+        create_or_reset_import_job(owner, "job", total_lines=len(urls))
+        engine = db.engine
+
+    progress_writes = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE import_job_statuses SET status"):
+            progress_writes.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        summary = ImportPipeline(
+            sqlite_app,
+            owner,
+            "job",
+            engine_factory=lambda: AsyncFetchEngine(transport=httpx.MockTransport(handler)),
+        ).run(urls)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    assert (summary.imported, summary.failed) == (23, 2)
+    # Two full batches of ten plus the remainder when the run ends
+    assert len(progress_writes) == 3
+    with sqlite_app.app_context():
+        job = get_import_job_status(owner, "job")
+        assert (job.status, job.failed) == (25, 2)
+
+
+@pytest.mark.import_regression
+def test_marks_that_fail_to_save_count_as_failed(monkeypatch, resolve, sqlite_app, owner):
+    monkeypatch.setattr(import_pipeline, "is_youtube_video", lambda _url: False)
+    monkeypatch.setattr(
+        import_pipeline,
+        "extract_metadata",
+        lambda url, html: {
+            "type": "bookmark", "tags": [], "url": url,
+            "title": url, "description": "", "full_html": "",
+        },
+    )
+    real_write = import_writer.write_marks
+
+    def write_marks(owner_id, records):
+        if any(record["url"].endswith("/3") for record in records):
+            raise ValueError("unsaveable")
+        return real_write(owner_id, records)
+
+    monkeypatch.setattr(import_writer, "write_marks", write_marks)
+    urls = [f"https://example.com/{n}" for n in range(5)]
+    with sqlite_app.app_context():
+        create_or_reset_import_job(owner, "job", total_lines=len(urls))
+
+    summary = ImportPipeline(
+        sqlite_app,
+        owner,
+        "job",
+        engine_factory=lambda: AsyncFetchEngine(transport=httpx.MockTransport(
+            lambda _request: httpx.Response(200, headers={"content-type": "text/html"}, text="ok")
+        )),
+    ).run(urls)
+
+    assert (summary.imported, summary.failed) == (4, 1)
+    with sqlite_app.app_context():
+        job = get_import_job_status(owner, "job")
+        assert (job.status, job.failed) == (5, 1)
+
+
+@pytest.mark.import_regression
+def test_event_stream_reports_unflushed_progress_until_complete(sqlite_app, owner):
+    with sqlite_app.app_context():
+        create_or_reset_import_job(owner, "job", total_lines=10)
+        progress = ImportProgress(owner, "job", flush_items=100)
+        progress.open()
+        progress.advance(4, failed=1)
+
+        events = import_progress_events(owner, "job", interval=0)
+        first = next(events)
+
+        assert first.startswith("event: progress\n")
+        data = json.loads(first.split("data: ", 1)[1])
+        assert (data["status"], data["failed"], data["complete"]) == (4, 1, False)
+        assert get_import_job_status(owner, "job").status == 0
+
+        progress.close()
+        complete_import_job(owner, "job")
+        last = json.loads(next(events).split("data: ", 1)[1])
+
+        assert (last["status"], last["failed"], last["complete"]) == (4, 1, True)
+        assert next(events, None) is None
+
+
+@pytest.mark.import_regression
+def test_only_one_caller_is_told_to_flush():
+    progress = ImportProgress(1, "job", flush_items=2)
+
+    assert [progress.advance() for _ in range(4)] == [False, True, False, False]
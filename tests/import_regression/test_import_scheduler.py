@@ -0,0 +1,97 @@
+"""Per-host politeness: round-robin hosts, concurrency caps and Retry-After."""
+
+import asyncio
+import time
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from flaskmarks.core.fetch_engine import parse_retry_after
+from flaskmarks.core.import_scheduler import HostScheduler, host_key
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.mark.import_regression
+def test_host_key_groups_subdomains_by_registrable_domain():
+    assert host_key("https://gist.github.com/a") == host_key("https://www.github.com/b")
+    assert host_key("http://127.0.0.1:8000/") == "127.0.0.1"
+
+
+@pytest.mark.import_regression
+def test_hosts_are_interleaved_and_capped():
+    async def scenario():
+        scheduler = HostScheduler(per_host_concurrency=1, min_delay=0)
+        for url in [
+            "https://github.com/1", "https://github.com/2", "https://github.com/3",
+            "https://youtube.com/1", "https://medium.com/1",
+        ]:
+            await scheduler.add(url)
+        await scheduler.close()
+
+        first = [await scheduler.acquire() for _ in range(3)]
+        # github.com is at its cap until its URL is released
+        blocked = asyncio.ensure_future(scheduler.acquire())
+        await asyncio.sleep(0.05)
+        assert not blocked.done()
+
+        await scheduler.release(first[0])
+        second = await asyncio.wait_for(blocked, 1)
+        return [item.host for item in first], second.url
+
+    hosts, next_url = _run(scenario())
+
+    assert hosts == ["github.com", "youtube.com", "medium.com"]
+    assert next_url == "https://github.com/2"
+
+
+@pytest.mark.import_regression
+def test_min_delay_spaces_requests_to_one_host():
+    async def scenario():
+        scheduler = HostScheduler(per_host_concurrency=5, min_delay=0.2)
+        await scheduler.add("https://example.com/1")
+        await scheduler.add("https://example.com/2")
+        await scheduler.close()
+        await scheduler.acquire()
+        started = time.monotonic()
+        await scheduler.acquire()
+        return time.monotonic() - started
+
+    assert _run(scenario()) >= 0.18
+
+
+@pytest.mark.import_regression
+def test_rate_limited_url_is_retried_after_retry_after_then_given_up():
+    async def scenario():
+        scheduler = HostScheduler(min_delay=0, max_retries=1)
+        await scheduler.add("https://busy.example/page")
+        await scheduler.close()
+
+        item = await scheduler.acquire()
+        assert await scheduler.release(item, rate_limited=True, retry_after=0.2)
+        started = time.monotonic()
+        retried = await scheduler.acquire()
+        waited = time.monotonic() - started
+
+        requeued = await scheduler.release(retried, rate_limited=True, retry_after=0)
+        return retried.url, waited, requeued, await scheduler.acquire()
+
+    url, waited, requeued, drained = _run(scenario())
+
+    assert url == "https://busy.example/page"
+    assert waited >= 0.18
+    assert requeued is False
+    assert drained is None
+
+
+@pytest.mark.import_regression
+def test_parse_retry_after_accepts_seconds_and_http_dates():
+    later = datetime.now(timezone.utc) + timedelta(seconds=120)
+
+    assert parse_retry_after("30") == 30
+    assert 100 < parse_retry_after(format_datetime(later, usegmt=True)) <= 120
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
@@ -0,0 +1,75 @@
+"""Large text imports are streamed through a bounded window."""
+
+import httpx
+import pytest
+
+from flaskmarks.core import import_pipeline
+from flaskmarks.core.bookmark_import import count_url_lines, iter_url_lines
+from flaskmarks.core.extensions import db
+from flaskmarks.core.fetch_engine import AsyncFetchEngine
+from flaskmarks.core.import_pipeline import ImportPipeline
+from flaskmarks.models import Mark
+
+from .conftest import SqliteConfig
+
+
+class WindowConfig(SqliteConfig):
+    IMPORT_FETCH_CONCURRENCY = 2
+
+
+@pytest.fixture
+def app_config():
+    return WindowConfig
+
+
+@pytest.mark.import_regression
+def test_url_lines_are_counted_and_streamed(tmp_path):
+    path = tmp_path / "urls.txt"
+    path.write_text("https://a.example/\n\n   \nhttps://b.example/  \nhttps://c.example/")
+
+    assert count_url_lines(str(path)) == 3
+    assert list(iter_url_lines(str(path))) == [
+        "https://a.example/", "https://b.example/", "https://c.example/",
+    ]
+
+
+@pytest.mark.import_regression
+def test_input_is_read_only_as_fast_as_the_workers_drain_it(
+    monkeypatch, resolve, sqlite_app, owner
+):
+    monkeypatch.setattr(import_pipeline, "PREFILTER_CHUNK_SIZE", 10)
+    monkeypatch.setattr(import_pipeline, "is_youtube_video", lambda _url: False)
+    monkeypatch.setattr(
+        import_pipeline,
+        "extract_metadata",
+        lambda url, html: {
+            "type": "bookmark", "tags": [], "url": url,
+            "title": url, "description": "", "full_html": "",
+        },
+    )
+
+    read = {"lines": 0, "at_first_fetch": None}
+
+    def lines():
+        for n in range(200):
+            read["lines"] += 1
+            # every third line repeats an earlier URL
+            yield f"https://site{n % 150}.example/"
+
+    def handler(request):
+        if read["at_first_fetch"] is None:
+            read["at_first_fetch"] = read["lines"]
+        return httpx.Response(200, headers={"content-type": "text/html"}, text="ok")
+
+    summary = ImportPipeline(
+        sqlite_app,
+        owner,
+        engine_factory=lambda: AsyncFetchEngine(transport=httpx.MockTransport(handler)),
+    ).run(lines())
+
+    # Only the first pre-filter chunk had been read when fetching started
+    assert read["at_first_fetch"] <= 10
+    assert (summary.imported, summary.skipped, summary.failed) == (150, 50, 0)
+    with sqlite_app.app_context():
+        assert Mark.query.filter_by(owner_id=owner).count() == 150
+        db.session.remove()
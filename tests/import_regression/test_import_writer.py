@@ -0,0 +1,89 @@
+"""Imported marks are written in batches with bulk tag resolution."""
+
+import pytest
+from sqlalchemy import event
+
+from flaskmarks.core import import_writer
+from flaskmarks.core.extensions import db
+from flaskmarks.core.import_writer import MarkWriter, write_marks
+from flaskmarks.models import Mark, MarkStats, Tag
+
+
+def _record(n, tags=("python", "Flask")):
+    return {
+        "type": "bookmark", "url": f"https://example.com/{n}", "title": f"Page {n}",
+        "description": "", "full_html": "<p>body</p>", "tags": list(tags),
+    }
+
+
+@pytest.mark.import_regression
+def test_write_marks_uses_a_fixed_number_of_statements(sqlite_app, owner):
+    statements = []
+
+    def capture(_conn, _cursor, statement, *_args):
+        statements.append(statement)
+
+    with sqlite_app.app_context():
+        db.session.add(Tag("python"))
+        db.session.commit()
+        event.listen(db.engine, "before_cursor_execute", capture)
+        try:
+            ids = write_marks(owner, [_record(n) for n in range(50)])
+        finally:
+            event.remove(db.engine, "before_cursor_execute", capture)
+
+        marks = Mark.query.filter(Mark.id.in_(ids)).all()
+        assert len(marks) == 50
+        assert all(sorted(t.title for t in m.tags) == ["flask", "python"] for m in marks)
+        assert Tag.query.filter_by(title="python").count() == 1
+        assert MarkStats.query.filter_by(owner_id=owner).count() == 50
+
+    # tag select + tag insert + marks insert + id lookup + mark_stats +
+    # marks_tags + job items, whatever the batch size
+    assert len([s for s in statements if "marks_tags" in s]) == 1
+    assert len([s for s in statements if s.startswith("INSERT INTO marks ")]) == 1
+    assert len(statements) <= 8
+
+
+@pytest.mark.import_regression
+def test_write_marks_returns_ids_in_record_order(sqlite_app, owner):
+    records = [_record(3), _record(1), _record(3, tags=("other",)), _record(2)]
+    records[2]["title"] = "Second copy"
+
+    with sqlite_app.app_context():
+        write_marks(owner, [_record(1)])
+        ids = write_marks(owner, records)
+
+        written = [db.session.get(Mark, mark_id) for mark_id in ids]
+        assert [(m.url, m.title) for m in written] == [
+            (r["url"], r["title"]) for r in records
+        ]
+        assert len(set(ids)) == 4
+
+
+@pytest.mark.import_regression
+def test_writer_batches_records_and_isolates_bad_rows(monkeypatch, sqlite_app, owner):
+    batch_sizes = []
+    real_write = import_writer.write_marks
+
+    def spy(owner_id, records):
+        batch_sizes.append(len(records))
+        return real_write(owner_id, records)
+
+    monkeypatch.setattr(import_writer, "write_marks", spy)
+
+    writer = MarkWriter(sqlite_app, owner, batch_size=4, flush_interval=5)
+    writer.start()
+    for n in range(7):
+        writer.put(_record(n))
+    broken = _record(99)
+    broken["url"] = None
+    writer.put(broken)
+    writer.close()
+
+    assert (writer.written, writer.failed) == (7, 1)
+    # Two full batches; the one with the bad row is retried mark by mark
+    assert batch_sizes[:2] == [4, 4]
+    assert batch_sizes[2:] == [1, 1, 1, 1]
+    with sqlite_app.app_context():
+        assert Mark.query.filter_by(owner_id=owner).count() == 7
@@ -0,0 +1,122 @@
+"""Job-backed imports checkpoint every URL and resume where they stopped."""
+
+import httpx
+import pytest
+
+from flaskmarks.core import import_pipeline
+from flaskmarks.core.extensions import db
+from flaskmarks.core.fetch_engine import AsyncFetchEngine
+from flaskmarks.core.import_job_status_service import (
+    claim_import_job,
+    create_or_reset_import_job,
+    find_resumable_import_jobs,
+    get_import_job_status,
+    retry_failed_import_items,
+)
+from flaskmarks.core.import_pipeline import ImportPipeline
+from flaskmarks.models import ImportJobItem, Mark
+
+URLS = [f"https://example.com/{n}" for n in range(5)]
+
+
+@pytest.fixture
+def application(monkeypatch, resolve, sqlite_app, owner):
+    monkeypatch.setattr(import_pipeline, "is_youtube_video", lambda _url: False)
+    monkeypatch.setattr(
+        import_pipeline,
+        "extract_metadata",
+        lambda url, html: {
+            "type": "bookmark", "tags": [], "url": url,
+            "title": html, "description": "", "full_html": "",
+        },
+    )
+    with sqlite_app.app_context():
+        sqlite_app.config["TEST_USER_ID"] = owner
+        create_or_reset_import_job(owner, "job", total_lines=len(URLS))
+    return sqlite_app
+
+
+def _pipeline(application, handler):
+    return ImportPipeline(
+        application,
+        application.config["TEST_USER_ID"],
+        "job",
+        engine_factory=lambda: AsyncFetchEngine(transport=httpx.MockTransport(handler)),
+    )
+
+
+def _states(application):
+    with application.app_context():
+        job = get_import_job_status(application.config["TEST_USER_ID"], "job")
+        return ImportJobItem.state_counts(job.id)
+
+
+def _ok(request):
+    return httpx.Response(200, headers={"content-type": "text/html"}, text=request.url.path)
+
+
+@pytest.mark.import_regression
+def test_interrupted_job_resumes_without_repeating_finished_urls(application):
+    user_id = application.config["TEST_USER_ID"]
+    fetched = []
+
+    def handler(request):
+        fetched.append(request.url.path)
+        return _ok(request)
+
+    pipeline = _pipeline(application, handler)
+    assert pipeline.stage(URLS) == 5
+    with application.app_context():
+        job = get_import_job_status(user_id, "job")
+        # A runner that died after saving one URL and claiming two more
+        [(done_id, _record)] = ImportJobItem.claim(job.id, 1)
+        ImportJobItem.mark_done([done_id])
+        db.session.commit()
+        ImportJobItem.claim(job.id, 2)
+        assert find_resumable_import_jobs(stale_after=60) == [(user_id, "job")]
+
+    summary = pipeline.resume()
+
+    assert summary.imported == 4
+    assert sorted(fetched) == ["/1", "/2", "/3", "/4"]
+    assert _states(application) == {ImportJobItem.DONE: 5}
+    with application.app_context():
+        assert find_resumable_import_jobs(stale_after=60) == []
+
+
+@pytest.mark.import_regression
+def test_failed_urls_keep_their_error_class_and_can_be_retried(application):
+    user_id = application.config["TEST_USER_ID"]
+
+    def flaky(request):
+        if request.url.path == "/3":
+            raise httpx.ConnectTimeout("timed out", request=request)
+        return _ok(request)
+
+    summary = _pipeline(application, flaky).run(URLS)
+
+    assert (summary.imported, summary.failed) == (4, 1)
+    with application.app_context():
+        failed = ImportJobItem.query.filter_by(state=ImportJobItem.FAILED).one()
+        assert (failed.url, failed.error_class) == ("https://example.com/3", "ConnectTimeout")
+        assert retry_failed_import_items(user_id, "job", error_class="HTTP 404") == 0
+        assert retry_failed_import_items(user_id, "job", error_class="ConnectTimeout") == 1
+        assert not get_import_job_status(user_id, "job").complete
+
+    summary = _pipeline(application, _ok).resume()
+
+    assert (summary.imported, summary.failed) == (1, 0)
+    assert _states(application) == {ImportJobItem.DONE: 5}
+    with application.app_context():
+        assert Mark.query.filter_by(owner_id=user_id).count() == 5
+
+
+@pytest.mark.import_regression
+def test_a_job_has_one_live_runner(application):
+    user_id = application.config["TEST_USER_ID"]
+    with application.app_context():
+        assert claim_import_job(user_id, "job", "host:1", stale_after=60)
+        assert not claim_import_job(user_id, "job", "host:2", stale_after=60)
+        assert claim_import_job(user_id, "job", "host:1", stale_after=60)
+        # host:1 stopped sending heartbeats
+        assert claim_import_job(user_id, "job", "host:2", stale_after=0)
@@ -2,7 +2,41 @@
 
 import pytest
 
+from flaskmarks import create_app
+from flaskmarks.core.extensions import db
+from flaskmarks.models import User
+
+
+class SqliteConfig:
+    SECRET_KEY = "test-secret"
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+    TESTING = True
+    WTF_CSRF_ENABLED = False
+    CLICK_BUFFER_ENABLED = False
+
 
 @pytest.fixture
 def mark_crud_suite_name():
     return "mark_crud"
+
+
+@pytest.fixture
+def sqlite_app():
+    """Application on an in-memory database, its app context pushed."""
+    application = create_app(SqliteConfig)
+    with application.app_context():
+        db.create_all()
+        yield application
+        db.session.remove()
+
+
+@pytest.fixture
+def owner(sqlite_app):
+    """The user whose marks a test works with."""
+    user = User()
+    user.username = "owner"
+    user.email = "owner@example.com"
+    user.password = "x"
+    db.session.add(user)
+    db.session.commit()
+    return user
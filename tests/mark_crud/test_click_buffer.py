@@ -0,0 +1,108 @@
+"""Write-behind click buffer coalescing and flush behaviour."""
+
+import time
+from datetime import datetime
+
+import pytest
+
+from flaskmarks.core.click_buffer import ClickBuffer
+from flaskmarks.models.mark_stats import MarkStats
+
+
+@pytest.fixture
+def flushed(monkeypatch):
+    batches = []
+    monkeypatch.setattr(
+        MarkStats,
+        "apply_clicks",
+        classmethod(lambda _cls, rows: batches.append(sorted(rows, key=lambda r: r["mark_id"]))),
+    )
+    return batches
+
+
+@pytest.fixture
+def buffer(app):
+    app.config.update(CLICK_FLUSH_INTERVAL_MS=60000, CLICK_FLUSH_MAX_EVENTS=100)
+    click_buffer = ClickBuffer()
+    click_buffer.init_app(app)
+    yield click_buffer
+    click_buffer._stopped.set()
+    click_buffer._wakeup.set()
+    # Nothing left behind for the atexit flush to write to a real database
+    click_buffer._pending.clear()
+
+
+@pytest.mark.mark_crud
+def test_clicks_are_coalesced_per_mark(buffer, flushed):
+    early = datetime(2026, 1, 1, 10, 0, 0)
+    late = datetime(2026, 1, 1, 11, 0, 0)
+
+    buffer.record(1, owner_id=7, clicked_at=late)
+    buffer.record(1, owner_id=7, clicked_at=early)
+    buffer.record(2, owner_id=7, count=4, clicked_at=early)
+
+    assert buffer.pending(1, 7) == 2
+    assert flushed == []
+
+    assert buffer.flush() == 2
+    assert flushed == [[
+        {"mark_id": 1, "owner_id": 7, "count": 2, "last_clicked": late},
+        {"mark_id": 2, "owner_id": 7, "count": 4, "last_clicked": early},
+    ]]
+    assert buffer.pending(1, 7) == 0
+
+
+@pytest.mark.mark_crud
+def test_same_mark_id_from_different_owners_is_kept_apart(buffer, flushed):
+    buffer.record(1, owner_id=7)
+    buffer.record(1, owner_id=8)
+    buffer.flush()
+
+    assert sorted(row["owner_id"] for row in flushed[0]) == [7, 8]
+
+
+@pytest.mark.mark_crud
+def test_reaching_max_events_wakes_the_flusher(buffer, flushed):
+    buffer.max_events = 3
+
+    for _ in range(3):
+        buffer.record(5, owner_id=1)
+
+    deadline = time.monotonic() + 2
+    while not flushed and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert flushed and flushed[0][0]["count"] == 3
+
+
+@pytest.mark.mark_crud
+def test_disabled_buffer_writes_through(app, flushed):
+    app.config.update(CLICK_BUFFER_ENABLED=False)
+    click_buffer = ClickBuffer()
+    click_buffer.init_app(app)
+
+    click_buffer.record(3, owner_id=1)
+
+    assert len(flushed) == 1
+    assert click_buffer._thread is None
+
+
+@pytest.mark.mark_crud
+def test_shutdown_flushes_remaining_clicks(buffer, flushed):
+    buffer.record(9, owner_id=2)
+
+    buffer.shutdown()
+
+    assert flushed[-1][0]["mark_id"] == 9
+
+
+@pytest.mark.mark_crud
+def test_failed_flush_requeues_clicks(buffer, monkeypatch):
+    def failing_apply(_cls, _rows):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(MarkStats, "apply_clicks", classmethod(failing_apply))
+    buffer.record(4, owner_id=1, count=2)
+
+    assert buffer.flush() == 0
+    assert buffer.pending(4, 1) == 2
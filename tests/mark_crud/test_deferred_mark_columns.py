@@ -0,0 +1,60 @@
+"""List queries must not fetch heavy Mark columns unless a detail view asks."""
+
+import re
+
+import pytest
+
+from flaskmarks.models import Mark, User
+
+HEAVY_COLUMNS = ("full_html", "embedding", "search_vector")
+
+
+def _compiled_sql(query):
+    return str(query.statement.compile(compile_kwargs={"literal_binds": True}))
+
+
+def _selected_columns(query):
+    sql = _compiled_sql(query)
+    return sql.split(" FROM ", 1)[0]
+
+
+def _selects(selected, column):
+    return re.search(rf"\bmarks\.{column}\b", selected) is not None
+
+
+@pytest.fixture
+def user(app):
+    with app.app_context():
+        u = User()
+        u.id = 7
+        u.per_page = 50
+        u.sort_type = "clicks"
+        yield u
+
+
+@pytest.mark.mark_crud
+def test_list_query_defers_heavy_columns(user):
+    selected = _selected_columns(user.my_marks().order_by(Mark.id.desc()))
+
+    assert "marks.title" in selected
+    assert "marks.url" in selected
+    for column in HEAVY_COLUMNS:
+        assert not _selects(selected, column)
+
+
+@pytest.mark.mark_crud
+def test_tag_query_defers_heavy_columns(user):
+    selected = _selected_columns(user.my_marks().filter(Mark.tags.any(title="python")))
+
+    for column in HEAVY_COLUMNS:
+        assert not _selects(selected, column)
+
+
+@pytest.mark.mark_crud
+def test_detail_options_load_article_body_only(user):
+    query = user.my_marks().filter(Mark.id == 1).options(*Mark.content_options())
+    selected = _selected_columns(query)
+
+    assert _selects(selected, "full_html")
+    assert not _selects(selected, "embedding")
+    assert not _selects(selected, "search_vector")
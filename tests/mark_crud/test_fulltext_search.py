@@ -0,0 +1,66 @@
+"""Web search uses the stored search_vector and ranks with ts_rank_cd."""
+
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from flaskmarks.core.search_backend import PostgresSearchBackend
+from flaskmarks.models import Mark, User
+from flaskmarks.models import user as user_module
+
+
+def _compiled(query):
+    return str(query.statement.compile(dialect=postgresql.dialect()))
+
+
+@pytest.mark.mark_crud
+def test_fulltext_query_uses_stored_vector(monkeypatch, app):
+    monkeypatch.setattr(user_module, "get_search_backend", PostgresSearchBackend)
+    user = User()
+    user.id = 7
+
+    with app.app_context():
+        sql = _compiled(user.fulltext_marks("python -java", "bookmark"))
+
+    assert "marks.search_vector @@ websearch_to_tsquery(" in sql
+    assert "ORDER BY ts_rank_cd(marks.search_vector, websearch_to_tsquery(" in sql
+    assert "to_tsvector" not in sql
+    assert "ts_headline" not in sql
+
+
+@pytest.mark.mark_crud
+def test_headlines_only_computed_for_page_rows(monkeypatch, app):
+    page_rows = [SimpleNamespace(id=3), SimpleNamespace(id=9)]
+    requested = []
+
+    class FakeQuery:
+        def paginate(self, **_kwargs):
+            return SimpleNamespace(items=page_rows)
+
+    user = User()
+    user.id = 7
+    user.per_page = 2
+    monkeypatch.setattr(User, "fulltext_marks", lambda self, string, marktype: FakeQuery())
+    monkeypatch.setattr(
+        Mark,
+        "search_headlines",
+        classmethod(lambda _cls, ids, string: requested.append(ids) or {3: "snippet"}),
+    )
+
+    user.q_marks_by_fulltext(1, "python")
+
+    assert requested == [[3, 9]]
+    assert page_rows[0].headline == "snippet"
+    assert page_rows[1].headline is None
+
+
+@pytest.mark.mark_crud
+def test_search_headline_filter_escapes_document_html(app):
+    render = app.jinja_env.filters["search_headline"]
+
+    snippet = "<script>x</script> learn \x02python\x03 today"
+
+    assert str(render(snippet)) == (
+        "&lt;script&gt;x&lt;/script&gt; learn <mark>python</mark> today"
+    )
@@ -0,0 +1,136 @@
+"""Hybrid search fuses lexical and vector rankings without calling the LLM."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from flaskmarks.api import auth as auth_api
+from flaskmarks.core import rag
+from flaskmarks.core.extensions import db
+from flaskmarks.core.search_backend import PostgresSearchBackend, SqliteFtsSearchBackend
+from flaskmarks.models import Mark
+from flaskmarks.models import user as user_module
+
+
+class FakeRagService:
+    def __init__(self, embedding=None, error=None):
+        def generate_embedding(_text):
+            if error:
+                raise error
+            return embedding
+
+        self.embedding_service = SimpleNamespace(generate_embedding=generate_embedding)
+
+    @property
+    def llm(self):
+        raise AssertionError("Hybrid search must not call the LLM")
+
+
+class RecordingSession:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def execute(self, statement, params):
+        self.calls.append((str(statement), params))
+        return SimpleNamespace(all=lambda: self.rows)
+
+
+@pytest.mark.mark_crud
+def test_hybrid_fuses_both_rankings_in_one_statement(monkeypatch):
+    session = RecordingSession([SimpleNamespace(id=4, score=0.03, total=7)])
+    monkeypatch.setattr(db, "session", session)
+
+    ranked, total = PostgresSearchBackend().hybrid(
+        owner_id=3, string="vector search", embedding=[0.1, 0.2],
+        page=2, per_page=5, candidates=50, rrf_k=60,
+    )
+
+    assert (ranked, total) == ([(4, 0.03)], 7)
+    [(sql, params)] = session.calls
+    assert "websearch_to_tsquery('english', :string)" in sql
+    assert "ORDER BY embedding <=> CAST(:embedding AS vector)" in sql
+    assert sql.count("LIMIT :candidates") == 2
+    assert "sum(1.0 / (:rrf_k + rnk))" in sql
+    assert params["offset"] == 5
+    assert params["embedding"] == "[0.1, 0.2]"
+
+
+@pytest.mark.mark_crud
+def test_hybrid_without_embedding_ranks_lexically(monkeypatch):
+    session = RecordingSession([])
+    monkeypatch.setattr(db, "session", session)
+
+    assert PostgresSearchBackend().hybrid(3, "python", None, 1, 10) == ([], 0)
+    sql, params = session.calls[0]
+    assert "semantic" not in sql
+    assert "embedding" not in params
+
+
+@pytest.fixture
+def sqlite_user(owner):
+    owner.per_page = 2
+    for title in ["first", "second", "third"]:
+        mark = Mark(owner_id=owner.id)
+        mark.type = "bookmark"
+        mark.title = title
+        mark.url = f"https://example.com/{title}"
+        db.session.add(mark)
+    db.session.commit()
+    return owner
+
+
+@pytest.mark.mark_crud
+@pytest.mark.parametrize(
+    ("service", "expected_embedding"),
+    [
+        (FakeRagService(embedding=[0.5]), [0.5]),
+        (FakeRagService(error=RuntimeError("model not installed")), None),
+    ],
+)
+def test_user_hybrid_keeps_fused_order(monkeypatch, sqlite_user, service, expected_embedding):
+    calls = []
+
+    class FakeBackend:
+        supports_vectors = True
+
+        def hybrid(self, owner_id, string, embedding, page, per_page, marktype, **_kwargs):
+            calls.append(embedding)
+            return [(3, 0.032), (1, 0.016)], 3
+
+    monkeypatch.setattr(rag, "get_rag_service", lambda: service)
+    monkeypatch.setattr(user_module, "get_search_backend", FakeBackend)
+
+    results = sqlite_user.q_marks_by_hybrid(1, "anything")
+
+    assert [mark.title for mark in results.items] == ["third", "first"]
+    assert results.items[0].score == 0.032
+    assert (results.total, results.pages, results.has_next) == (3, 2, True)
+    assert calls == [expected_embedding]
+
+
+@pytest.mark.mark_crud
+def test_sqlite_hybrid_ranks_lexically(sqlite_user):
+    ranked, total = SqliteFtsSearchBackend().hybrid(
+        sqlite_user.id, "second OR third", [0.5], page=1, per_page=10, rrf_k=60,
+    )
+
+    assert total == 2
+    assert [score for _, score in ranked] == [1 / 61, 1 / 62]
+    assert SqliteFtsSearchBackend().hybrid(sqlite_user.id, "-", None, 1, 10) == ([], 0)
+
+
+@pytest.mark.mark_crud
+def test_api_hybrid_on_sqlite_skips_the_embedding(monkeypatch, sqlite_app, sqlite_user):
+    monkeypatch.setattr(auth_api, "verify_token", lambda _token: sqlite_user)
+    monkeypatch.setattr(
+        rag, "get_rag_service", lambda: pytest.fail("SQLite has no vectors to embed for")
+    )
+
+    response = sqlite_app.test_client().get(
+        "/api/v1/marks/search?q=second&mode=hybrid",
+        headers={"Authorization": "Bearer valid-token"},
+    )
+
+    assert response.status_code == 200
+    assert [mark["title"] for mark in response.get_json()["data"]["marks"]] == ["second"]
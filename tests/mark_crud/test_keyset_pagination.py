@@ -0,0 +1,164 @@
+"""Keyset (cursor) pagination seeks past the last row instead of using OFFSET."""
+
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from flaskmarks import create_app
+from flaskmarks.api import auth as auth_api
+from flaskmarks.core.extensions import db
+from flaskmarks.core.pagination import (
+    InvalidCursorError,
+    KeysetPage,
+    SortKey,
+    decode_cursor,
+    encode_cursor,
+    keyset_paginate,
+)
+from flaskmarks.models import MarkStats
+
+
+class StatsOnlyConfig:
+    SECRET_KEY = "test-secret"
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+    TESTING = True
+    WTF_CSRF_ENABLED = False
+
+
+@pytest.fixture
+def stats_app():
+    application = create_app(StatsOnlyConfig)
+    with application.app_context():
+        MarkStats.__table__.create(db.engine)
+        # Duplicate click counts force the id tie-breaker to matter
+        for mark_id, clicks in [(1, 5), (2, 3), (3, 5), (4, 0), (5, 3), (6, 1), (7, 5)]:
+            stats = MarkStats(owner_id=1, clicks=clicks)
+            stats.mark_id = mark_id
+            db.session.add(stats)
+        db.session.commit()
+        yield application
+        db.session.remove()
+
+
+def _walk(query, keys, per_page, scope="clicks"):
+    seen, cursor = [], ""
+    while cursor is not None:
+        page = keyset_paginate(query, keys, cursor, per_page, scope=scope)
+        seen.extend(row.mark_id for row in page)
+        cursor = page.next_cursor
+    return seen
+
+
+@pytest.mark.mark_crud
+def test_cursor_round_trip_preserves_datetimes():
+    when = datetime(2026, 1, 2, 3, 4, 5)
+    token = encode_cursor("clicked", [when, 12])
+
+    assert decode_cursor(token, "clicked", 2) == [when, 12]
+
+
+@pytest.mark.mark_crud
+@pytest.mark.parametrize(
+    ("token", "scope", "size"),
+    [
+        ("not a cursor", "clicks", 2),
+        (encode_cursor("added", [3]), "clicks", 1),
+        (encode_cursor("clicks", [3]), "clicks", 2),
+    ],
+)
+def test_decode_cursor_rejects_bad_tokens(token, scope, size):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(token, scope, size)
+
+
+@pytest.mark.mark_crud
+def test_keyset_walk_matches_offset_order(stats_app):
+    keys = [
+        SortKey("clicks", MarkStats.clicks),
+        SortKey("mark_id", MarkStats.mark_id),
+    ]
+    expected = [
+        row.mark_id
+        for row in MarkStats.query.order_by(*(k.order_by() for k in keys)).all()
+    ]
+
+    assert _walk(MarkStats.query, keys, per_page=2) == expected == [7, 3, 1, 5, 2, 6, 4]
+
+
+@pytest.mark.mark_crud
+def test_keyset_walk_with_mixed_directions(stats_app):
+    keys = [
+        SortKey("clicks", MarkStats.clicks),
+        SortKey("mark_id", MarkStats.mark_id, descending=False),
+    ]
+
+    assert _walk(MarkStats.query, keys, per_page=3) == [1, 3, 7, 2, 5, 6, 4]
+
+
+@pytest.mark.mark_crud
+def test_keyset_total_is_opt_in(stats_app):
+    keys = [SortKey("mark_id", MarkStats.mark_id)]
+
+    assert keyset_paginate(MarkStats.query, keys, "", 3, scope="added").total is None
+    page = keyset_paginate(MarkStats.query, keys, "", 3, scope="added", with_total=True)
+    assert page.total == 7
+    assert page.has_next and not page.has_prev
+
+
+@pytest.mark.mark_crud
+def test_api_list_marks_serializes_cursor_page(monkeypatch, app):
+    calls = {}
+
+    class FakeUser:
+        id = 5
+        per_page = 20
+        sort_type = "clicks"
+
+        def my_marks_with_stats(self):
+            return SimpleNamespace()
+
+        def paginate_marks(self, query, sort, page, cursor, per_page, with_total=False):
+            calls.update(sort=sort, cursor=cursor, with_total=with_total)
+            return KeysetPage([], per_page, cursor, "next-token")
+
+    monkeypatch.setattr(auth_api, "verify_token", lambda _token: FakeUser())
+
+    response = app.test_client().get(
+        "/api/v1/marks?cursor=&with_total=false",
+        headers={"Authorization": "Bearer valid-token"},
+    )
+
+    assert response.status_code == 200
+    assert response.get_json()["data"]["pagination"] == {
+        "per_page": 20,
+        "total": None,
+        "cursor": None,
+        "next_cursor": "next-token",
+        "has_next": True,
+        "has_prev": False,
+    }
+    assert calls == {"sort": "clicks", "cursor": "", "with_total": False}
+
+
+@pytest.mark.mark_crud
+def test_api_list_marks_rejects_invalid_cursor(monkeypatch, app):
+    class FakeUser:
+        id = 5
+        per_page = 20
+        sort_type = "clicks"
+
+        def my_marks_with_stats(self):
+            return SimpleNamespace()
+
+        def paginate_marks(self, *_args, **_kwargs):
+            raise InvalidCursorError("Malformed pagination cursor.")
+
+    monkeypatch.setattr(auth_api, "verify_token", lambda _token: FakeUser())
+
+    response = app.test_client().get(
+        "/api/v1/marks?cursor=garbage",
+        headers={"Authorization": "Bearer valid-token"},
+    )
+
+    assert response.status_code == 400
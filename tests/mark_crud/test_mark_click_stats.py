@@ -0,0 +1,205 @@
+"""Click counters are written to mark_stats without touching the marks row."""
+
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from flaskmarks import create_app
+from flaskmarks.api import auth as auth_api
+from flaskmarks.api import marks as marks_api
+from flaskmarks.core.extensions import db
+from flaskmarks.models import Mark, MarkStats
+
+
+class StatsOnlyConfig:
+    SECRET_KEY = "test-secret"
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+    TESTING = True
+    WTF_CSRF_ENABLED = False
+
+
+@pytest.fixture
+def stats_app():
+    application = create_app(StatsOnlyConfig)
+    with application.app_context():
+        MarkStats.__table__.create(db.engine)
+        stats = MarkStats(owner_id=1)
+        stats.mark_id = 10
+        db.session.add(stats)
+        db.session.commit()
+        yield application
+        db.session.remove()
+
+
+@pytest.mark.mark_crud
+def test_apply_clicks_increments_owned_mark(stats_app):
+    clicked_at = datetime(2026, 1, 2, 3, 4, 5)
+
+    MarkStats.apply_clicks([
+        {"mark_id": 10, "owner_id": 1, "count": 3, "last_clicked": clicked_at},
+    ])
+
+    db.session.expire_all()
+    row = MarkStats.query.one()
+    assert row.clicks == 3
+    assert row.last_clicked == clicked_at
+
+
+@pytest.mark.mark_crud
+def test_apply_clicks_never_moves_last_clicked_backwards(stats_app):
+    recent = datetime(2026, 3, 1, 12, 0, 0)
+    MarkStats.apply_clicks([
+        {"mark_id": 10, "owner_id": 1, "count": 1, "last_clicked": recent},
+    ])
+
+    MarkStats.apply_clicks([
+        {"mark_id": 10, "owner_id": 1, "count": 2, "last_clicked": datetime(2025, 1, 1)},
+    ])
+
+    db.session.expire_all()
+    row = MarkStats.query.one()
+    assert row.clicks == 3
+    assert row.last_clicked == recent
+
+
+@pytest.mark.mark_crud
+def test_apply_clicks_ignores_other_owner(stats_app):
+    MarkStats.apply_clicks([
+        {"mark_id": 10, "owner_id": 2, "count": 5, "last_clicked": datetime.utcnow()},
+    ])
+
+    db.session.expire_all()
+    assert MarkStats.query.one().clicks == 0
+
+
+@pytest.mark.mark_crud
+def test_owned_ids_keeps_only_the_owners_marks(stats_app):
+    assert MarkStats.owned_ids(1, [10, 11]) == {10}
+    assert MarkStats.owned_ids(2, [10]) == set()
+
+
+@pytest.mark.mark_crud
+def test_api_click_reads_stats_and_buffers_write(monkeypatch, app):
+    class FakeUser:
+        id = 5
+
+        def get_mark_by_id(self, *_args, **_kwargs):
+            raise AssertionError("Click path must not load the mark row")
+
+    recorded = []
+
+    monkeypatch.setattr(auth_api, "verify_token", lambda _token: FakeUser())
+    monkeypatch.setattr(
+        MarkStats,
+        "for_owner",
+        classmethod(lambda _cls, mark_id, owner_id: SimpleNamespace(clicks=2)),
+    )
+    monkeypatch.setattr(
+        marks_api.click_buffer,
+        "record",
+        lambda mark_id, owner_id, **_kwargs: recorded.append((mark_id, owner_id)),
+    )
+    monkeypatch.setattr(marks_api.click_buffer, "pending", lambda _mark_id, _owner_id: 1)
+
+    response = app.test_client().post(
+        "/api/v1/marks/42/click",
+        headers={"Authorization": "Bearer valid-token"},
+    )
+
+    assert response.status_code == 200
+    assert response.get_json()["data"] == {"clicks": 3}
+    assert recorded == [(42, 5)]
+
+
+@pytest.mark.mark_crud
+def test_api_click_batch_buffers_every_event(monkeypatch, app):
+    recorded = []
+
+    monkeypatch.setattr(auth_api, "verify_token", lambda _token: SimpleNamespace(id=5))
+    monkeypatch.setattr(
+        MarkStats,
+        "owned_ids",
+        classmethod(lambda _cls, owner_id, mark_ids: {1, 2}),
+    )
+    monkeypatch.setattr(
+        marks_api.click_buffer,
+        "record",
+        lambda mark_id, owner_id, count=1, clicked_at=None: recorded.append(
+            (mark_id, owner_id, count, clicked_at)
+        ),
+    )
+
+    response = app.test_client().post(
+        "/api/v1/marks/clicks",
+        json={"clicks": [
+            {"id": 1},
+            {"id": 2, "count": 3, "clicked_at": "2026-01-02T03:04:05"},
+        ]},
+        headers={"Authorization": "Bearer valid-token"},
+    )
+
+    assert response.status_code == 200
+    assert response.get_json()["data"] == {"accepted": 4, "rejected": 0}
+    assert recorded == [
+        (1, 5, 1, None),
+        (2, 5, 3, datetime(2026, 1, 2, 3, 4, 5)),
+    ]
+
+
+@pytest.mark.mark_crud
+def test_api_click_batch_rejects_foreign_marks_and_caps_the_total(monkeypatch, app):
+    recorded = []
+
+    monkeypatch.setattr(auth_api, "verify_token", lambda _token: SimpleNamespace(id=5))
+    monkeypatch.setattr(
+        MarkStats,
+        "owned_ids",
+        classmethod(lambda _cls, owner_id, mark_ids: {1, 2, 3}),
+    )
+    monkeypatch.setattr(
+        marks_api.click_buffer,
+        "record",
+        lambda mark_id, owner_id, count=1, clicked_at=None: recorded.append((mark_id, count)),
+    )
+
+    response = app.test_client().post(
+        "/api/v1/marks/clicks",
+        json={"clicks": [
+            {"id": 1, "count": 500},
+            {"id": 99, "count": 500},
+            {"id": 2, "count": 450},
+            {"id": 3, "count": 500},
+        ]},
+        headers={"Authorization": "Bearer valid-token"},
+    )
+
+    assert response.get_json()["data"] == {
+        "accepted": marks_api.MAX_CLICKS_PER_REQUEST,
+        "rejected": 1,
+    }
+    assert recorded == [(1, 500), (2, 450), (3, 50)]
+
+
+@pytest.mark.mark_crud
+def test_api_click_batch_rejects_malformed_events(monkeypatch, app):
+    monkeypatch.setattr(auth_api, "verify_token", lambda _token: SimpleNamespace(id=5))
+
+    response = app.test_client().post(
+        "/api/v1/marks/clicks",
+        json={"clicks": [{"count": 2}]},
+        headers={"Authorization": "Bearer valid-token"},
+    )
+
+    assert response.status_code == 422
+
+
+@pytest.mark.mark_crud
+def test_mark_click_attributes_proxy_to_stats():
+    mark = Mark(owner_id=3)
+
+    assert mark.clicks == 0
+    mark.clicks = 4
+
+    assert mark.stats.clicks == 4
+    assert mark.stats.owner_id == 3
@@ -0,0 +1,110 @@
+"""API search modes route to index-assisted queries."""
+
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from flaskmarks.api import auth as auth_api
+from flaskmarks.core.search_backend import PostgresSearchBackend
+from flaskmarks.models import Mark, User
+from flaskmarks.models import user as user_module
+
+
+class FakeSearchUser:
+    id = 5
+    per_page = 20
+
+    def __init__(self):
+        self.calls = []
+
+    def _page(self, name, *args, **kwargs):
+        self.calls.append((name, args, kwargs))
+        return SimpleNamespace(
+            items=[], page=1, per_page=20, total=0, pages=0,
+            has_next=False, has_prev=False,
+        )
+
+    def q_marks_by_string(self, *args, **kwargs):
+        return self._page("substring", *args, **kwargs)
+
+    def q_marks_by_fulltext(self, *args, **kwargs):
+        return self._page("fulltext", *args, **kwargs)
+
+    def q_marks_by_fuzzy(self, *args, **kwargs):
+        return self._page("fuzzy", *args, **kwargs)
+
+
+@pytest.fixture
+def search_user(monkeypatch):
+    user = FakeSearchUser()
+    monkeypatch.setattr(auth_api, "verify_token", lambda _token: user)
+    return user
+
+
+def _search(app, query_string):
+    return app.test_client().get(
+        f"/api/v1/marks/search?{query_string}",
+        headers={"Authorization": "Bearer valid-token"},
+    )
+
+
+@pytest.mark.mark_crud
+@pytest.mark.parametrize("mode", ["substring", "fulltext", "fuzzy"])
+def test_search_mode_selects_strategy(app, search_user, mode):
+    response = _search(app, f"q=pyhton&mode={mode}")
+
+    assert response.status_code == 200
+    assert response.get_json()["data"]["mode"] == mode
+    assert [name for name, _args, _kwargs in search_user.calls] == [mode]
+
+
+@pytest.mark.mark_crud
+def test_search_defaults_to_substring(app, search_user):
+    response = _search(app, "q=python")
+
+    assert response.status_code == 200
+    assert search_user.calls[0][0] == "substring"
+
+
+@pytest.mark.mark_crud
+@pytest.mark.parametrize("query_string", ["q=python&mode=regex", "q=python&mode=fuzzy&cursor="])
+def test_search_rejects_unsupported_mode_options(app, search_user, query_string):
+    response = _search(app, query_string)
+
+    assert response.status_code == 400
+    assert search_user.calls == []
+
+
+@pytest.mark.mark_crud
+def test_substring_search_avoids_full_html_scan(monkeypatch, app):
+    captured = {}
+
+    def fake_paginate(self, query, sort, page, cursor):
+        captured["sql"] = str(query.statement.compile(dialect=postgresql.dialect()))
+        return None
+
+    monkeypatch.setattr(User, "paginate_marks", fake_paginate)
+    monkeypatch.setattr(user_module, "get_search_backend", PostgresSearchBackend)
+    user = User()
+    user.id = 7
+
+    with app.app_context():
+        user.q_marks_by_string(1, "50%_off", "bookmark")
+
+    sql = captured["sql"]
+    assert "(coalesce(marks.title, '') || ' ' || coalesce(marks.description, '')" in sql
+    assert "ILIKE" in sql
+    assert "marks.search_vector @@ websearch_to_tsquery(" in sql
+    assert "marks.full_html LIKE" not in sql
+
+
+@pytest.mark.mark_crud
+def test_search_text_matches_trigram_index_expression():
+    index = next(
+        ix for ix in Mark.__table__.indexes if ix.name == "ix_marks_search_text_trgm"
+    )
+    dialect = postgresql.dialect()
+    indexed = str(index.expressions[0].element.compile(dialect=dialect))
+
+    assert indexed == str(Mark.search_text().compile(dialect=dialect))
@@ -0,0 +1,54 @@
+"""Every mark list sort order has a composite index that can serve it."""
+
+import pytest
+from sqlalchemy import Column
+
+from flaskmarks.models import Mark, MarkStats
+
+
+def _index_shapes(table):
+    shapes = set()
+    for index in table.indexes:
+        columns = []
+        for expr in index.expressions:
+            element = getattr(expr, "element", expr)
+            if not isinstance(element, Column):
+                break  # expression index, not a sort index
+            columns.append((element.name, getattr(expr, "modifier", None) is not None))
+        else:
+            shapes.add(tuple(columns))
+    return shapes
+
+
+@pytest.mark.mark_crud
+@pytest.mark.parametrize(
+    ("sort", "table"),
+    [
+        ("clicks", MarkStats.__table__),
+        ("clicked", MarkStats.__table__),
+        ("dateasc", Mark.__table__),
+        ("datedesc", Mark.__table__),
+        ("added", Mark.__table__),
+        ("updated", Mark.__table__),
+    ],
+)
+def test_sort_order_is_backed_by_index(sort, table):
+    names = []
+    for key in Mark.sort_keys(sort):
+        name = key.column.name
+        if table is MarkStats.__table__ and name == "id":
+            # marks.id = mark_stats.mark_id, so the planner can use either
+            name = "mark_id"
+        names.append((name, key.descending))
+
+    forward = (("owner_id", False), *names)
+    # A btree scanned backwards serves the fully reversed order
+    backward = (("owner_id", False), *((name, not desc) for name, desc in names))
+
+    shapes = _index_shapes(table)
+    assert forward in shapes or backward in shapes
+
+
+@pytest.mark.mark_crud
+def test_url_lookup_is_backed_by_index():
+    assert (("owner_id", False), ("url", False)) in _index_shapes(Mark.__table__)
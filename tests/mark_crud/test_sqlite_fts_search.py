@@ -0,0 +1,99 @@
+"""SQLite deployments search through an FTS5 table kept in sync by triggers."""
+
+import pytest
+
+from flaskmarks.core.extensions import db
+from flaskmarks.core.search_backend import (
+    SearchBackend,
+    SqliteFtsSearchBackend,
+    get_search_backend,
+)
+from flaskmarks.models import Mark
+
+
+@pytest.fixture
+def sqlite_user(owner):
+    owner.per_page = 10
+    for title, description, body in [
+        ("Python tips", "async notes", "<p>asyncio event loop</p>"),
+        ("Postgres tuning", "indexes", "<p>vacuum and btree</p>"),
+        ("Cooking", "python recipes", "<p>snake soup</p>"),
+    ]:
+        mark = Mark(owner_id=owner.id)
+        mark.type = "bookmark"
+        mark.title = title
+        mark.description = description
+        mark.full_html = body
+        mark.url = f"https://example.com/{title.lower().replace(' ', '-')}"
+        db.session.add(mark)
+    db.session.commit()
+    return owner
+
+
+def _titles(pagination):
+    return [mark.title for mark in pagination.items]
+
+
+@pytest.mark.mark_crud
+def test_backend_is_chosen_from_database_uri(sqlite_user):
+    assert isinstance(get_search_backend(), SqliteFtsSearchBackend)
+
+
+@pytest.mark.mark_crud
+def test_fulltext_ranks_title_matches_first(sqlite_user):
+    results = sqlite_user.q_marks_by_fulltext(1, "python")
+
+    assert _titles(results) == ["Python tips", "Cooking"]
+    assert results.items[0].headline == "\x02Python\x03 tips"
+
+
+@pytest.mark.mark_crud
+def test_substring_search_prefix_matches_body(sqlite_user):
+    assert _titles(sqlite_user.q_marks_by_string(1, "vacu", None)) == ["Postgres tuning"]
+
+
+@pytest.mark.mark_crud
+def test_triggers_keep_index_in_sync(sqlite_user):
+    mark = Mark.query.filter_by(title="Cooking").one()
+    mark.description = "stews"
+    db.session.commit()
+
+    assert _titles(sqlite_user.q_marks_by_fulltext(1, "python")) == ["Python tips"]
+
+    db.session.delete(mark)
+    db.session.commit()
+
+    assert _titles(sqlite_user.q_marks_by_fulltext(1, "soup")) == []
+
+
+@pytest.mark.mark_crud
+@pytest.mark.parametrize(
+    ("string", "expected"),
+    [
+        ('python"; DROP TABLE marks', '("python") AND ("DROP") AND ("TABLE") AND ("marks")'),
+        ("python OR vacuum -tips", '("python" OR "vacuum") NOT "tips"'),
+        ("c++ AND", '("c") AND ("AND")'),
+        ("--- ***", None),
+    ],
+)
+def test_match_expression_quotes_user_input(string, expected):
+    assert SqliteFtsSearchBackend.match_expression(string) == expected
+
+
+@pytest.mark.mark_crud
+def test_incomplete_backend_fails_at_construction():
+    class NoFuzzy(SearchBackend):
+        def fulltext(self, query, string):
+            return query
+
+        def substring(self, query, string):
+            return query
+
+        def headlines(self, ids, string):
+            return {}
+
+        def hybrid(self, owner_id, string, embedding, page, per_page, **_kwargs):
+            return [], 0
+
+    with pytest.raises(TypeError, match="fuzzy"):
+        NoFuzzy()
@@ -0,0 +1,103 @@
+"""Exports stream narrow rows from a cursor instead of loading every mark."""
+
+import gzip
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+
+from flaskmarks.api import auth as auth_api
+from flaskmarks.core import export
+from flaskmarks.core.extensions import db
+from flaskmarks.models import Mark, Tag
+
+
+@pytest.fixture
+def exporter(sqlite_app, owner):
+    python = Tag("python")
+    for n in range(5):
+        mark = Mark(owner_id=owner.id, created=datetime(2024, 1, n + 1))
+        mark.type = "bookmark"
+        mark.title = f"Mark <{n}>"
+        mark.url = f"https://example.com/{n}?a=1&b=2"
+        mark.full_html = "<p>never exported</p>"
+        mark.clicks = n
+        if n % 2 == 0:
+            mark.tags = [python]
+        db.session.add(mark)
+    db.session.commit()
+    return sqlite_app, owner.id
+
+
+@pytest.mark.mark_crud
+def test_records_are_read_in_chunks_without_heavy_columns(exporter):
+    application, user_id = exporter
+    statements = []
+
+    def capture(_conn, _cursor, statement, *_args):
+        statements.append(statement)
+
+    with application.app_context():
+        event.listen(db.engine, "before_cursor_execute", capture)
+        try:
+            records = list(export.iter_mark_records(user_id, chunk_size=2))
+        finally:
+            event.remove(db.engine, "before_cursor_execute", capture)
+
+    assert [r.clicks for r in records] == [0, 1, 2, 3, 4]
+    assert [len(r.tags) for r in records] == [1, 0, 1, 0, 1]
+    # One cursor for the marks, one tag lookup per chunk of two
+    assert len(statements) == 1 + 3
+    assert not any("full_html" in s or "embedding" in s for s in statements)
+
+
+@pytest.mark.mark_crud
+def test_web_json_export_keeps_import_shape(exporter):
+    application, user_id = exporter
+    client = application.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user_id)
+
+    response = client.get("/marks/export.json")
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    marks = json.loads(response.get_data())["marks"]
+    assert len(marks) == 5
+    assert marks[0]["tags"] == ["python"]
+    assert marks[0]["created"] == datetime(2024, 1, 1).strftime("%s")
+
+
+@pytest.mark.mark_crud
+def test_api_export_streams_envelope_and_gzip(monkeypatch, exporter):
+    application, user_id = exporter
+    monkeypatch.setattr(auth_api, "verify_token", lambda _token: SimpleNamespace(id=user_id))
+    headers = {"Authorization": "Bearer valid-token"}
+    client = application.test_client()
+
+    body = json.loads(client.get("/api/v1/marks/export", headers=headers).get_data())
+    assert body["success"] is True
+    assert body["data"]["total"] == 5
+    assert body["data"]["marks"][2]["tags"] == [{"id": 1, "title": "python"}]
+
+    response = client.get("/api/v1/marks/export?format=ndjson&gzip=true", headers=headers)
+    assert response.headers["Content-Encoding"] == "gzip"
+    lines = gzip.decompress(response.get_data()).decode().splitlines()
+    assert [json.loads(line)["clicks"] for line in lines] == [0, 1, 2, 3, 4]
+
+    assert client.get("/api/v1/marks/export?format=csv", headers=headers).status_code == 400
+
+
+@pytest.mark.mark_crud
+def test_netscape_export_escapes_and_carries_tags(exporter):
+    application, user_id = exporter
+
+    with application.app_context():
+        page = "".join(export.netscape_chunks(export.iter_mark_records(user_id)))
+
+    assert page.startswith("<!DOCTYPE NETSCAPE-Bookmark-file-1>")
+    assert page.count("<DT><A ") == 5
+    assert 'HREF="https://example.com/0?a=1&amp;b=2"' in page
+    assert 'TAGS="python">Mark &lt;0&gt;</A>' in page
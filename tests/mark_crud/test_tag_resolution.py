@@ -0,0 +1,134 @@
+"""Tags are resolved in bulk, cached per engine and never duplicated."""
+
+import time
+
+import pytest
+from sqlalchemy import event
+
+from flaskmarks.core.extensions import db
+from flaskmarks.models import Mark, Tag
+from flaskmarks.models import tag as tag_module
+from flaskmarks.models.tag import tag_id_cache
+
+
+@pytest.fixture
+def sqlite_app(sqlite_app):
+    db.session.add(Tag("python"))
+    db.session.commit()
+    return sqlite_app
+
+
+def _count_statements(fn):
+    statements = []
+
+    def capture(_conn, _cursor, statement, *_args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", capture)
+    try:
+        result = fn()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", capture)
+    return result, statements
+
+
+@pytest.mark.mark_crud
+def test_ten_tags_resolve_without_a_query_per_tag(sqlite_app):
+    titles = ["Python", " flask "] + [f"tag{n}" for n in range(8)]
+
+    ids, statements = _count_statements(lambda: Tag.resolve_many(titles))
+    db.session.commit()
+
+    assert len(ids) == 10
+    assert ids["python"] == Tag.check("python").id
+    # SELECT of the existing tags + one upsert of the new ones
+    assert len(statements) <= 2
+    assert Tag.query.count() == 10
+
+
+@pytest.mark.mark_crud
+def test_committed_ids_are_served_from_the_cache(sqlite_app):
+    Tag.resolve_many(["alpha", "beta"])
+    db.session.commit()
+
+    ids, statements = _count_statements(lambda: Tag.resolve_many(["Alpha", "beta"]))
+
+    assert statements == []
+    assert set(ids) == {"alpha", "beta"}
+
+
+@pytest.mark.mark_crud
+def test_rolled_back_ids_are_not_cached(sqlite_app):
+    Tag.resolve_many(["ephemeral"])
+    db.session.rollback()
+
+    assert tag_id_cache().get_many(["ephemeral"]) == {}
+    ids = Tag.resolve_many(["ephemeral"])
+    db.session.commit()
+    assert ids["ephemeral"] == Tag.check("ephemeral").id
+
+
+@pytest.mark.mark_crud
+def test_resolved_tags_attach_to_marks_without_duplicates(owner):
+    for n in range(2):
+        mark = Mark(owner.id)
+        mark.type = "bookmark"
+        mark.title = f"Mark {n}"
+        mark.url = f"https://example.com/{n}"
+        mark.tags = Tag.resolve(["Python", "python ", "new-tag", ""])
+        db.session.add(mark)
+        db.session.commit()
+
+    assert [t.title for t in Tag.query.order_by(Tag.id)] == ["python", "new-tag"]
+    for mark in Mark.query.filter_by(owner_id=owner.id):
+        assert sorted(t.title for t in mark.tags) == ["new-tag", "python"]
+
+
+@pytest.mark.mark_crud
+def test_renamed_tag_is_evicted(sqlite_app):
+    tag_id = Tag.resolve_many(["old-name"])["old-name"]
+    db.session.commit()
+
+    tag = db.session.get(Tag, tag_id)
+    tag.title = "new-name"
+    db.session.commit()
+
+    assert tag_id_cache().get_many(["old-name"]) == {}
+    assert Tag.resolve_many(["old-name"])["old-name"] != tag_id
+
+
+def _rename_in_another_worker(tag_id, title):
+    # Raw SQL skips the ORM events, like a rename in another process
+    db.session.execute(
+        Tag.__table__.update().where(Tag.id == tag_id).values(title=title)
+    )
+    db.session.commit()
+
+
+@pytest.mark.mark_crud
+def test_stale_cached_ids_are_rechecked_when_the_database_is_queried(sqlite_app):
+    tag_id = Tag.resolve_many(["old-name"])["old-name"]
+    db.session.commit()
+    _rename_in_another_worker(tag_id, "renamed")
+
+    ids = Tag.resolve_many(["old-name", "uncached"])
+    db.session.commit()
+
+    assert ids["old-name"] != tag_id
+    assert ids["old-name"] == Tag.check("old-name").id
+    assert tag_id_cache().get_many(["old-name"]) == {"old-name": ids["old-name"]}
+
+
+@pytest.mark.mark_crud
+def test_cached_ids_expire_after_the_ttl(sqlite_app, monkeypatch):
+    cache = tag_id_cache()
+    monkeypatch.setattr(cache, "ttl", 60)
+    tag_id = Tag.resolve_many(["old-name"])["old-name"]
+    db.session.commit()
+    _rename_in_another_worker(tag_id, "renamed")
+
+    clock = time.monotonic() + 61
+    monkeypatch.setattr(tag_module.time, "monotonic", lambda: clock)
+
+    assert cache.get_many(["old-name"]) == {}
+    assert Tag.resolve_many(["old-name"])["old-name"] != tag_id
@@ -0,0 +1,86 @@
+import socket
+
+import httpcore
+import httpx
+import pytest
+
+from flaskmarks.core import url_fetch_validation
+from flaskmarks.core.dns_cache import dns_cache
+from flaskmarks.core.http_client import outbound_http
+from flaskmarks.core.url_fetch_validation import (
+    URLTargetValidationError,
+    ensure_public_http_url,
+)
+
+
+def _addrinfo_for(ip_text):
+    return [
+        (socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP, "", (ip_text, 0))
+    ]
+
+
+@pytest.fixture
+def answers(monkeypatch):
+    """Fake resolver answering from a mutable host -> IP map, counting lookups."""
+    state = {"ips": {}, "lookups": []}
+
+    def fake_getaddrinfo(host, _port, proto=None):
+        state["lookups"].append(host)
+        if host not in state["ips"]:
+            raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+        return _addrinfo_for(state["ips"][host])
+
+    monkeypatch.setattr(url_fetch_validation.socket, "getaddrinfo", fake_getaddrinfo)
+    return state
+
+
+def test_each_host_resolves_once_per_ttl(answers):
+    answers["ips"]["news.example"] = "93.184.216.34"
+
+    for path in ("a", "b", "c"):
+        assert ensure_public_http_url(f"https://news.example/{path}") == "93.184.216.34"
+    assert ensure_public_http_url("http://NEWS.example:8080/") == "93.184.216.34"
+
+    assert answers["lookups"] == ["news.example"]
+
+
+def test_failed_lookups_are_cached_too(answers):
+    for _ in range(3):
+        with pytest.raises(URLTargetValidationError, match="could not be resolved"):
+            ensure_public_http_url("https://gone.example/")
+
+    assert answers["lookups"] == ["gone.example"]
+
+
+def test_expired_answers_are_resolved_again(monkeypatch, answers):
+    answers["ips"]["news.example"] = "93.184.216.34"
+    monkeypatch.setattr(dns_cache, "ttl", 0)
+
+    ensure_public_http_url("https://news.example/")
+    ensure_public_http_url("https://news.example/")
+
+    assert answers["lookups"] == ["news.example", "news.example"]
+
+
+def test_connection_dials_the_address_that_was_validated(monkeypatch, answers):
+    answers["ips"]["rebind.example"] = "93.184.216.34"
+    dialled = []
+
+    def fake_connect_tcp(_backend, host, port, **_kwargs):
+        dialled.append((host, port))
+        raise httpcore.ConnectError("no network in tests")
+
+    monkeypatch.setattr(httpcore.SyncBackend, "connect_tcp", fake_connect_tcp)
+    outbound_http.close()
+
+    ensure_public_http_url("http://rebind.example/")
+    # The name now points somewhere private; the cached answer is used
+    answers["ips"]["rebind.example"] = "127.0.0.1"
+    try:
+        with pytest.raises(httpx.ConnectError):
+            outbound_http.client.get("http://rebind.example/")
+    finally:
+        outbound_http.close()
+
+    assert dialled == [("93.184.216.34", 80)]
+    assert answers["lookups"] == ["rebind.example"]
@@ -0,0 +1,166 @@
+import asyncio
+import socket
+import sqlite3
+import threading
+
+import httpx
+import pytest
+
+from flaskmarks.core import marks_import_thread, url_fetch_validation
+from flaskmarks.core.fetch_cache import fetch_cache
+from flaskmarks.core.fetch_engine import AsyncFetchEngine
+from flaskmarks.core.marks_import_thread import fetch_url_metadata
+
+
+PAGE = "<html><head><title>Example</title></head><body>Hi</body></html>"
+
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(fetch_cache, "enabled", True)
+    monkeypatch.setattr(fetch_cache, "path", str(tmp_path / "pages.sqlite"))
+    monkeypatch.setattr(fetch_cache, "_local", threading.local())
+    # Every fetch revalidates; freshness is covered by the single-flight tests
+    monkeypatch.setattr(fetch_cache, "fresh_seconds", 0)
+    yield fetch_cache
+    fetch_cache.clear()
+
+
+@pytest.fixture
+def extracted(monkeypatch):
+    calls = []
+
+    def fake_extract(url, html):
+        calls.append(url)
+        return {
+            "type": "bookmark", "tags": ["a"], "url": url,
+            "title": "Example", "description": "", "full_html": "",
+        }
+
+    monkeypatch.setattr(
+        url_fetch_validation.socket,
+        "getaddrinfo",
+        lambda _host, _port, proto=None: [
+            (socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP, "", ("93.184.216.34", 80))
+        ],
+    )
+    monkeypatch.setattr(marks_import_thread, "is_youtube_video", lambda _url: False)
+    monkeypatch.setattr(marks_import_thread, "extract_metadata", fake_extract)
+    return calls
+
+
+def test_not_modified_page_reuses_cached_metadata(cache, extracted, outbound_transport):
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers.get("if-none-match"))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers={"etag": '"v1"'})
+        return httpx.Response(
+            200, headers={"content-type": "text/html", "etag": '"v1"'}, text=PAGE
+        )
+
+    outbound_transport(handler)
+
+    first = fetch_url_metadata("https://example.com/article")
+    second = fetch_url_metadata("https://EXAMPLE.com/article#comments")
+
+    assert seen == [None, '"v1"']
+    assert extracted == ["https://example.com/article"]
+    assert second["title"] == first["title"] == "Example"
+    assert second["url"] == "https://EXAMPLE.com/article#comments"
+
+
+def test_changed_page_is_extracted_again(cache, extracted, outbound_transport):
+    def handler(request):
+        modified = request.headers.get("if-modified-since")
+        assert modified in (None, "Mon, 05 Oct 2026 10:00:00 GMT")
+        return httpx.Response(
+            200,
+            headers={"content-type": "text/html", "last-modified": "Mon, 05 Oct 2026 10:00:00 GMT"},
+            text=PAGE,
+        )
+
+    outbound_transport(handler)
+
+    fetch_url_metadata("https://example.com/article")
+    fetch_url_metadata("https://example.com/article")
+
+    assert len(extracted) == 2
+
+
+def test_pages_without_validators_are_not_cached(cache, extracted, outbound_transport):
+    outbound_transport(
+        lambda _request: httpx.Response(200, headers={"content-type": "text/html"}, text=PAGE)
+    )
+
+    fetch_url_metadata("https://example.com/article")
+
+    assert cache.lookup("https://example.com/article") is None
+
+
+def test_cache_files_from_before_freshness_are_upgraded(cache, extracted, outbound_transport):
+    conn = sqlite3.connect(cache.path)
+    conn.executescript(
+        """
+        CREATE TABLE pages (
+            key TEXT PRIMARY KEY, etag TEXT, last_modified TEXT,
+            content_type TEXT NOT NULL, body BLOB NOT NULL, metadata TEXT NOT NULL,
+            size INTEGER NOT NULL, last_used REAL NOT NULL
+        );
+        CREATE INDEX ix_pages_last_used ON pages (last_used);
+        """
+    )
+    conn.close()
+    outbound_transport(
+        lambda _request: httpx.Response(
+            200, headers={"content-type": "text/html", "etag": '"v1"'}, text=PAGE
+        )
+    )
+
+    fetch_url_metadata("https://example.com/article")
+
+    assert cache.lookup("https://example.com/article").etag == '"v1"'
+    conn = sqlite3.connect(cache.path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 2
+    conn.close()
+
+
+def test_least_recently_used_pages_are_evicted(monkeypatch, cache, extracted, outbound_transport):
+    body = "".join(f"{n:08x}" for n in range(40000))  # barely compressible
+
+    def handler(request):
+        return httpx.Response(
+            200,
+            headers={"content-type": "text/html", "etag": f'"{request.url.path}"'},
+            text=f"{request.url.path}{body}",
+        )
+
+    outbound_transport(handler)
+    monkeypatch.setattr(cache, "max_bytes", 200 * 1024)
+
+    fetch_url_metadata("https://example.com/1")
+    fetch_url_metadata("https://example.com/2")
+    assert cache.lookup("https://example.com/1") is not None
+    fetch_url_metadata("https://example.com/3")
+
+    assert cache.lookup("https://example.com/1") is not None
+    assert cache.lookup("https://example.com/2") is None
+    assert cache.lookup("https://example.com/3") is not None
+
+
+def test_async_engine_reports_not_modified_instead_of_following_it(extracted):
+    def handler(request):
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers={"etag": '"v1"'})
+        return httpx.Response(304)
+
+    async def fetch(headers):
+        async with AsyncFetchEngine(transport=httpx.MockTransport(handler)) as engine:
+            return await engine.fetch("https://example.com/article", headers=headers)
+
+    revalidated = asyncio.run(fetch({"If-None-Match": '"v1"'}))
+    unsolicited = asyncio.run(fetch(None))
+
+    assert (revalidated.not_modified, revalidated.error, revalidated.etag) == (True, None, '"v1"')
+    assert unsolicited.error == "HTTP 304"
@@ -1,6 +1,7 @@
 import socket
 from types import SimpleNamespace
 
+import httpx
 import pytest
 
 from flaskmarks.core.marks_import_thread import fetch_url_metadata
@@ -23,7 +24,7 @@ def _addrinfo_for(ip_text):
     ],
 )
 def test_fetch_path_blocks_non_public_targets_before_network(
-    monkeypatch, resolved_ip, reason
+    monkeypatch, outbound_transport, resolved_ip, reason
 ):
     def fake_getaddrinfo(_host, _port, proto=None):
         assert proto == socket.IPPROTO_TCP
@@ -33,7 +34,7 @@ def test_fetch_path_blocks_non_public_targets_before_network(
         raise AssertionError("Network fetch should not run for blocked targets")
 
     monkeypatch.setattr(url_fetch_validation.socket, "getaddrinfo", fake_getaddrinfo)
-    monkeypatch.setattr("flaskmarks.core.marks_import_thread.requests.head", fail_if_called)
+    outbound_transport(fail_if_called)
 
     with pytest.raises(URLTargetValidationError) as exc_info:
         fetch_url_metadata("http://blocked-target.example/path")
@@ -42,26 +43,21 @@ def test_fetch_path_blocks_non_public_targets_before_network(
     assert reason in str(exc_info.value)
 
 
-def test_fetch_path_allows_public_target_and_continues_fetch(monkeypatch):
-    called = {"head": 0}
+def test_fetch_path_allows_public_target_and_continues_fetch(monkeypatch, outbound_transport):
+    called = {"get": 0, "downloaded": None}
+    page = "<html><head><title>Example</title></head><body>Hi</body></html>"
 
     def fake_getaddrinfo(_host, _port, proto=None):
         assert proto == socket.IPPROTO_TCP
         return _addrinfo_for("93.184.216.34")
 
-    class FakeHeadResponse:
-        headers = {"content-type": "text/html; charset=utf-8"}
-
-        def __enter__(self):
-            return self
-
-        def __exit__(self, _exc_type, _exc, _tb):
-            return False
-
-    def fake_head(_url, timeout):
-        called["head"] += 1
-        assert timeout == 4
-        return FakeHeadResponse()
+    def handler(request):
+        # Content type comes from the GET, not a HEAD
+        assert request.method == "GET"
+        called["get"] += 1
+        return httpx.Response(
+            200, headers={"content-type": "text/html; charset=utf-8"}, text=page
+        )
 
     class FakeArticle:
         def __init__(self, _url):
@@ -70,8 +66,10 @@ def test_fetch_path_allows_public_target_and_continues_fetch(monkeypatch):
             self.keywords = []
             self.is_parsed = False
 
-        def download(self):
-            return None
+        def download(self, input_html=None):
+            # The already fetched body is handed over; no second download
+            assert input_html is not None
+            called["downloaded"] = input_html
 
         def parse(self):
             return None
@@ -80,7 +78,7 @@ def test_fetch_path_allows_public_target_and_continues_fetch(monkeypatch):
             return None
 
     monkeypatch.setattr(url_fetch_validation.socket, "getaddrinfo", fake_getaddrinfo)
-    monkeypatch.setattr("flaskmarks.core.marks_import_thread.requests.head", fake_head)
+    outbound_transport(handler)
     monkeypatch.setattr(
         "flaskmarks.core.marks_import_thread.tldextract.extract",
         lambda _url: SimpleNamespace(domain="example"),
@@ -91,7 +89,54 @@ def test_fetch_path_allows_public_target_and_continues_fetch(monkeypatch):
     url = "https://public-target.example/path"
     metadata = fetch_url_metadata(url)
 
-    assert called["head"] == 1
+    assert called["get"] == 1
+    assert called["downloaded"] == page
     assert metadata is not None
     assert metadata["url"] == url
     assert metadata["title"] == url
+
+
+def test_fetch_path_skips_parsing_binary_responses(monkeypatch, outbound_transport):
+    class UnreadableBody(httpx.SyncByteStream):
+        def __iter__(self):
+            raise AssertionError("Binary bodies must not be downloaded")
+
+    class FailingArticle:
+        def __init__(self, _url):
+            raise AssertionError("Binary responses must not be parsed")
+
+    monkeypatch.setattr(
+        url_fetch_validation.socket,
+        "getaddrinfo",
+        lambda _host, _port, proto=None: _addrinfo_for("93.184.216.34"),
+    )
+    outbound_transport(lambda _request: httpx.Response(
+        200, headers={"content-type": "application/pdf"}, stream=UnreadableBody()
+    ))
+    monkeypatch.setattr(
+        "flaskmarks.core.marks_import_thread.tldextract.extract",
+        lambda _url: SimpleNamespace(domain="example"),
+    )
+    monkeypatch.setattr("flaskmarks.core.marks_import_thread.Article", FailingArticle)
+
+    metadata = fetch_url_metadata("https://public-target.example/report.pdf")
+
+    assert metadata["tags"] == ["binary_file"]
+
+
+def test_fetch_path_does_not_extract_error_pages(monkeypatch, outbound_transport):
+    class FailingArticle:
+        def __init__(self, _url):
+            raise AssertionError("Error pages must not be parsed")
+
+    monkeypatch.setattr(
+        url_fetch_validation.socket,
+        "getaddrinfo",
+        lambda _host, _port, proto=None: _addrinfo_for("93.184.216.34"),
+    )
+    outbound_transport(lambda _request: httpx.Response(
+        404, headers={"content-type": "text/html"}, text="<title>404 Not Found</title>"
+    ))
+    monkeypatch.setattr("flaskmarks.core.marks_import_thread.Article", FailingArticle)
+
+    assert fetch_url_metadata("https://public-target.example/missing") is None
@@ -78,3 +78,28 @@ def test_post_mutations_require_csrf_token(monkeypatch):
     assert captured["deleted"] == 0
     assert captured["commits"] == 0
     assert fake_user._mark.clicks == 0
+
+
+def test_click_on_foreign_mark_is_forbidden(monkeypatch):
+    app = create_app()
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+
+    from flaskmarks.core.extensions import login_manager
+    from flaskmarks.views import marks as marks_view
+
+    fake_user = FakeUser()
+    login_manager._user_callback = lambda _user_id: fake_user
+    recorded = []
+    monkeypatch.setattr(
+        marks_view.click_buffer, "record", lambda *args, **_kwargs: recorded.append(args)
+    )
+
+    client = app.test_client()
+    _login(client, fake_user.id)
+
+    foreign = client.post("/mark/inc", data={"id": 999})
+    owned = client.post("/mark/inc", data={"id": fake_user._mark.id})
+
+    assert foreign.get_json() == {"status": "forbidden"}
+    assert owned.get_json() == {"status": "success"}
+    assert recorded == [(fake_user._mark.id, fake_user.id)]
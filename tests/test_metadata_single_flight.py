@@ -0,0 +1,294 @@
+import asyncio
+import socket
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from flaskmarks.core import marks_import_thread, single_flight, url_fetch_validation
+from flaskmarks.core.fetch_cache import fetch_cache
+from flaskmarks.core.marks_import_thread import fetch_url_metadata
+from flaskmarks.core.single_flight import SingleFlight, metadata_flights
+
+
+PAGE = "<html><head><title>Trending</title></head><body>Hi</body></html>"
+KEY = "https://example.com/trending"
+
+
+@pytest.fixture
+def extracted(monkeypatch):
+    calls = []
+
+    def fake_extract(url, _html):
+        calls.append(url)
+        return {
+            "type": "bookmark", "tags": ["news"], "url": url,
+            "title": "Trending", "description": "", "full_html": "",
+        }
+
+    monkeypatch.setattr(
+        url_fetch_validation.socket,
+        "getaddrinfo",
+        lambda _host, _port, proto=None: [
+            (socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP, "", ("93.184.216.34", 80))
+        ],
+    )
+    monkeypatch.setattr(marks_import_thread, "is_youtube_video", lambda _url: False)
+    monkeypatch.setattr(marks_import_thread, "extract_metadata", fake_extract)
+    return calls
+
+
+@pytest.fixture
+def shared_cache(monkeypatch, tmp_path):
+    # Stands in for another worker that held the advisory lock
+    monkeypatch.setattr(fetch_cache, "enabled", True)
+    monkeypatch.setattr(fetch_cache, "path", str(tmp_path / "pages.sqlite"))
+    monkeypatch.setattr(fetch_cache, "fresh_seconds", 30)
+    monkeypatch.setattr(fetch_cache, "_local", threading.local())
+    return fetch_cache
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_concurrent_quick_adds_share_one_fetch(extracted, outbound_transport):
+    started = threading.Event()
+    release = threading.Event()
+    requests = []
+
+    def handler(request):
+        requests.append(str(request.url))
+        started.set()
+        assert release.wait(5)
+        return httpx.Response(200, headers={"content-type": "text/html"}, text=PAGE)
+
+    outbound_transport(handler)
+    urls = [KEY, "https://EXAMPLE.com/trending", f"{KEY}#top"]
+    results = {}
+
+    def quick_add(url):
+        results[url] = fetch_url_metadata(url)
+
+    leader = threading.Thread(target=quick_add, args=(urls[0],))
+    leader.start()
+    assert started.wait(5)
+    followers = [threading.Thread(target=quick_add, args=(url,)) for url in urls[1:]]
+    for thread in followers:
+        thread.start()
+    _wait_for(lambda: metadata_flights.waiting(KEY) == len(followers))
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert len(requests) == 1
+    assert extracted == [KEY]
+    assert {url: data["url"] for url, data in results.items()} == {url: url for url in urls}
+    assert all(data["title"] == "Trending" for data in results.values())
+    # Followers get copies, not the leader's dict
+    results[urls[1]]["tags"].append("mine")
+    assert results[urls[0]]["tags"] == ["news"]
+
+
+def test_sequential_fetches_are_not_coalesced(extracted, outbound_transport):
+    outbound_transport(
+        lambda _request: httpx.Response(200, headers={"content-type": "text/html"}, text=PAGE)
+    )
+
+    fetch_url_metadata(KEY)
+    fetch_url_metadata(KEY)
+
+    assert len(extracted) == 2
+
+
+def test_freshly_fetched_page_is_reused_by_a_waiting_worker(
+    shared_cache, extracted, outbound_transport
+):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(
+            200, headers={"content-type": "text/html", "etag": '"v1"'}, text=PAGE
+        )
+
+    outbound_transport(handler)
+
+    fetch_url_metadata(KEY)
+    second = fetch_url_metadata(f"{KEY}#again")
+
+    assert len(requests) == 1
+    assert extracted == [KEY]
+    assert second["url"] == f"{KEY}#again"
+
+
+@pytest.mark.parametrize(
+    "response",
+    [
+        httpx.Response(200, headers={"content-type": "text/html"}, text=PAGE),
+        httpx.Response(200, headers={"content-type": "application/pdf"}, content=b"%PDF"),
+    ],
+    ids=["no-validators", "binary"],
+)
+def test_results_that_cannot_be_revalidated_are_shared_while_fresh(
+    monkeypatch, shared_cache, extracted, outbound_transport, response
+):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return response
+
+    outbound_transport(handler)
+
+    first = fetch_url_metadata(KEY)
+    second = fetch_url_metadata(f"{KEY}#again")
+
+    assert len(requests) == 1
+    assert second["title"] == first["title"]
+    assert second["url"] == f"{KEY}#again"
+
+    # Nothing to revalidate once no longer fresh: fetched again
+    monkeypatch.setattr(shared_cache, "fresh_seconds", 0.001)
+    time.sleep(0.01)
+    assert shared_cache.lookup(KEY) is None
+    fetch_url_metadata(KEY)
+    assert len(requests) == 2
+
+
+def test_youtube_metadata_is_shared_while_fresh(monkeypatch, shared_cache, extracted):
+    calls = []
+
+    def fake_youtube(url):
+        calls.append(url)
+        return {"type": "bookmark", "tags": ["video"], "url": url, "title": "Clip",
+                "description": "", "full_html": ""}
+
+    monkeypatch.setattr(marks_import_thread, "is_youtube_video", lambda _url: True)
+    monkeypatch.setattr(marks_import_thread, "youtube_metadata", fake_youtube)
+
+    fetch_url_metadata(KEY)
+    second = fetch_url_metadata(KEY)
+
+    assert calls == [KEY]
+    assert second["title"] == "Clip"
+
+
+def test_failed_fetches_are_not_shared(shared_cache, extracted, outbound_transport):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(500, headers={"content-type": "text/html"}, text="oops")
+
+    outbound_transport(handler)
+
+    assert fetch_url_metadata(KEY) is None
+    assert fetch_url_metadata(KEY) is None
+    assert len(requests) == 2
+
+
+class _BusyLockConnection:
+    """Connection on which another worker always holds the lock."""
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def execute(self, _statement, _params):
+        return SimpleNamespace(scalar=lambda: False)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        self.engine.open -= 1
+
+
+class _LockEngine:
+    def __init__(self):
+        self.open = 0
+        self.attempts = 0
+
+    def connect(self):
+        self.open += 1
+        self.attempts += 1
+        return _BusyLockConnection(self)
+
+
+def test_lock_wait_is_bounded_and_holds_no_connection(monkeypatch):
+    monkeypatch.setattr(single_flight, "LOCK_POLL_INTERVAL", 0.01)
+    engine = _LockEngine()
+
+    started = time.monotonic()
+    connection = single_flight._acquire(engine, 1, time.monotonic() + 0.05)
+
+    assert connection is None
+    assert time.monotonic() - started < 1
+    assert engine.attempts > 1
+    assert engine.open == 0
+
+
+def test_leader_errors_reach_followers_and_are_not_kept():
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    errors = []
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise ValueError("boom")
+
+    def call():
+        try:
+            flights.do("key", failing)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    threads[0].start()
+    assert started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    _wait_for(lambda: flights.waiting("key") == 2)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(errors) == 3
+    assert flights.do("key", lambda: "fresh") == "fresh"
+
+
+def test_async_followers_on_other_event_loops_share_the_call():
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    runs = []
+    results = []
+
+    async def fetch():
+        runs.append(1)
+        started.set()
+        await asyncio.to_thread(release.wait, 5)
+        return {"title": "Trending"}
+
+    def pipeline():
+        results.append(asyncio.run(flights.do_async("key", fetch)))
+
+    threads = [threading.Thread(target=pipeline) for _ in range(3)]
+    threads[0].start()
+    assert started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    _wait_for(lambda: flights.waiting("key") == 2)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert runs == [1]
+    assert results == [{"title": "Trending"}] * 3
@@ -0,0 +1,132 @@
+import asyncio
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from flaskmarks.api import auth as auth_api
+from flaskmarks.core import dns_cache as dns_cache_module
+from flaskmarks.core import fetch_engine, http_client
+from flaskmarks.core.dns_cache import dns_cache
+from flaskmarks.core.fetch_engine import AsyncFetchEngine, fetch_page
+from flaskmarks.core.http_client import outbound_http
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = f"<p>{self.path}</p>".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args):
+        pass
+
+
+@pytest.fixture
+def local_server(monkeypatch):
+    """A keep-alive HTTP server on loopback, which the validator is told to allow."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    monkeypatch.setattr(fetch_engine, "ensure_public_http_url", lambda _url: "127.0.0.1")
+    monkeypatch.setattr(http_client, "resolve_public_address", lambda host: host)
+    monkeypatch.setattr(outbound_http, "_stats", http_client.ConnectionStats())
+    outbound_http.close()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    outbound_http.close()
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetches_to_one_host_reuse_a_pooled_connection(local_server):
+    results = [fetch_page(f"{local_server}/page/{n}") for n in range(3)]
+
+    assert [result.body for result in results] == [
+        "<p>/page/0</p>", "<p>/page/1</p>", "<p>/page/2</p>",
+    ]
+    assert outbound_http.stats() == {
+        "requests": 3, "connections": 1, "reused": 2, "reuse_ratio": 0.667,
+    }
+
+
+def test_client_is_shared_across_threads(local_server):
+    clients = []
+    threads = [
+        threading.Thread(target=lambda: clients.append(outbound_http.client))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(client) for client in clients}) == 1
+
+
+def test_real_transports_dial_the_resolved_address(monkeypatch, local_server):
+    port = local_server.rsplit(":", 1)[1]
+    resolved = []
+
+    def resolve_public_address(host):
+        resolved.append(host)
+        return "127.0.0.1"
+
+    # pinned.example has no DNS record; only the pinned dial can reach it
+    monkeypatch.setattr(http_client, "resolve_public_address", resolve_public_address)
+
+    async def fetch_async():
+        async with AsyncFetchEngine() as engine:
+            return await engine.fetch(f"http://pinned.example:{port}/async")
+
+    assert fetch_page(f"http://pinned.example:{port}/sync").body == "<p>/sync</p>"
+    assert asyncio.run(fetch_async()).body == "<p>/async</p>"
+    assert resolved == ["pinned.example", "pinned.example"]
+
+
+def test_pinning_fails_loudly_without_a_pool_backend():
+    with pytest.raises(RuntimeError, match="Cannot pin connections of MockTransport"):
+        http_client._pin(
+            httpx.MockTransport(lambda _request: httpx.Response(200)),
+            http_client.PinnedBackend,
+            http_client.ConnectionStats(),
+        )
+
+
+def test_health_endpoint_reports_outbound_counters(monkeypatch, local_server, app):
+    monkeypatch.setattr(auth_api, "verify_token", lambda _token: SimpleNamespace(id=1))
+    fetch_page(f"{local_server}/a")
+    fetch_page(f"{local_server}/b")
+    # Patched after the fetches, which connect through the real resolver
+    monkeypatch.setattr(
+        dns_cache_module.socket,
+        "getaddrinfo",
+        lambda _host, _port, proto=None: [
+            (socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP, "", ("93.184.216.34", 0))
+        ],
+    )
+    dns_cache.getaddrinfo("news.example")
+    dns_cache.getaddrinfo("news.example")
+
+    response = app.test_client().get(
+        "/api/v1/health/outbound", headers={"Authorization": "Bearer valid-token"}
+    )
+
+    assert response.status_code == 200
+    data = response.get_json()["data"]
+    assert data["http"] == {
+        "requests": 2, "connections": 1, "reused": 1, "reuse_ratio": 0.5,
+    }
+    assert data["dns"] == {"hits": 1, "misses": 1, "entries": 1, "hit_ratio": 0.5}
+
+
+def test_health_endpoint_requires_a_token(app):
+    assert app.test_client().get("/api/v1/health/outbound").status_code == 401
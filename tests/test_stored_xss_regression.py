@@ -19,7 +19,7 @@ class FakeUser(UserMixin):
     def q_marks_by_url(self, _url):
         return None
 
-    def get_mark_by_id(self, mark_id):
+    def get_mark_by_id(self, mark_id, include_content=False):
         if int(mark_id) == self._mark.id:
             return self._mark
         return None